@@ -40,9 +40,7 @@ class HanaLateDeserializableMeta(HanaObjectMeta):
 
         def readable_deserialize(self, json: Dict[str, Any], deserializer: ReadableDeserializer):
             raw_data = hana_meta.raw_data_class()
-            for child in HanaObjectMeta.valid_json_children(json, hana_meta):
-                property_ = hana_meta._property_by_name[child["func"]]
-                property_.readable_deserialize_into_raw_data(child, raw_data, deserializer)
+            hana_meta.readable_deserialize_into_raw_data(json, raw_data, deserializer)
             for property_ in hana_meta.properties:
                 assert isinstance(property_.type_spec, VariableTypeSpec)
                 variable = getattr(self, property_.private_field_name)
@@ -58,12 +56,7 @@ class HanaLateDeserializableMeta(HanaObjectMeta):
             raw_data = hana_meta.raw_data_class()
             if VALUE_TAG in value:
                 assert isinstance(value[VALUE_TAG], dict)
-                for key_, value_ in value[VALUE_TAG].items():
-                    assert isinstance(key_, int)
-                    if key_ not in hana_meta._property_by_id:
-                        continue
-                    property_spec = hana_meta._property_by_id[key_]
-                    property_spec.binary_deserialize_into_raw_data(value_, raw_data, deserializer)
+                hana_meta.binary_deserialize_into_raw_data(value[VALUE_TAG], raw_data, deserializer)
                 for property_ in hana_meta.properties:
                     assert isinstance(property_.type_spec, VariableTypeSpec)
                     variable = getattr(self, property_.private_field_name)
@@ -1,6 +1,7 @@
 import typing
 from typing import List, Any, Dict
 
+import numpy
 from makefun import with_signature
 
 from hana04.apt.extensible.constants import HANA_META_PROPERTY_NAME
@@ -13,18 +14,22 @@ from hana04.apt.serialize.decorators import hana_binary_serializer_by_type_id, h
 from hana04.base.changeprop.variable import Variable
 from hana04.base.extension.extensions.validator import Validator
 from hana04.base.extension.fluent_builder import FluentBuilder
+from hana04.base.caching.wrapped import wrap_if_needed
 from hana04.base.extension.hana_customized_builders import HanaCustomizedBuilders
 from hana04.base.extension.hana_extensible import HanaExtensible
 from hana04.base.extension.hana_extension_manager import HanaExtensionManager
 from hana04.base.extension.hana_extension_uber_factory import HanaExtensionUberFactory
 from hana04.base.serialize.binary.binary_deserializer import TypeBinaryDeserializer, BinaryDeserializer
-from hana04.base.serialize.binary.binary_serializer import BinarySerializer
 from hana04.base.serialize.binary.constants import EXTENSION_TAG
 from hana04.base.serialize.hana_serializable_serializers import HanaSerializableBinarySerializer, \
-    HanaSerializableReadableSerializer
-from hana04.base.serialize.readable.readable_deserializer import TypeReadableDeserializer, ReadableDeserializer
+    HanaSerializableReadableSerializer, HanaSerializableReadableDeserializer
+from hana04.base.serialize.readable.constants import READABLE_LAYOUT_PROPS
+from hana04.base.serialize.readable.readable_deserializer import ReadableDeserializer
+from hana04.base.serialize.readable.readable_stream_reader import ReadableChildrenStream, ReadablePropsStream
 from hana04.base.serialize.readable.readable_serializer import ReadableSerializer
-from hana04.base.util.message_packer import MessagePacker
+from hana04.base.util.hana_map_entry import HanaMapEntry
+from hana04.base.util.message_unpacker import MessageUnpacker
+from hana04.base.util.packed_array import pack_packed_array
 from jyuusu.binder import Binder, Module as JyuusuModule
 from jyuusu.constructor_resolver import memoized, injectable_class, injectable_class_with_specs, ResolverSpec
 from jyuusu.factory_resolver import injectable_factory, factory_class
@@ -40,6 +45,8 @@ class HanaObjectMeta(HanaMeta):
         self._property_by_id: typing.Dict[int, HanaPropertySpec] = {}
         self._property_by_name: typing.Dict[str, HanaPropertySpec] = {}
         self._raw_data_class = None
+        self._binary_raw_data_decoders: typing.Dict[int, Any] = {}
+        self._binary_stream_raw_data_decoders: typing.Dict[int, Any] = {}
         self._impl_class = None
         self._default_builder_class = None
         self._readable_serializer_class = None
@@ -120,6 +127,10 @@ class HanaObjectMeta(HanaMeta):
         assert cls.__dict__[HANA_META_PROPERTY_NAME] == self
         self.make_hana_interface(cls)
         self._raw_data_class = self.create_raw_data_class()
+        self._binary_raw_data_decoders = self.create_binary_raw_data_decoders(stream=False)
+        self._binary_stream_raw_data_decoders = self.create_binary_raw_data_decoders(stream=True)
+        self._readable_raw_data_decoders = self.create_readable_raw_data_decoders(prop=False)
+        self._readable_prop_raw_data_decoders = self.create_readable_raw_data_decoders(prop=True)
         self._impl_class = self.create_impl_class(cls)
         self._default_builder_class = self.create_default_builder_class(cls)
         self._binary_serializer_class = self.create_binary_serializer_class(cls)
@@ -138,6 +149,97 @@ class HanaObjectMeta(HanaMeta):
 
         return _RawData
 
+    def create_binary_raw_data_decoders(self, stream: bool) -> typing.Dict[int, Any]:
+        """
+        Generate, for each property, a generator function (value, raw_data) that does what
+        HanaPropertySpec.binary_deserialize_into_raw_data does but yields the serialized values to deserialize, and
+        return them keyed by property id. If stream is True, the functions are (unpacker, raw_data) instead, read the
+        value from the unpacker and yield the unpacker to receive the values that have to be deserialized.
+        """
+        decoders = {}
+        for property_ in self.properties:
+            if stream:
+                body = property_.type_spec.binary_stream_deserialize_into_raw_data_code(property_.name, "value")
+                lines = ["def decode(unpacker, raw_data):"]
+            else:
+                body = property_.type_spec.binary_deserialize_into_raw_data_code(property_.name, "value")
+                lines = ["def decode(value, raw_data):"]
+            lines.extend("    " + line for line in body)
+            source = "\n".join(lines) + "\n"
+            namespace = {
+                "wrap_if_needed": wrap_if_needed,
+                "numpy": numpy,
+            }
+            kind = "binary stream" if stream else "binary"
+            exec(compile(source, f"<{kind} decoder of {self.primary_type_name}.{property_.name}>", "exec"), namespace)
+            decoders[property_.id] = namespace["decode"]
+        return decoders
+
+    def binary_deserialize_into_raw_data(
+            self, value: typing.Dict[int, Any], raw_data, deserializer: BinaryDeserializer):
+        deserializer.run(self.iter_binary_deserialize_into_raw_data(value, raw_data))
+
+    def iter_binary_deserialize_into_raw_data(self, value: typing.Dict[int, Any], raw_data) -> typing.Generator:
+        decoders = self._binary_raw_data_decoders
+        for key_, value_ in value.items():
+            decoder = decoders.get(key_)
+            if decoder is not None:
+                yield from decoder(value_, raw_data)
+
+    def create_readable_raw_data_decoders(self, prop: bool) -> typing.Dict[str, Any]:
+        """
+        Generate, for each property, a generator function (value, raw_data) that does what
+        HanaPropertySpec.readable_deserialize_into_raw_data does to a child with the property's name as its "func" but
+        yields the JSON to deserialize, and return them keyed by property name. If prop is True, the functions
+        deserialize the value of the property in the "props" of JSON in the READABLE_LAYOUT_PROPS layout instead.
+        """
+        decoders = {}
+        for property_ in self.properties:
+            if prop:
+                body = property_.type_spec.readable_deserialize_prop_into_raw_data_code(property_.name, "value")
+            else:
+                body = property_.type_spec.readable_deserialize_into_raw_data_code(property_.name, "value")
+            lines = ["def decode(value, raw_data):"]
+            lines.extend("    " + line for line in body)
+            source = "\n".join(lines) + "\n"
+            namespace = {
+                "wrap_if_needed": wrap_if_needed,
+            }
+            exec(compile(source, f"<readable decoder of {self.primary_type_name}.{property_.name}>", "exec"), namespace)
+            decoders[property_.name] = namespace["decode"]
+        return decoders
+
+    def readable_deserialize_into_raw_data(
+            self, json: typing.Dict[str, Any], raw_data, deserializer: ReadableDeserializer):
+        deserializer.run(self.iter_readable_deserialize_into_raw_data(json, raw_data))
+
+    def iter_readable_deserialize_into_raw_data(self, json: typing.Dict[str, Any], raw_data) -> typing.Generator:
+        """
+        Deserialize the children of the readable JSON of an object, in either layout, into raw_data, skipping children
+        of unknown properties. This is a generator that yields the JSON to deserialize and receives its deserialized
+        value.
+        """
+        if "props" in json:
+            decoders = self._readable_prop_raw_data_decoders
+            for name, value in json["props"].items():
+                decoder = decoders.get(name)
+                if decoder is not None:
+                    yield from decoder(value, raw_data)
+        if "children" in json:
+            decoders = self._readable_raw_data_decoders
+            for child in json["children"]:
+                decoder = decoders.get(child.get("func"))
+                if decoder is not None:
+                    yield from decoder(child, raw_data)
+
+    @staticmethod
+    def create_validated_instance(impl_factory, raw_data):
+        instance: HanaExtensible = impl_factory.create(raw_data)
+        if instance.supports_extension(Validator):
+            validator: Validator = instance.get_extension(Validator)
+            validator.validate()
+        return instance
+
     def create_hana_object_member_dict(self, cls):
         hana_object_meta = self
 
@@ -176,27 +278,46 @@ class HanaObjectMeta(HanaMeta):
 
         def get_readable_children_list(self, readable_serializer: ReadableSerializer) \
                 -> List[typing.Dict[str, Any]]:
+            return [
+                readable_serializer.serialize(value, func)
+                for func, value in self.get_readable_child_values()
+            ]
+
+        def get_readable_child_values(self) -> List[typing.Tuple[str, Any]]:
             result = []
             for property_ in hana_object_meta.properties:
-                property_.add_readable_children_to_list(
-                    value=getattr(self, property_.private_field_name),
-                    readable_serializer=readable_serializer,
-                    result=result)
+                value = getattr(self, property_.private_field_name)
+                for child_value in property_.type_spec.readable_child_values(value):
+                    result.append((property_.name, child_value))
             return result
 
-        def binary_serialize_content(self, packer: MessagePacker, binary_serializer: BinarySerializer):
-            map_size = 1
+        def get_readable_prop_values(self) -> List[typing.Tuple[str, List[Any], bool]]:
+            result = []
             for property_ in hana_object_meta.properties:
                 value = getattr(self, property_.private_field_name)
-                if property_.should_binary_serialize_value(value):
-                    map_size += 1
-            packer.pack_map_header(map_size)
+                child_values = list(property_.type_spec.readable_child_values(value))
+                if len(child_values) > 0:
+                    result.append((property_.name, child_values, property_.type_spec.has_readable_child_list()))
+            return result
+
+        def binary_serialize_content(self, packer, binary_serializer):
+            binary_serializer.run(self.iter_binary_serialize_content(packer, binary_serializer))
+
+        def get_binary_property_values(self) -> typing.Dict[int, Any]:
+            result = {}
             for property_ in hana_object_meta.properties:
                 value = getattr(self, property_.private_field_name)
-                property_.binary_serialize_value(value, packer, binary_serializer)
+                if isinstance(property_.type_spec, VariableTypeSpec):
+                    value = value.value()
+                if value is not None:
+                    result[property_.id] = value
+            return result
 
-            packer.pack_int(EXTENSION_TAG)
-            binary_serializer.serialize_extensions(self)
+        def get_variable_versions(self) -> typing.Tuple[int, ...]:
+            return tuple(
+                getattr(self, property_.private_field_name).version()
+                for property_ in hana_object_meta.properties
+                if isinstance(property_.type_spec, VariableTypeSpec))
 
         members = {
             "__init__": __init__,
@@ -209,13 +330,121 @@ class HanaObjectMeta(HanaMeta):
             "get_serialized_type_name": get_serialized_type_name,
             "get_serialized_type_id": get_serialized_type_id,
             "get_readable_children_list": get_readable_children_list,
+            "get_readable_child_values": get_readable_child_values,
+            "get_readable_prop_values": get_readable_prop_values,
             "binary_serialize_content": binary_serialize_content,
+            "iter_binary_serialize_content": self.create_iter_binary_serialize_content_method(),
+            "iter_readable_serialize_content": self.create_iter_readable_serialize_content_method(cls),
+            "get_binary_property_values": get_binary_property_values,
+            "get_variable_versions": get_variable_versions,
         }
         for property_ in self.properties:
             members[property_.name] = self.create_property_method(property_.name, property_.private_field_name)
 
         return members
 
+    def create_iter_binary_serialize_content_method(self):
+        """
+        Generate iter_binary_serialize_content for the properties of this type. The generated generator writes the
+        same bytes as calling HanaPropertySpec.binary_serialize_value on every property but does not dispatch through
+        the PropertyTypeSpecs, and it computes the map size from the optional properties only.
+        """
+        value_lines = []
+        map_size_lines = []
+        serialize_lines = []
+        num_required_properties = 0
+        for index, property_ in enumerate(self.properties):
+            type_spec = property_.type_spec
+            value_name = f"value{index}"
+            value_expression = type_spec.binary_value_expression(f"self.{property_.private_field_name}")
+            value_lines.append(f"{value_name} = {value_expression}")
+            condition = type_spec.binary_presence_condition(value_name)
+            property_lines = [f"packer.pack_int({property_.id})"] + type_spec.binary_serialize_value_code(value_name)
+            if condition is None:
+                num_required_properties += 1
+                serialize_lines.extend(property_lines)
+            else:
+                map_size_lines.append(f"if {condition}:")
+                map_size_lines.append("    map_size += 1")
+                serialize_lines.append(f"if {condition}:")
+                serialize_lines.extend("    " + line for line in property_lines)
+
+        lines = ["def iter_binary_serialize_content(self, packer, binary_serializer):"]
+        body = list(value_lines)
+        # The extensions always take one entry.
+        body.append(f"map_size = {num_required_properties + 1}")
+        body.extend(map_size_lines)
+        body.append("packer.pack_map_header(map_size)")
+        body.extend(serialize_lines)
+        body.append("packer.pack_int(EXTENSION_TAG)")
+        body.append("yield binary_serializer.iter_serialize_extensions(self)")
+        lines.extend("    " + line for line in body)
+        source = "\n".join(lines) + "\n"
+
+        namespace = {
+            "EXTENSION_TAG": EXTENSION_TAG,
+            "HanaMapEntry": HanaMapEntry,
+            "pack_packed_array": pack_packed_array,
+            "numpy": numpy,
+        }
+        exec(compile(source, f"<iter_binary_serialize_content of {self.primary_type_name}>", "exec"), namespace)
+        return namespace["iter_binary_serialize_content"]
+
+    def create_iter_readable_serialize_content_method(self, cls):
+        """
+        Generate iter_readable_serialize_content for the properties of this type. The generated generator returns the
+        same JSON as HanaSerializableReadableSerializer.iter_serialize does with get_readable_child_values or
+        get_readable_prop_values, in the layout of the ReadableSerializer, but does not dispatch through the
+        PropertyTypeSpecs.
+        """
+        value_lines = []
+        children_lines = ["children = []"]
+        props_lines = ["props = {}"]
+        for index, property_ in enumerate(self.properties):
+            type_spec = property_.type_spec
+            name = property_.name
+            value_name = f"value{index}"
+            value_expression = type_spec.readable_value_expression(f"self.{property_.private_field_name}")
+            value_lines.append(f"{value_name} = {value_expression}")
+            children_lines.extend(type_spec.readable_child_values_code(
+                value_name,
+                lambda expression: [
+                    f"child = yield {expression}",
+                    f"child[\"func\"] = {name!r}",
+                    "children.append(child)",
+                ]))
+            if type_spec.has_readable_child_list():
+                items_name = f"items{index}"
+                props_lines.append(f"{items_name} = []")
+                props_lines.extend(type_spec.readable_child_values_code(
+                    value_name, lambda expression: [f"{items_name}.append((yield {expression}))"]))
+                props_lines.append(f"if len({items_name}) > 0:")
+                props_lines.append(f"    props[{name!r}] = {items_name}")
+            else:
+                props_lines.extend(type_spec.readable_child_values_code(
+                    value_name, lambda expression: [f"props[{name!r}] = yield {expression}"]))
+        children_lines.append(f"result = {{\"type\": {self.primary_type_name!r}, \"children\": children}}")
+        props_lines.append(f"result = {{\"type\": {self.primary_type_name!r}, \"props\": props}}")
+
+        lines = ["def iter_readable_serialize_content(self, readable_serializer):"]
+        body = list(value_lines)
+        body.append("if readable_serializer.layout == READABLE_LAYOUT_PROPS:")
+        body.extend("    " + line for line in props_lines)
+        body.append("else:")
+        body.extend("    " + line for line in children_lines)
+        if issubclass(cls, HanaExtensible):
+            body.append("result[\"extensions\"] = yield readable_serializer.iter_serialize_extensions(self)")
+        body.append("return result")
+        lines.extend("    " + line for line in body)
+        source = "\n".join(lines) + "\n"
+
+        namespace = {
+            "READABLE_LAYOUT_PROPS": READABLE_LAYOUT_PROPS,
+            "HanaMapEntry": HanaMapEntry,
+        }
+        exec(compile(source, f"<iter_readable_serialize_content of {self.primary_type_name}>", "exec"), namespace)
+        return namespace["iter_readable_serialize_content"]
+
     def create_impl_class(self, cls):
         members = self.create_hana_object_member_dict(cls)
         _Impl = type("_Impl", (cls,), members)
@@ -232,11 +461,7 @@ class HanaObjectMeta(HanaMeta):
                 self._instance = hana_object_meta._raw_data_class()
 
             def build(self) -> cls:
-                instance: HanaExtensible = self._impl_factory.create(self._instance)
-                if instance.supports_extension(Validator):
-                    validator: Validator = instance.get_extension(Validator)
-                    validator.validate()
-                return instance
+                return HanaObjectMeta.create_validated_instance(self._impl_factory, self._instance)
 
         for property in self.properties:
             property.type_spec.add_raw_data_builder_methods(_DefaultBuilder, property.name)
@@ -279,35 +504,87 @@ class HanaObjectMeta(HanaMeta):
 
         @hana_binary_deserializer(hana_object_meta.type_id)
         @memoized
-        @injectable_class
+        @injectable_class_with_specs(impl_factory=ResolverSpec.of(factory_class(hana_object_meta.impl_class)))
         class _HanaBinaryDeserializer(TypeBinaryDeserializer[cls]):
             def __init__(self,
+                         impl_factory,
                          default_builder_provider: Provider[hana_object_meta.default_builder_class],
                          customized_builders: HanaCustomizedBuilders):
+                self.impl_factory = impl_factory
                 self.default_builder_provider = default_builder_provider
                 self.customized_builders = customized_builders
 
             def deserialize(self, value: Any, binary_deserializer: BinaryDeserializer) -> cls:
+                return binary_deserializer.run(self.iter_deserialize(value, binary_deserializer))
+
+            def iter_deserialize(self, value: Any, binary_deserializer: BinaryDeserializer) -> typing.Generator:
                 assert isinstance(value, dict)
 
                 customized_builder_factory = self.customized_builders.get_factory(cls)
-                builder: FluentBuilder
                 if customized_builder_factory is None:
-                    builder = self.default_builder_provider.get()
+                    # Without a customized builder, the default builder would only copy the values into a _RawData.
+                    raw_data = hana_object_meta.raw_data_class()
+                    yield from hana_object_meta.iter_binary_deserialize_into_raw_data(value, raw_data)
+                    instance = HanaObjectMeta.create_validated_instance(self.impl_factory, raw_data)
                 else:
                     builder = customized_builder_factory.create()
+                    for key_, value_ in value.items():
+                        assert isinstance(key_, int)
+                        if key_ not in hana_object_meta._property_by_id:
+                            continue
+                        property_spec = hana_object_meta._property_by_id[key_]
+                        yield from property_spec.iter_binary_deserialize_into_builder(
+                            value_, builder, binary_deserializer)
+                    instance = builder.build()
 
-                for key_, value_ in value.items():
-                    assert isinstance(key_, int)
-                    if key_ not in hana_object_meta._property_by_id:
-                        continue
-                    property_spec = hana_object_meta._property_by_id[key_]
-                    property_spec.binary_deserialize_into_builder(value_, builder, binary_deserializer)
-
-                instance = builder.build()
                 binary_deserializer.deserialize_extensions(value, instance)
                 return instance
 
+            def stream_deserialize(self, unpacker: MessageUnpacker, binary_deserializer: BinaryDeserializer) -> cls:
+                return binary_deserializer.run(self.iter_stream_deserialize(unpacker, binary_deserializer))
+
+            def iter_stream_deserialize(self,
+                                        unpacker: MessageUnpacker,
+                                        binary_deserializer: BinaryDeserializer) -> typing.Generator:
+                customized_builder_factory = self.customized_builders.get_factory(cls)
+                if customized_builder_factory is None:
+                    # As in iter_deserialize, fill a _RawData without going through the default builder.
+                    builder = None
+                    raw_data = hana_object_meta.raw_data_class()
+                    decoders = hana_object_meta._binary_stream_raw_data_decoders
+                else:
+                    builder = customized_builder_factory.create()
+                    raw_data = None
+                instance = None
+                map_size = unpacker.read_map_header()
+                for _ in range(map_size):
+                    key_ = unpacker.unpack()
+                    assert isinstance(key_, int)
+                    if key_ == EXTENSION_TAG:
+                        # The extensions are written after all the properties.
+                        assert instance is None
+                        instance = self.build(builder, raw_data)
+                        binary_deserializer.stream_deserialize_extensions(unpacker, instance)
+                    elif key_ in hana_object_meta._property_by_id:
+                        assert instance is None
+                        if builder is None:
+                            yield from decoders[key_](unpacker, raw_data)
+                        else:
+                            property_spec = hana_object_meta._property_by_id[key_]
+                            yield from property_spec.iter_binary_stream_deserialize_into_builder(
+                                unpacker, builder, binary_deserializer)
+                    else:
+                        unpacker.skip()
+
+                if instance is None:
+                    instance = self.build(builder, raw_data)
+                return instance
+
+            def build(self, builder: typing.Optional[FluentBuilder], raw_data) -> cls:
+                if builder is None:
+                    return HanaObjectMeta.create_validated_instance(self.impl_factory, raw_data)
+                return builder.build()
+
             def get_serialized_type(self) -> type:
                 return cls
 
@@ -318,7 +595,7 @@ class HanaObjectMeta(HanaMeta):
         if "children" not in json:
             return
         children = json["children"]
-        assert isinstance(children, list)
+        assert isinstance(children, (list, ReadableChildrenStream))
         for child in children:
             assert isinstance(child, dict)
             if not "func" in child:
@@ -328,32 +605,61 @@ class HanaObjectMeta(HanaMeta):
                 continue
             yield child
 
+    @staticmethod
+    def valid_json_property_children(json: Dict[str, Any], hana_object_meta: 'HanaObjectMeta'):
+        """
+        Yield the (property, child JSON) pairs of the readable JSON of an object in either the READABLE_LAYOUT_PROPS or
+        the READABLE_LAYOUT_CHILDREN layout, skipping children of unknown properties.
+        """
+        if "props" in json:
+            props = json["props"]
+            assert isinstance(props, (dict, ReadablePropsStream))
+            for name, value in props.items():
+                property_ = hana_object_meta._property_by_name.get(name)
+                if property_ is None:
+                    continue
+                if property_.type_spec.has_readable_child_list():
+                    assert isinstance(value, list)
+                    for child in value:
+                        assert isinstance(child, dict)
+                        yield property_, child
+                else:
+                    assert isinstance(value, dict)
+                    yield property_, value
+        for child in HanaObjectMeta.valid_json_children(json, hana_object_meta):
+            yield hana_object_meta._property_by_name[child["func"]], child
+
     def create_readable_deserializer(self, cls):
         hana_object_meta = self
 
         @hana_readable_deserializer(*hana_object_meta.type_names)
         @memoized
-        @injectable_class
-        class _HanaReadableDeserializer(TypeReadableDeserializer[cls]):
+        @injectable_class_with_specs(impl_factory=ResolverSpec.of(factory_class(hana_object_meta.impl_class)))
+        class _HanaReadableDeserializer(HanaSerializableReadableDeserializer[cls]):
             def __init__(self,
+                         impl_factory,
                          default_builder_provider: Provider[hana_object_meta.default_builder_class],
                          customized_builders: HanaCustomizedBuilders):
+                self.impl_factory = impl_factory
                 self.default_builder_provider = default_builder_provider
                 self.customized_builders = customized_builders
 
             def deserialize(self, json: Dict[str, Any], deserializer: ReadableDeserializer):
+                return deserializer.run(self.iter_deserialize(json, deserializer))
+
+            def iter_deserialize(self, json: Dict[str, Any], deserializer: ReadableDeserializer) -> typing.Generator:
                 customized_builder_factory = self.customized_builders.get_factory(cls)
-                builder: FluentBuilder
                 if customized_builder_factory is None:
-                    builder = self.default_builder_provider.get()
+                    # Without a customized builder, the default builder would only copy the values into a _RawData.
+                    raw_data = hana_object_meta.raw_data_class()
+                    yield from hana_object_meta.iter_readable_deserialize_into_raw_data(json, raw_data)
+                    instance = HanaObjectMeta.create_validated_instance(self.impl_factory, raw_data)
                 else:
                     builder = customized_builder_factory.create()
+                    for property_, child in HanaObjectMeta.valid_json_property_children(json, hana_object_meta):
+                        yield from property_.iter_readable_deserialize_into_builder(child, builder)
+                    instance = builder.build()
 
-                for child in HanaObjectMeta.valid_json_children(json, hana_object_meta):
-                    property_ = hana_object_meta._property_by_name[child["func"]]
-                    property_.readable_deserialize_into_builder(child, builder, deserializer)
-
-                instance = builder.build()
                 deserializer.deserialize_extensions(json, instance)
                 return instance
 
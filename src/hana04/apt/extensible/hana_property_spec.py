@@ -1,6 +1,6 @@
 import typing
 from dataclasses import dataclass
-from typing import Any
+from typing import Any, Generator
 
 from hana04.apt.extensible.property_type_spec import PropertyTypeSpec
 from hana04.base.serialize.binary.binary_deserializer import BinaryDeserializer
@@ -8,6 +8,7 @@ from hana04.base.serialize.binary.binary_serializer import BinarySerializer
 from hana04.base.serialize.readable.readable_deserializer import ReadableDeserializer
 from hana04.base.serialize.readable.readable_serializer import ReadableSerializer
 from hana04.base.util.message_packer import MessagePacker
+from hana04.base.util.message_unpacker import MessageUnpacker
 
 
 @dataclass(eq=True, frozen=True)
@@ -43,11 +44,15 @@ class HanaPropertySpec:
     def should_binary_serialize_value(self, value: Any):
         return self.type_spec.should_binary_serialize_value(value)
 
-    def binary_deserialize_into_builder(self, value, builder, deserializer: BinaryDeserializer):
-        self.type_spec.binary_deserialize_into_builder(self.name, value, builder, deserializer)
+    def iter_binary_deserialize_into_builder(self, value, builder, deserializer: BinaryDeserializer) -> Generator:
+        return self.type_spec.iter_binary_deserialize_into_builder(self.name, value, builder, deserializer)
 
-    def readable_deserialize_into_builder(self, value, builder, deserializer: ReadableDeserializer):
-        self.type_spec.readable_deserialize_into_builder(self.name, value, builder, deserializer)
+    def iter_binary_stream_deserialize_into_builder(
+            self, unpacker: MessageUnpacker, builder, deserializer: BinaryDeserializer) -> Generator:
+        return self.type_spec.iter_binary_stream_deserialize_into_builder(self.name, unpacker, builder, deserializer)
+
+    def iter_readable_deserialize_into_builder(self, value, builder) -> Generator:
+        return self.type_spec.iter_readable_deserialize_into_builder(self.name, value, builder)
 
     def readable_deserialize_into_raw_data(
             self, value: typing.Dict[str, Any], raw_data, deserializer: ReadableDeserializer):
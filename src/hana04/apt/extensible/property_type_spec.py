@@ -1,18 +1,35 @@
 import typing
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
-from typing import Union, List, Any
+from typing import Union, List, Any, Generator, Iterable, Callable
 
+import numpy
 from makefun import with_signature
 from hana04.apt.util import capitalize_first_letter
 from hana04.base.caching.wrapped import Wrapped, wrap_if_needed
 from hana04.base.changeprop.variable import Variable
 from hana04.base.serialize.binary.binary_deserializer import BinaryDeserializer
 from hana04.base.serialize.binary.binary_serializer import BinarySerializer
+from hana04.base.serialize.binary.constants import BINARY_FORMAT_VERSION_PACKED_ARRAYS, \
+    BINARY_FORMAT_VERSION_UNTAGGED_PRIMITIVES, BINARY_FORMAT_VERSION_NATIVE_MAPS
 from hana04.base.serialize.readable.readable_deserializer import ReadableDeserializer
 from hana04.base.serialize.readable.readable_serializer import ReadableSerializer
 from hana04.base.util.hana_map_entry import HanaMapEntry
 from hana04.base.util.message_packer import MessagePacker
+from hana04.base.util.message_unpacker import MessageUnpacker
+from hana04.base.util.packed_array import PACKED_ARRAY_DTYPE_CODES, pack_packed_array
+
+# The terminal types whose values are written without type tags in format version
+# BINARY_FORMAT_VERSION_UNTAGGED_PRIMITIVES and later, with the MessagePacker method that writes them and the
+# conversion applied before. They are read back by calling the declared type on the unpacked value.
+UNTAGGED_PRIMITIVES = {
+    numpy.int32: ("pack_int", int),
+    numpy.int64: ("pack_int", int),
+    numpy.float32: ("pack_single_float", float),
+    numpy.float64: ("pack_double_float", float),
+    bool: ("pack_bool", bool),
+    str: ("pack_str", str),
+}
 
 
 class PropertyTypeSpec(ABC):
@@ -58,14 +75,60 @@ class PropertyTypeSpec(ABC):
         pass
 
     @abstractmethod
+    def readable_child_values(self, value) -> Iterable[Any]:
+        """
+        Return the values that are written as the readable children of a property with the given value.
+        """
+        pass
+
+    def has_readable_child_list(self) -> bool:
+        """
+        Return whether the readable children of the property are written as a JSON array in the READABLE_LAYOUT_PROPS
+        layout. Otherwise, a property has at most one readable child.
+        """
+        return False
+
     def add_readable_children_to_list(
             self,
             value,
             field_name: str,
             readable_serializer: ReadableSerializer,
             result: List[typing.Dict[str, Any]]):
+        for child_value in self.readable_child_values(value):
+            result.append(readable_serializer.serialize(child_value, field_name))
+
+    def readable_value_expression(self, field_expression: str) -> str:
+        """
+        Return the source code of an expression that evaluates to the value passed to readable_child_values, given the
+        source code of an expression that evaluates to the stored field.
+        """
+        return field_expression
+
+    def readable_child_values_code(self, value_name: str, child_lines: Callable[[str], List[str]]) -> List[str]:
+        """
+        Return the source code lines that run the lines child_lines(expression) for each value in
+        readable_child_values(value_name), where expression is the source code of the value.
+        """
+        return child_lines(value_name)
+
+    @abstractmethod
+    def readable_deserialize_into_raw_data_code(self, field_name: str, value_name: str) -> List[str]:
+        """
+        Return the source code lines, in a generator, of readable_deserialize_into_raw_data(field_name, value_name,
+        raw_data, ...). The lines yield the JSON that readable_deserialize_into_raw_data passes to
+        deserializer.deserialize and receive its deserialized value, and they may refer to local variables raw_data
+        and wrap_if_needed.
+        """
         pass
 
+    def readable_deserialize_prop_into_raw_data_code(self, field_name: str, value_name: str) -> List[str]:
+        """
+        Return the source code lines, in a generator, that deserialize value_name, the value of the property in the
+        "props" of JSON in the READABLE_LAYOUT_PROPS layout, into raw_data. It is a JSON array of children if
+        has_readable_child_list returns True, and a single child otherwise.
+        """
+        return self.readable_deserialize_into_raw_data_code(field_name, value_name)
+
     @abstractmethod
     def should_binary_serialize_value(self, value) -> bool:
         pass
@@ -74,13 +137,80 @@ class PropertyTypeSpec(ABC):
     def binary_serialize_value(self, value, packer: MessagePacker, serializer: BinarySerializer):
         pass
 
+    def binary_value_expression(self, field_expression: str) -> str:
+        """
+        Return the source code of an expression that evaluates to the value passed to binary_serialize_value, given
+        the source code of an expression that evaluates to the stored field.
+        """
+        return field_expression
+
+    @abstractmethod
+    def binary_presence_condition(self, value_name: str) -> typing.Optional[str]:
+        """
+        Return the source code of should_binary_serialize_value(value_name), or None if it is always True.
+        """
+        pass
+
+    @abstractmethod
+    def binary_serialize_value_code(self, value_name: str) -> List[str]:
+        """
+        Return the source code lines, in a generator, of binary_serialize_value(value_name, packer, serializer). The
+        lines yield the values that binary_serialize_value passes to serializer.serialize, and they may refer to
+        local variables packer, binary_serializer, HanaMapEntry, pack_packed_array and numpy.
+        """
+        pass
+
+    @abstractmethod
+    def binary_deserialize_into_raw_data_code(self, field_name: str, value_name: str) -> List[str]:
+        """
+        Return the source code lines, in a generator, of binary_deserialize_into_raw_data(field_name, value_name,
+        raw_data, ...). The lines yield the serialized values that binary_deserialize_into_raw_data passes to
+        deserializer.deserialize and receive their deserialized values, and they may refer to local variables
+        raw_data, wrap_if_needed and numpy.
+        """
+        pass
+
+    @abstractmethod
+    def binary_stream_deserialize_into_raw_data_code(self, field_name: str, value_name: str) -> List[str]:
+        """
+        Return the source code lines, in a generator, that read the next value from the local variable unpacker and
+        store it in raw_data as binary_deserialize_into_raw_data_code does. The lines yield unpacker to receive the
+        next deserialized value, and they may use names that start with value_name as local variables.
+        """
+        pass
+
+    def binary_stream_decode_code(self, value_name: str) -> List[str]:
+        """
+        Return the source code lines, in a generator, that do what iter_binary_stream_decode_value(unpacker,
+        deserializer) does and assign the decoded value to value_name.
+        """
+        return [f"{value_name} = yield unpacker"]
+
+    @abstractmethod
+    def iter_binary_deserialize_into_builder(
+            self, field_name: str, value, builder, deserializer: BinaryDeserializer) -> Generator:
+        """
+        Deserialize the value and pass it to the builder. This is a generator that yields the serialized values to
+        deserialize and receives their deserialized values, as BinaryDeserializer.run expects.
+        """
+        pass
+
     @abstractmethod
-    def binary_deserialize_into_builder(self, field_name: str, value, builder, deserializer: BinaryDeserializer):
+    def iter_binary_stream_deserialize_into_builder(
+            self, field_name: str, unpacker: MessageUnpacker, builder, deserializer: BinaryDeserializer) -> Generator:
+        """
+        Deserialize the next value in the unpacker and pass it to the builder. This is a generator that yields the
+        unpacker to receive the next deserialized value.
+        """
         pass
 
     @abstractmethod
-    def readable_deserialize_into_builder(
-            self, field_name: str, value: typing.Dict[str, Any], builder, deserializer: ReadableDeserializer):
+    def iter_readable_deserialize_into_builder(
+            self, field_name: str, value: typing.Dict[str, Any], builder) -> Generator:
+        """
+        Deserialize the JSON and pass it to the builder. This is a generator that yields the JSON to receive its
+        deserialized value.
+        """
         pass
 
     @abstractmethod
@@ -138,30 +268,133 @@ class TerminalTypeSpec(PropertyTypeSpec):
 
             setattr(builder_class, get_method_name, get_method)
 
-    def add_readable_children_to_list(
-            self,
-            value,
-            field_name: str,
-            readable_serializer: ReadableSerializer,
-            result: List[typing.Dict[str, Any]]):
-        result.append(readable_serializer.serialize(value, field_name))
+    def readable_child_values(self, value) -> Iterable[Any]:
+        return [value]
 
     def should_binary_serialize_value(self, value) -> bool:
         return True
 
+    def is_untagged_primitive(self) -> bool:
+        return self.annotation in UNTAGGED_PRIMITIVES
+
+    def annotation_expression(self) -> str:
+        """
+        Return the source code of the annotation, which must be in UNTAGGED_PRIMITIVES.
+        """
+        if self.annotation.__module__ == "numpy":
+            return f"numpy.{self.annotation.__name__}"
+        return self.annotation.__name__
+
+    def pack_untagged(self, value, packer: MessagePacker):
+        pack_method_name, convert = UNTAGGED_PRIMITIVES[self.annotation]
+        getattr(packer, pack_method_name)(convert(value))
+
+    def pack_untagged_code(self, value_name: str) -> str:
+        """
+        Return the source code of pack_untagged(value_name, packer).
+        """
+        pack_method_name, convert = UNTAGGED_PRIMITIVES[self.annotation]
+        if convert is self.annotation:
+            return f"packer.{pack_method_name}({value_name})"
+        return f"packer.{pack_method_name}({convert.__name__}({value_name}))"
+
+    def unpack_untagged_expression(self, value_name: str) -> str:
+        return f"{self.annotation_expression()}({value_name})"
+
     def binary_serialize_value(self, value, packer: MessagePacker, serializer: BinarySerializer):
-        serializer.serialize(value)
+        if self.is_untagged_primitive() \
+                and value.__class__ is self.annotation \
+                and serializer.format_version >= BINARY_FORMAT_VERSION_UNTAGGED_PRIMITIVES:
+            self.pack_untagged(value, packer)
+        else:
+            serializer.serialize(value)
 
-    def binary_deserialize_into_builder(self, field_name: str, value, builder, deserializer: BinaryDeserializer):
-        assert isinstance(value, dict)
-        deserialized = deserializer.deserialize(value)
+    def binary_presence_condition(self, value_name: str) -> typing.Optional[str]:
+        return None
+
+    def binary_serialize_value_code(self, value_name: str) -> List[str]:
+        if not self.is_untagged_primitive():
+            return [f"yield {value_name}"]
+        # Values of other classes, such as subclasses, keep their type tags.
+        return [
+            f"if {value_name}.__class__ is {self.annotation_expression()} "
+            f"and binary_serializer.format_version >= {BINARY_FORMAT_VERSION_UNTAGGED_PRIMITIVES}:",
+            f"    {self.pack_untagged_code(value_name)}",
+            "else:",
+            f"    yield {value_name}",
+        ]
+
+    def storage_expression(self, value_expression: str) -> str:
+        """
+        Return the source code of prepare_deserialized_value_for_storage(value_expression).
+        """
+        return value_expression
+
+    def binary_decode_expression(self, value_name: str) -> str:
+        """
+        Return the source code, in a generator, of binary_decode_value(value_name, deserializer). The expression
+        yields value_name if it has to be deserialized.
+        """
+        if not self.is_untagged_primitive():
+            return f"(yield {value_name})"
+        return f"((yield {value_name}) if isinstance({value_name}, dict) " \
+               f"else {self.unpack_untagged_expression(value_name)})"
+
+    def binary_decode_value(self, value, deserializer: BinaryDeserializer):
+        """
+        Deserialize a value that binary_serialize_value wrote, which is untagged if it is a primitive.
+        """
+        if isinstance(value, dict):
+            return deserializer.deserialize(value)
+        assert self.is_untagged_primitive()
+        return self.annotation(value)
+
+    def iter_binary_decode_value(self, value, deserializer: BinaryDeserializer) -> Generator:
+        if isinstance(value, dict):
+            return (yield value)
+        assert self.is_untagged_primitive()
+        return self.annotation(value)
+
+    def iter_binary_stream_decode_value(self, unpacker: MessageUnpacker, deserializer: BinaryDeserializer) \
+            -> Generator:
+        if self.is_untagged_primitive():
+            return (yield from self.iter_binary_decode_value(unpacker.unpack(), deserializer))
+        return (yield unpacker)
+
+    def binary_deserialize_into_raw_data_code(self, field_name: str, value_name: str) -> List[str]:
+        return [f"raw_data.{field_name} = {self.storage_expression(self.binary_decode_expression(value_name))}"]
+
+    def binary_stream_decode_code(self, value_name: str) -> List[str]:
+        if not self.is_untagged_primitive():
+            return [f"{value_name} = yield unpacker"]
+        return [
+            f"{value_name} = unpacker.unpack()",
+            f"{value_name} = {self.binary_decode_expression(value_name)}",
+        ]
+
+    def binary_stream_deserialize_into_raw_data_code(self, field_name: str, value_name: str) -> List[str]:
+        return self.binary_stream_decode_code(value_name) \
+            + [f"raw_data.{field_name} = {self.storage_expression(value_name)}"]
+
+    def readable_deserialize_into_raw_data_code(self, field_name: str, value_name: str) -> List[str]:
+        return [f"raw_data.{field_name} = {self.storage_expression(f'(yield {value_name})')}"]
+
+    def iter_binary_deserialize_into_builder(
+            self, field_name: str, value, builder, deserializer: BinaryDeserializer) -> Generator:
+        deserialized = yield from self.iter_binary_decode_value(value, deserializer)
+        builder_method_name = self.builder_set_method_name(field_name)
+        getattr(builder, builder_method_name)(deserialized)
+
+    def iter_binary_stream_deserialize_into_builder(
+            self, field_name: str, unpacker: MessageUnpacker, builder, deserializer: BinaryDeserializer) -> Generator:
+        deserialized = yield from self.iter_binary_stream_decode_value(unpacker, deserializer)
         builder_method_name = self.builder_set_method_name(field_name)
         getattr(builder, builder_method_name)(deserialized)
 
-    def readable_deserialize_into_builder(
-            self, field_name: str, value: typing.Dict[str, Any], builder, deserializer: ReadableDeserializer):
+    def iter_readable_deserialize_into_builder(
+            self, field_name: str, value: typing.Dict[str, Any], builder) -> Generator:
         assert isinstance(value, dict)
-        deserialized = deserializer.deserialize(value)
+        deserialized = yield value
         builder_method_name = self.builder_set_method_name(field_name)
         getattr(builder, builder_method_name)(deserialized)
 
@@ -173,8 +406,7 @@ class TerminalTypeSpec(PropertyTypeSpec):
 
     def binary_deserialize_into_raw_data(
             self, field_name: str, value, raw_data, deserializer: BinaryDeserializer):
-        assert isinstance(value, dict)
-        deserialized = deserializer.deserialize(value)
+        deserialized = self.binary_decode_value(value, deserializer)
         setattr(raw_data, field_name, deserialized)
 
 
@@ -221,14 +453,9 @@ class WrappedTypeSpec(PropertyTypeSpec):
 
             setattr(builder_class, get_method_name, get_method)
 
-    def add_readable_children_to_list(
-            self,
-            value,
-            field_name: str,
-            readable_serializer: ReadableSerializer,
-            result: List[typing.Dict[str, Any]]):
+    def readable_child_values(self, value) -> Iterable[Any]:
         assert isinstance(value, Wrapped)
-        result.append(readable_serializer.serialize(value, field_name))
+        return [value]
 
     def should_binary_serialize_value(self, value) -> bool:
         return True
@@ -237,16 +464,57 @@ class WrappedTypeSpec(PropertyTypeSpec):
         assert isinstance(value, Wrapped)
         serializer.serialize(value)
 
-    def binary_deserialize_into_builder(self, field_name: str, value, builder, deserializer: BinaryDeserializer):
+    def binary_presence_condition(self, value_name: str) -> typing.Optional[str]:
+        return None
+
+    def binary_serialize_value_code(self, value_name: str) -> List[str]:
+        return [f"yield {value_name}"]
+
+    def storage_expression(self, value_expression: str) -> str:
+        return f"wrap_if_needed({value_expression})"
+
+    def binary_decode_expression(self, value_name: str) -> str:
+        return f"(yield {value_name})"
+
+    def binary_decode_value(self, value, deserializer: BinaryDeserializer):
         assert isinstance(value, dict)
-        deserialized = deserializer.deserialize(value)
+        return deserializer.deserialize(value)
+
+    def iter_binary_decode_value(self, value, deserializer: BinaryDeserializer) -> Generator:
+        assert isinstance(value, dict)
+        return (yield value)
+
+    def iter_binary_stream_decode_value(self, unpacker: MessageUnpacker, deserializer: BinaryDeserializer) \
+            -> Generator:
+        return (yield unpacker)
+
+    def binary_deserialize_into_raw_data_code(self, field_name: str, value_name: str) -> List[str]:
+        return [f"raw_data.{field_name} = {self.storage_expression(self.binary_decode_expression(value_name))}"]
+
+    def binary_stream_deserialize_into_raw_data_code(self, field_name: str, value_name: str) -> List[str]:
+        return self.binary_stream_decode_code(value_name) \
+            + [f"raw_data.{field_name} = {self.storage_expression(value_name)}"]
+
+    def readable_deserialize_into_raw_data_code(self, field_name: str, value_name: str) -> List[str]:
+        return [f"raw_data.{field_name} = {self.storage_expression(f'(yield {value_name})')}"]
+
+    def iter_binary_deserialize_into_builder(
+            self, field_name: str, value, builder, deserializer: BinaryDeserializer) -> Generator:
+        assert isinstance(value, dict)
+        deserialized = yield value
         builder_method_name = self.builder_set_method_name(field_name)
         getattr(builder, builder_method_name)(deserialized)
 
-    def readable_deserialize_into_builder(
-            self, field_name: str, value: typing.Dict[str, Any], builder, deserializer: ReadableDeserializer):
+    def iter_binary_stream_deserialize_into_builder(
+            self, field_name: str, unpacker: MessageUnpacker, builder, deserializer: BinaryDeserializer) -> Generator:
+        deserialized = yield unpacker
+        builder_method_name = self.builder_set_method_name(field_name)
+        getattr(builder, builder_method_name)(deserialized)
+
+    def iter_readable_deserialize_into_builder(
+            self, field_name: str, value: typing.Dict[str, Any], builder) -> Generator:
         assert isinstance(value, dict)
-        deserialized = deserializer.deserialize(value)
+        deserialized = yield value
         builder_method_name = self.builder_set_method_name(field_name)
         getattr(builder, builder_method_name)(deserialized)
 
@@ -306,14 +574,10 @@ class OptionalTypeSpec(PropertyTypeSpec):
 
             setattr(builder_class, get_method_name, get_method)
 
-    def add_readable_children_to_list(
-            self,
-            value,
-            field_name: str,
-            readable_serializer: ReadableSerializer,
-            result: List[typing.Dict[str, Any]]):
-        if value is not None:
-            result.append(readable_serializer.serialize(value, field_name))
+    def readable_child_values(self, value) -> Iterable[Any]:
+        if value is None:
+            return []
+        return [value]
 
     def should_binary_serialize_value(self, value) -> bool:
         return value is not None
@@ -321,18 +585,43 @@ class OptionalTypeSpec(PropertyTypeSpec):
     def binary_serialize_value(self, value, packer: MessagePacker, serializer: BinarySerializer):
         if value is None:
             return
-        serializer.serialize(value)
+        self.inner.binary_serialize_value(value, packer, serializer)
 
-    def binary_deserialize_into_builder(self, field_name: str, value, builder, deserializer: BinaryDeserializer):
-        assert isinstance(value, dict)
-        deserialized = deserializer.deserialize(value)
+    def binary_presence_condition(self, value_name: str) -> typing.Optional[str]:
+        return f"{value_name} is not None"
+
+    def binary_serialize_value_code(self, value_name: str) -> List[str]:
+        return self.inner.binary_serialize_value_code(value_name)
+
+    def binary_deserialize_into_raw_data_code(self, field_name: str, value_name: str) -> List[str]:
+        return self.inner.binary_deserialize_into_raw_data_code(field_name, value_name)
+
+    def binary_stream_deserialize_into_raw_data_code(self, field_name: str, value_name: str) -> List[str]:
+        return self.inner.binary_stream_deserialize_into_raw_data_code(field_name, value_name)
+
+    def readable_child_values_code(self, value_name: str, child_lines: Callable[[str], List[str]]) -> List[str]:
+        return [f"if {value_name} is not None:"] \
+            + ["    " + line for line in self.inner.readable_child_values_code(value_name, child_lines)]
+
+    def readable_deserialize_into_raw_data_code(self, field_name: str, value_name: str) -> List[str]:
+        return self.inner.readable_deserialize_into_raw_data_code(field_name, value_name)
+
+    def iter_binary_deserialize_into_builder(
+            self, field_name: str, value, builder, deserializer: BinaryDeserializer) -> Generator:
+        deserialized = yield from self.inner.iter_binary_decode_value(value, deserializer)
         builder_method_name = self.builder_set_method_name(field_name)
         getattr(builder, builder_method_name)(deserialized)
 
-    def readable_deserialize_into_builder(
-            self, field_name: str, value: typing.Dict[str, Any], builder, deserializer: ReadableDeserializer):
+    def iter_binary_stream_deserialize_into_builder(
+            self, field_name: str, unpacker: MessageUnpacker, builder, deserializer: BinaryDeserializer) -> Generator:
+        deserialized = yield from self.inner.iter_binary_stream_decode_value(unpacker, deserializer)
+        builder_method_name = self.builder_set_method_name(field_name)
+        getattr(builder, builder_method_name)(deserialized)
+
+    def iter_readable_deserialize_into_builder(
+            self, field_name: str, value: typing.Dict[str, Any], builder) -> Generator:
         assert isinstance(value, dict)
-        deserialized = deserializer.deserialize(value)
+        deserialized = yield value
         builder_method_name = self.builder_set_method_name(field_name)
         getattr(builder, builder_method_name)(deserialized)
 
@@ -344,8 +633,7 @@ class OptionalTypeSpec(PropertyTypeSpec):
 
     def binary_deserialize_into_raw_data(
             self, field_name: str, value, raw_data, deserializer: BinaryDeserializer):
-        assert isinstance(value, dict)
-        deserialized = deserializer.deserialize(value)
+        deserialized = self.inner.binary_decode_value(value, deserializer)
         setattr(raw_data, field_name, self.inner.prepare_deserialized_value_for_storage(deserialized))
 
 
@@ -410,39 +698,146 @@ class ListTypeSpec(PropertyTypeSpec):
 
             setattr(builder_class, clear_method_name, clear_method)
 
-    def add_readable_children_to_list(
-            self,
-            value,
-            field_name: str,
-            readable_serializer: ReadableSerializer,
-            result: List[typing.Dict[str, Any]]):
+    def readable_child_values(self, value) -> Iterable[Any]:
         assert isinstance(value, list)
-        for item in value:
-            self.inner.add_readable_children_to_list(item, field_name, readable_serializer, result)
+        return value
+
+    def has_readable_child_list(self) -> bool:
+        return True
+
+    def readable_child_values_code(self, value_name: str, child_lines: Callable[[str], List[str]]) -> List[str]:
+        return [f"for {value_name}_item in {value_name}:"] \
+            + ["    " + line for line in child_lines(f"{value_name}_item")]
+
+    def readable_deserialize_into_raw_data_code(self, field_name: str, value_name: str) -> List[str]:
+        return [f"raw_data.{field_name}.append({self.inner.storage_expression(f'(yield {value_name})')})"]
+
+    def readable_deserialize_prop_into_raw_data_code(self, field_name: str, value_name: str) -> List[str]:
+        item_expression = self.inner.storage_expression(f"(yield {value_name}_item)")
+        return [
+            f"{value_name}_list = raw_data.{field_name}",
+            f"for {value_name}_item in {value_name}:",
+            f"    {value_name}_list.append({item_expression})",
+        ]
 
     def should_binary_serialize_value(self, value) -> bool:
         return True
 
+    def packed_array_dtype_code(self) -> typing.Optional[int]:
+        """
+        Return the dtype code with which the list is written as a packed array in format version
+        BINARY_FORMAT_VERSION_PACKED_ARRAYS and later, or None if its items are not fixed-width numbers.
+        """
+        if isinstance(self.inner, TerminalTypeSpec):
+            return PACKED_ARRAY_DTYPE_CODES.get(self.inner.annotation)
+        return None
+
+    def has_packed_array_items(self, value: List[Any]) -> bool:
+        """
+        Return whether all the items of the list are of the item type, so that they come back unchanged when written
+        as a packed array. As with untagged values, lists with other items, such as a numpy.float64 in a
+        List[numpy.float32], are written item by item.
+        """
+        item_class = self.inner.annotation
+        return all(item.__class__ is item_class for item in value)
+
+    def packed_array_condition(self, value_name: str) -> str:
+        """
+        Return the source code of has_packed_array_items(value_name).
+        """
+        return f"all({value_name}_item.__class__ is {self.inner.annotation_expression()} " \
+               f"for {value_name}_item in {value_name})"
+
     def binary_serialize_value(self, value, packer: MessagePacker, serializer: BinarySerializer):
         assert isinstance(value, list)
+        dtype_code = self.packed_array_dtype_code()
+        if dtype_code is not None \
+                and serializer.format_version >= BINARY_FORMAT_VERSION_PACKED_ARRAYS \
+                and self.has_packed_array_items(value):
+            pack_packed_array(packer, value, dtype_code)
+            return
         n = len(value)
         packer.pack_array_header(n)
         for item in value:
             self.inner.binary_serialize_value(item, packer, serializer)
 
-    def binary_deserialize_into_builder(self, field_name: str, value, builder, deserializer: BinaryDeserializer):
-        assert isinstance(value, list)
+    def binary_presence_condition(self, value_name: str) -> typing.Optional[str]:
+        return None
+
+    def binary_serialize_value_code(self, value_name: str) -> List[str]:
+        item_name = f"{value_name}_item"
+        lines = [
+            f"packer.pack_array_header(len({value_name}))",
+            f"for {item_name} in {value_name}:",
+        ]
+        lines.extend("    " + line for line in self.inner.binary_serialize_value_code(item_name))
+        dtype_code = self.packed_array_dtype_code()
+        if dtype_code is None:
+            return lines
+        return [
+            f"if binary_serializer.format_version >= {BINARY_FORMAT_VERSION_PACKED_ARRAYS} "
+            f"and {self.packed_array_condition(value_name)}:",
+            f"    pack_packed_array(packer, {value_name}, {dtype_code})",
+            "else:",
+        ] + ["    " + line for line in lines]
+
+    def binary_deserialize_into_raw_data_code(self, field_name: str, value_name: str) -> List[str]:
+        item_expression = self.inner.storage_expression(self.inner.binary_decode_expression(f"{value_name}_item"))
+        # A generator cannot yield inside a list comprehension.
+        lines = [
+            f"{value_name}_list = raw_data.{field_name}",
+            f"for {value_name}_item in {value_name}:",
+            f"    {value_name}_list.append({item_expression})",
+        ]
+        if self.packed_array_dtype_code() is None:
+            return lines
+        # A packed array is a dict, and deserializing it returns a numpy array.
+        return [f"if {value_name}.__class__ is list:"] \
+            + ["    " + line for line in lines] \
+            + ["else:", f"    raw_data.{field_name}.extend((yield {value_name}))"]
+
+    def binary_stream_deserialize_into_raw_data_code(self, field_name: str, value_name: str) -> List[str]:
+        if self.packed_array_dtype_code() is not None:
+            # As in iter_binary_stream_deserialize_into_builder, the value may be an array or a packed array.
+            return [f"{value_name} = unpacker.unpack()"] \
+                + self.binary_deserialize_into_raw_data_code(field_name, value_name)
+        item_name = f"{value_name}_item"
+        return [
+            f"{value_name}_list = raw_data.{field_name}",
+            "for _ in range(unpacker.read_array_header()):",
+        ] + ["    " + line for line in self.inner.binary_stream_decode_code(item_name)] \
+            + [f"    {value_name}_list.append({self.inner.storage_expression(item_name)})"]
+
+    def iter_binary_deserialize_into_builder(
+            self, field_name: str, value, builder, deserializer: BinaryDeserializer) -> Generator:
         builder_method_name = self.builder_add_method_name(field_name)
         builder_method = getattr(builder, builder_method_name)
+        if isinstance(value, dict):
+            builder_method(*(yield value))
+            return
+        assert isinstance(value, list)
         for item_value in value:
-            assert isinstance(item_value, dict)
-            deserialized = deserializer.deserialize(item_value)
+            deserialized = yield from self.inner.iter_binary_decode_value(item_value, deserializer)
+            builder_method(deserialized)
+
+    def iter_binary_stream_deserialize_into_builder(
+            self, field_name: str, unpacker: MessageUnpacker, builder, deserializer: BinaryDeserializer) -> Generator:
+        if self.packed_array_dtype_code() is not None:
+            # The value may be an array or a packed array, and the unpacker cannot tell which is next. Lists of
+            # numbers hold no objects, so reading them whole is fine.
+            yield from self.iter_binary_deserialize_into_builder(field_name, unpacker.unpack(), builder, deserializer)
+            return
+        builder_method_name = self.builder_add_method_name(field_name)
+        builder_method = getattr(builder, builder_method_name)
+        n = unpacker.read_array_header()
+        for _ in range(n):
+            deserialized = yield from self.inner.iter_binary_stream_decode_value(unpacker, deserializer)
             builder_method(deserialized)
 
-    def readable_deserialize_into_builder(
-            self, field_name: str, value: typing.Dict[str, Any], builder, deserializer: ReadableDeserializer):
+    def iter_readable_deserialize_into_builder(
+            self, field_name: str, value: typing.Dict[str, Any], builder) -> Generator:
         assert isinstance(value, dict)
-        deserialized = deserializer.deserialize(value)
+        deserialized = yield value
         builder_method_name = self.builder_add_method_name(field_name)
         getattr(builder, builder_method_name)(deserialized)
 
@@ -456,12 +851,14 @@ class ListTypeSpec(PropertyTypeSpec):
 
     def binary_deserialize_into_raw_data(
             self, field_name: str, value, raw_data, deserializer: BinaryDeserializer):
-        assert isinstance(value, list)
         the_list = getattr(raw_data, field_name)
         assert isinstance(the_list, list)
+        if isinstance(value, dict):
+            the_list.extend(deserializer.deserialize(value))
+            return
+        assert isinstance(value, list)
         for item_value in value:
-            assert isinstance(item_value, dict)
-            deserialized_item = deserializer.deserialize(item_value)
+            deserialized_item = self.inner.binary_decode_value(item_value, deserializer)
             the_list.append(self.inner.prepare_deserialized_value_for_storage(deserialized_item))
 
 
@@ -543,40 +940,199 @@ class DictTypeSpec(PropertyTypeSpec):
 
             setattr(builder_class, delete_method_name, delete_method)
 
-    def add_readable_children_to_list(
-            self,
-            value,
-            field_name: str,
-            readable_serializer: ReadableSerializer,
-            result: List[typing.Dict[str, Any]]):
+    def readable_child_values(self, value) -> Iterable[Any]:
         assert isinstance(value, dict)
-        for key_, value_ in value.items():
-            result.append(readable_serializer.serialize(HanaMapEntry(key_, value_), field_name))
+        return [HanaMapEntry(key_, value_) for key_, value_ in value.items()]
+
+    def has_readable_child_list(self) -> bool:
+        return True
+
+    def readable_child_values_code(self, value_name: str, child_lines: Callable[[str], List[str]]) -> List[str]:
+        return [f"for {value_name}_key, {value_name}_item in {value_name}.items():"] \
+            + ["    " + line for line in child_lines(f"HanaMapEntry({value_name}_key, {value_name}_item)")]
+
+    def readable_deserialize_into_raw_data_code(self, field_name: str, value_name: str) -> List[str]:
+        value_expression = self.value_spec.storage_expression(f"{value_name}_entry.value")
+        return [
+            f"{value_name}_entry = yield {value_name}",
+            f"raw_data.{field_name}[{value_name}_entry.key] = {value_expression}",
+        ]
+
+    def readable_deserialize_prop_into_raw_data_code(self, field_name: str, value_name: str) -> List[str]:
+        value_expression = self.value_spec.storage_expression(f"{value_name}_entry.value")
+        return [
+            f"{value_name}_dict = raw_data.{field_name}",
+            f"for {value_name}_item in {value_name}:",
+            f"    {value_name}_entry = yield {value_name}_item",
+            f"    {value_name}_dict[{value_name}_entry.key] = {value_expression}",
+        ]
 
     def should_binary_serialize_value(self, value) -> bool:
         return True
 
+    def is_native_map(self) -> bool:
+        """
+        Return whether the dict is written as a msgpack map with bare keys in format version
+        BINARY_FORMAT_VERSION_NATIVE_MAPS and later, if all its keys are of the key type. Earlier versions, and dicts
+        with keys of other classes, write an array of HanaMapEntry objects.
+        """
+        return self.key_spec.is_untagged_primitive()
+
+    def has_native_map_keys(self, value: typing.Dict[Any, Any]) -> bool:
+        """
+        Return whether all the keys of the dict are of the key type, so that they come back unchanged when written
+        bare. As with untagged values, other keys, such as float keys of a Dict[numpy.float32, ...], keep their tags.
+        """
+        key_class = self.key_spec.annotation
+        return all(key_.__class__ is key_class for key_ in value)
+
+    def native_map_condition(self, value_name: str) -> str:
+        """
+        Return the source code of has_native_map_keys(value_name).
+        """
+        return f"all({value_name}_key.__class__ is {self.key_spec.annotation_expression()} " \
+               f"for {value_name}_key in {value_name})"
+
     def binary_serialize_value(self, value, packer: MessagePacker, serializer: BinarySerializer):
         assert isinstance(value, dict)
         n = len(value)
+        if self.is_native_map() \
+                and serializer.format_version >= BINARY_FORMAT_VERSION_NATIVE_MAPS \
+                and self.has_native_map_keys(value):
+            packer.pack_map_header(n)
+            for key_, item_ in value.items():
+                self.key_spec.pack_untagged(key_, packer)
+                self.value_spec.binary_serialize_value(item_, packer, serializer)
+            return
         packer.pack_array_header(n)
         for key_, item_ in value.items():
             serializer.serialize(HanaMapEntry(key_, item_))
 
-    def binary_deserialize_into_builder(self, field_name: str, value, builder, deserializer: BinaryDeserializer):
-        assert isinstance(value, list)
+    def binary_presence_condition(self, value_name: str) -> typing.Optional[str]:
+        return None
+
+    def binary_serialize_value_code(self, value_name: str) -> List[str]:
+        key_name = f"{value_name}_key"
+        item_name = f"{value_name}_item"
+        lines = [
+            f"packer.pack_array_header(len({value_name}))",
+            f"for {key_name}, {item_name} in {value_name}.items():",
+            f"    yield HanaMapEntry({key_name}, {item_name})",
+        ]
+        if not self.is_native_map():
+            return lines
+        native_lines = [
+            f"packer.pack_map_header(len({value_name}))",
+            f"for {key_name}, {item_name} in {value_name}.items():",
+            f"    {self.key_spec.pack_untagged_code(key_name)}",
+        ]
+        native_lines.extend("    " + line for line in self.value_spec.binary_serialize_value_code(item_name))
+        return [f"if binary_serializer.format_version >= {BINARY_FORMAT_VERSION_NATIVE_MAPS} "
+                f"and {self.native_map_condition(value_name)}:"] \
+            + ["    " + line for line in native_lines] \
+            + ["else:"] \
+            + ["    " + line for line in lines]
+
+    def binary_deserialize_into_raw_data_code(self, field_name: str, value_name: str) -> List[str]:
+        value_expression = self.value_spec.storage_expression(f"{value_name}_entry.value")
+        lines = [
+            f"{value_name}_dict = raw_data.{field_name}",
+            f"for {value_name}_item in {value_name}:",
+            f"    {value_name}_entry = yield {value_name}_item",
+            f"    {value_name}_dict[{value_name}_entry.key] = {value_expression}",
+        ]
+        if not self.is_native_map():
+            return lines
+        key_expression = self.key_spec.unpack_untagged_expression(f"{value_name}_key")
+        item_expression = self.value_spec.storage_expression(
+            self.value_spec.binary_decode_expression(f"{value_name}_item"))
+        return [
+            f"if {value_name}.__class__ is dict:",
+            f"    {value_name}_dict = raw_data.{field_name}",
+            f"    for {value_name}_key, {value_name}_item in {value_name}.items():",
+            f"        {value_name}_dict[{key_expression}] = {item_expression}",
+            "else:",
+        ] + ["    " + line for line in lines]
+
+    def binary_stream_deserialize_into_raw_data_code(self, field_name: str, value_name: str) -> List[str]:
+        value_expression = self.value_spec.storage_expression(f"{value_name}_entry.value")
+        lines = [
+            f"{value_name}_dict = raw_data.{field_name}",
+            "for _ in range(unpacker.read_array_header()):",
+            f"    {value_name}_entry = yield unpacker",
+            f"    {value_name}_dict[{value_name}_entry.key] = {value_expression}",
+        ]
+        if not self.is_native_map():
+            return lines
+        # As in iter_binary_stream_deserialize_into_builder, the value may be a map or an array.
+        key_expression = self.key_spec.unpack_untagged_expression("unpacker.unpack()")
+        item_name = f"{value_name}_item"
+        return [
+            f"{value_name}_is_map = unpacker.next_is_map()",
+            f"if {value_name}_is_map is None:",
+            f"    {value_name} = unpacker.unpack()",
+        ] + ["    " + line for line in self.binary_deserialize_into_raw_data_code(field_name, value_name)] + [
+            f"elif {value_name}_is_map:",
+            f"    {value_name}_dict = raw_data.{field_name}",
+            "    for _ in range(unpacker.read_map_header()):",
+            f"        {value_name}_key = {key_expression}",
+        ] + ["        " + line for line in self.value_spec.binary_stream_decode_code(item_name)] + [
+            f"        {value_name}_dict[{value_name}_key] = {self.value_spec.storage_expression(item_name)}",
+            "else:",
+        ] + ["    " + line for line in lines]
+
+    def binary_decode_native_map(self, value: typing.Dict[Any, Any], deserializer: BinaryDeserializer):
+        """
+        Return the keys and decoded values of a dict written as a native msgpack map.
+        """
+        return [
+            (self.key_spec.annotation(key_), self.value_spec.binary_decode_value(item_, deserializer))
+            for key_, item_ in value.items()
+        ]
+
+    def iter_binary_deserialize_into_builder(
+            self, field_name: str, value, builder, deserializer: BinaryDeserializer) -> Generator:
         builder_method_name = self.builder_put_method_name(field_name)
         builder_method = getattr(builder, builder_method_name)
+        if isinstance(value, dict):
+            for key_, item_ in value.items():
+                deserialized = yield from self.value_spec.iter_binary_decode_value(item_, deserializer)
+                builder_method(self.key_spec.annotation(key_), deserialized)
+            return
+        assert isinstance(value, list)
         for item_value in value:
             assert isinstance(item_value, dict)
-            deserialized = deserializer.deserialize(item_value)
+            deserialized = yield item_value
+            assert isinstance(deserialized, HanaMapEntry)
+            builder_method(deserialized.key, deserialized.value)
+
+    def iter_binary_stream_deserialize_into_builder(
+            self, field_name: str, unpacker: MessageUnpacker, builder, deserializer: BinaryDeserializer) -> Generator:
+        builder_method_name = self.builder_put_method_name(field_name)
+        builder_method = getattr(builder, builder_method_name)
+        if self.is_native_map():
+            # The value may be a map or an array depending on the format version.
+            next_is_map = unpacker.next_is_map()
+            if next_is_map is None:
+                yield from self.iter_binary_deserialize_into_builder(
+                    field_name, unpacker.unpack(), builder, deserializer)
+                return
+            if next_is_map:
+                for _ in range(unpacker.read_map_header()):
+                    key_ = self.key_spec.annotation(unpacker.unpack())
+                    deserialized = yield from self.value_spec.iter_binary_stream_decode_value(unpacker, deserializer)
+                    builder_method(key_, deserialized)
+                return
+        n = unpacker.read_array_header()
+        for _ in range(n):
+            deserialized = yield unpacker
             assert isinstance(deserialized, HanaMapEntry)
             builder_method(deserialized.key, deserialized.value)
 
-    def readable_deserialize_into_builder(
-            self, field_name: str, value: typing.Dict[str, Any], builder, deserializer: ReadableDeserializer):
+    def iter_readable_deserialize_into_builder(
+            self, field_name: str, value: typing.Dict[str, Any], builder) -> Generator:
         assert isinstance(value, dict)
-        deserialized = deserializer.deserialize(value)
+        deserialized = yield value
         assert isinstance(deserialized, HanaMapEntry)
         builder_method_name = self.builder_put_method_name(field_name)
         getattr(builder, builder_method_name)(deserialized.key, deserialized.value)
@@ -592,9 +1148,13 @@ class DictTypeSpec(PropertyTypeSpec):
 
     def binary_deserialize_into_raw_data(
             self, field_name: str, value, raw_data, deserializer: BinaryDeserializer):
-        assert isinstance(value, list)
         the_dict = getattr(raw_data, field_name)
         assert isinstance(the_dict, dict)
+        if isinstance(value, dict):
+            for key_, item_ in self.binary_decode_native_map(value, deserializer):
+                the_dict[key_] = self.value_spec.prepare_deserialized_value_for_storage(item_)
+            return
+        assert isinstance(value, list)
         for item_value in value:
             assert isinstance(item_value, dict)
             deserialized = deserializer.deserialize(item_value)
@@ -622,14 +1182,24 @@ class VariableTypeSpec(PropertyTypeSpec):
     def add_raw_data_builder_methods(self, builder_class, field_name: str):
         self.inner.add_raw_data_builder_methods(builder_class, field_name)
 
-    def add_readable_children_to_list(
-            self,
-            value,
-            field_name: str,
-            readable_serializer: ReadableSerializer,
-            result: List[typing.Dict[str, Any]]):
+    def readable_child_values(self, value) -> Iterable[Any]:
         assert isinstance(value, Variable)
-        self.inner.add_readable_children_to_list(value.value(), field_name, readable_serializer, result)
+        return self.inner.readable_child_values(value.value())
+
+    def has_readable_child_list(self) -> bool:
+        return self.inner.has_readable_child_list()
+
+    def readable_value_expression(self, field_expression: str) -> str:
+        return self.inner.readable_value_expression(f"{field_expression}.value()")
+
+    def readable_child_values_code(self, value_name: str, child_lines: Callable[[str], List[str]]) -> List[str]:
+        return self.inner.readable_child_values_code(value_name, child_lines)
+
+    def readable_deserialize_into_raw_data_code(self, field_name: str, value_name: str) -> List[str]:
+        return self.inner.readable_deserialize_into_raw_data_code(field_name, value_name)
+
+    def readable_deserialize_prop_into_raw_data_code(self, field_name: str, value_name: str) -> List[str]:
+        return self.inner.readable_deserialize_prop_into_raw_data_code(field_name, value_name)
 
     def should_binary_serialize_value(self, value) -> bool:
         assert isinstance(value, Variable)
@@ -638,12 +1208,32 @@ class VariableTypeSpec(PropertyTypeSpec):
     def binary_serialize_value(self, value, packer: MessagePacker, serializer: BinarySerializer):
         return self.inner.binary_serialize_value(value.value(), packer, serializer)
 
-    def binary_deserialize_into_builder(self, field_name: str, value, builder, deserializer: BinaryDeserializer):
-        self.inner.binary_deserialize_into_builder(field_name, value, builder, deserializer)
+    def binary_value_expression(self, field_expression: str) -> str:
+        return self.inner.binary_value_expression(f"{field_expression}.value()")
+
+    def binary_presence_condition(self, value_name: str) -> typing.Optional[str]:
+        return self.inner.binary_presence_condition(value_name)
+
+    def binary_serialize_value_code(self, value_name: str) -> List[str]:
+        return self.inner.binary_serialize_value_code(value_name)
+
+    def binary_deserialize_into_raw_data_code(self, field_name: str, value_name: str) -> List[str]:
+        return self.inner.binary_deserialize_into_raw_data_code(field_name, value_name)
+
+    def binary_stream_deserialize_into_raw_data_code(self, field_name: str, value_name: str) -> List[str]:
+        return self.inner.binary_stream_deserialize_into_raw_data_code(field_name, value_name)
+
+    def iter_binary_deserialize_into_builder(
+            self, field_name: str, value, builder, deserializer: BinaryDeserializer) -> Generator:
+        yield from self.inner.iter_binary_deserialize_into_builder(field_name, value, builder, deserializer)
+
+    def iter_binary_stream_deserialize_into_builder(
+            self, field_name: str, unpacker: MessageUnpacker, builder, deserializer: BinaryDeserializer) -> Generator:
+        yield from self.inner.iter_binary_stream_deserialize_into_builder(field_name, unpacker, builder, deserializer)
 
-    def readable_deserialize_into_builder(
-            self, field_name: str, value: typing.Dict[str, Any], builder, deserializer: ReadableDeserializer):
-        self.inner.readable_deserialize_into_builder(field_name, value, builder, deserializer)
+    def iter_readable_deserialize_into_builder(
+            self, field_name: str, value: typing.Dict[str, Any], builder) -> Generator:
+        yield from self.inner.iter_readable_deserialize_into_builder(field_name, value, builder)
 
     def readable_deserialize_into_raw_data(
             self, field_name: str, value: typing.Dict[str, Any], raw_data, deserializer: ReadableDeserializer):
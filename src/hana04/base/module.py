@@ -4,6 +4,8 @@ from hana04.base.extension.hana_customized_builders import HanaCustomizedBuilder
 from hana04.base.extension.hana_extensibles import HanaExtensible_Module
 from hana04.base.extension.hana_extension_uber_factory import HanaExtensionUberFactory
 from hana04.base.extension.hana_objects import HanaObject_Module
+from hana04.base.serialize.async_file_deserializer import AsyncFileDeserializer
+from hana04.base.serialize.async_file_serializer import AsyncFileSerializer
 from hana04.base.serialize.binary.binary_deserializer import BinaryDeserializer
 from hana04.base.serialize.binary.binary_serializer import BinarySerializer
 from hana04.base.serialize.file_deserializer import FileDeserializer
@@ -12,6 +14,7 @@ from hana04.base.serialize.hana_late_deserializables import HanaLateDeserializab
 from hana04.base.serialize.readable.readable_deserializer import ReadableDeserializer
 from hana04.base.serialize.readable.readable_serializer import ReadableSerializer
 import hana04.base.util.hana_map_entry
+import hana04.base.util.packed_array
 from jyuusu.binder import Binder, Module as JyuusuModule
 from jyuusu.injectors import create_injector
 
@@ -27,12 +30,15 @@ class HanaBaseModule(JyuusuModule):
         binder.install_module(HanaObject_Module)
         binder.install_module(HanaLateDeserializable_Module)
         binder.install_module(hana04.base.util.hana_map_entry.Module)
+        binder.install_module(hana04.base.util.packed_array.Module)
         binder.install_module(HanaCustomizedBuilderModule)
         binder.install_module(HanaCacheLoaderModule)
         binder.install_module(HanaUnwrapperModule)
 
         binder.install_module(FileSerializer.Module)
         binder.install_module(FileDeserializer.Module)
+        binder.install_module(AsyncFileSerializer.Module)
+        binder.install_module(AsyncFileDeserializer.Module)
 
 
 if __name__ == "__main__":
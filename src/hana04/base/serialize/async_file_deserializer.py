@@ -0,0 +1,85 @@
+import asyncio
+import functools
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from hana04.base.serialize.binary.binary_deserializer import BinaryDeserializer
+from hana04.base.serialize.file_deserializer import FileDeserializer
+from hana04.base.serialize.profiling import SerializationProfile
+from jyuusu.binder import Binder, Module as JyuusuModule
+from jyuusu.constructor_resolver import injectable_class
+
+DEFAULT_MAX_CONCURRENT_LOADS = 4
+
+
+class AsyncFileDeserializer:
+    """
+    Runs the methods of FileDeserializer on the threads of an executor so that loading does not block the event
+    loop. At most as many files as the executor has threads are loaded at the same time.
+    """
+
+    def __init__(self, file_deserializer: FileDeserializer, executor: Executor, owns_executor: bool = False):
+        self.file_deserializer = file_deserializer
+        self.executor = executor
+        self.owns_executor = owns_executor
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.aclose()
+
+    async def run(self, func, *args, **kwargs) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+
+    async def readable_deserialize(self, file_name: str, profile: Optional[SerializationProfile] = None) -> Any:
+        return await self.run(self.file_deserializer.readable_deserialize, file_name, profile)
+
+    async def binary_deserialize(self, file_name: str, profile: Optional[SerializationProfile] = None) -> Any:
+        return await self.run(self.file_deserializer.binary_deserialize, file_name, profile)
+
+    async def parallel_binary_deserialize(self,
+                                          file_name: str,
+                                          deserializer_factory_provider: Callable[[], BinaryDeserializer.Factory],
+                                          max_workers: Optional[int] = None) -> Any:
+        return await self.run(
+            self.file_deserializer.parallel_binary_deserialize, file_name, deserializer_factory_provider, max_workers)
+
+    def close(self):
+        """
+        Wait for the running loads to finish and shut down the executor if this object created it.
+        """
+        if self.owns_executor:
+            self.executor.shutdown(wait=True)
+
+    async def aclose(self):
+        """
+        Do what close does on the default executor of the event loop, so that the wait does not block the loop.
+        """
+        if self.owns_executor:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, functools.partial(self.executor.shutdown, wait=True))
+
+    @injectable_class
+    class Factory:
+        def __init__(self, file_deserializer: FileDeserializer):
+            self.file_deserializer = file_deserializer
+
+        def create(self,
+                   max_concurrent_loads: int = DEFAULT_MAX_CONCURRENT_LOADS,
+                   executor: Optional[Executor] = None) -> 'AsyncFileDeserializer':
+            """
+            Create an AsyncFileDeserializer that runs on the given executor, or on its own ThreadPoolExecutor with
+            max_concurrent_loads threads, which close() shuts down.
+            """
+            if executor is not None:
+                return AsyncFileDeserializer(self.file_deserializer, executor)
+            return AsyncFileDeserializer(
+                self.file_deserializer,
+                ThreadPoolExecutor(max_workers=max_concurrent_loads, thread_name_prefix="AsyncFileDeserializer"),
+                owns_executor=True)
+
+    class Module(JyuusuModule):
+        def configure(self, binder: Binder):
+            binder.install_class(AsyncFileDeserializer.Factory)
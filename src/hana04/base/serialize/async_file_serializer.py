@@ -0,0 +1,115 @@
+import asyncio
+import functools
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Optional
+
+from hana04.base.serialize.file_serializer import FileSerializer
+from hana04.base.serialize.profiling import SerializationProfile
+from hana04.base.serialize.readable.constants import READABLE_LAYOUT_CHILDREN, READABLE_IDS_UUID
+from jyuusu.binder import Binder, Module as JyuusuModule
+from jyuusu.constructor_resolver import injectable_class
+
+DEFAULT_MAX_CONCURRENT_SAVES = 4
+
+
+class AsyncFileSerializer:
+    """
+    Runs the methods of FileSerializer on the threads of an executor so that saving does not block the event loop.
+    Encoding, compression and the writes to disk all happen on the executor's threads, which write the bytes in
+    chunks as they are produced. At most as many files as the executor has threads are saved at the same time, and
+    later saves wait for a free thread.
+
+    The objects must not be modified until their saves finish.
+    """
+
+    def __init__(self, file_serializer: FileSerializer, executor: Executor, owns_executor: bool = False):
+        self.file_serializer = file_serializer
+        self.executor = executor
+        self.owns_executor = owns_executor
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.aclose()
+
+    async def run(self, func, *args, **kwargs) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+
+    async def readable_serialize(self,
+                                 obj: Any,
+                                 file_name: str,
+                                 compression: Optional[str] = None,
+                                 compression_level: Optional[int] = None,
+                                 profile: Optional[SerializationProfile] = None,
+                                 indent: Optional[int] = 2,
+                                 layout: str = READABLE_LAYOUT_CHILDREN,
+                                 id_strategy: str = READABLE_IDS_UUID):
+        await self.run(
+            self.file_serializer.readable_serialize,
+            obj,
+            file_name,
+            compression,
+            compression_level,
+            profile,
+            indent,
+            layout,
+            id_strategy)
+
+    async def binary_serialize(self,
+                               obj: Any,
+                               file_name: str,
+                               compression: Optional[str] = None,
+                               compression_level: Optional[int] = None,
+                               dedupe_values: bool = False,
+                               profile: Optional[SerializationProfile] = None):
+        await self.run(
+            self.file_serializer.binary_serialize,
+            obj,
+            file_name,
+            compression,
+            compression_level,
+            dedupe_values,
+            profile)
+
+    async def indexed_archive_serialize(self, obj: Any, file_name: str):
+        await self.run(self.file_serializer.indexed_archive_serialize, obj, file_name)
+
+    def close(self):
+        """
+        Wait for the running saves to finish and shut down the executor if this object created it.
+        """
+        if self.owns_executor:
+            self.executor.shutdown(wait=True)
+
+    async def aclose(self):
+        """
+        Do what close does on the default executor of the event loop, so that the wait does not block the loop.
+        """
+        if self.owns_executor:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, functools.partial(self.executor.shutdown, wait=True))
+
+    @injectable_class
+    class Factory:
+        def __init__(self, file_serializer: FileSerializer):
+            self.file_serializer = file_serializer
+
+        def create(self,
+                   max_concurrent_saves: int = DEFAULT_MAX_CONCURRENT_SAVES,
+                   executor: Optional[Executor] = None) -> 'AsyncFileSerializer':
+            """
+            Create an AsyncFileSerializer that runs on the given executor, or on its own ThreadPoolExecutor with
+            max_concurrent_saves threads, which close() shuts down.
+            """
+            if executor is not None:
+                return AsyncFileSerializer(self.file_serializer, executor)
+            return AsyncFileSerializer(
+                self.file_serializer,
+                ThreadPoolExecutor(max_workers=max_concurrent_saves, thread_name_prefix="AsyncFileSerializer"),
+                owns_executor=True)
+
+    class Module(JyuusuModule):
+        def configure(self, binder: Binder):
+            binder.install_class(AsyncFileSerializer.Factory)
@@ -1,10 +1,12 @@
 from abc import ABC, abstractmethod
-from typing import TypeVar, Generic, Dict, Any, Optional
+from typing import TypeVar, Generic, Dict, Any, Optional, List, Generator
 from uuid import UUID, uuid4
 
 from hana04.base.extension.hana_extensible import HanaExtensible
 from hana04.base.serialize.binary.constants import TYPE_TAG, VALUE_TAG, UUID_TAG, EXTENSION_TAG
 from hana04.base.type_ids import TYPE_ID_LOOKUP
+from hana04.base.util.message_unpacker import MessageUnpacker
+from hana04.base.util.work_stack import run_work_stack
 from jyuusu.constructor_resolver import injectable_class, memoized
 
 from jyuusu.binder import Module as JyuusuModule, Binder
@@ -21,6 +23,32 @@ class TypeBinaryDeserializer(Generic[T], ABC):
     def get_serialized_type(self) -> type:
         pass
 
+    def stream_deserialize(self, unpacker: MessageUnpacker, binary_deserializer: 'BinaryDeserializer') -> T:
+        """
+        Deserialize a value whose content is the next value in the unpacker. Deserializers of large values should
+        override this method and read their content piece by piece.
+        """
+        return self.deserialize(unpacker.unpack(), binary_deserializer)
+
+    def iter_deserialize(self, value: Any, binary_deserializer: 'BinaryDeserializer') -> Optional[Generator]:
+        """
+        Return a generator that does what deserialize does but yields the serialized values it would pass to
+        binary_deserializer.deserialize and receives their deserialized values, so that BinaryDeserializer
+        deserializes them without recursion, or None if the value must be deserialized with deserialize. Deserializers
+        of values that contain other values should override it.
+        """
+        return None
+
+    def iter_stream_deserialize(self,
+                                unpacker: MessageUnpacker,
+                                binary_deserializer: 'BinaryDeserializer') -> Optional[Generator]:
+        """
+        Return a generator that does what stream_deserialize does but yields the unpacker, instead of calling
+        binary_deserializer.stream_deserialize, to receive the next deserialized value, or None if the value must be
+        deserialized with stream_deserialize.
+        """
+        return None
+
 
 @memoized
 @injectable_class
@@ -30,13 +58,36 @@ class TypeIdToBinaryDeserializerMap:
 
 
 class BinaryDeserializer:
+    """
+    Reads values in the binary format. Nested values are deserialized with a WorkStack, so deep object graphs do not
+    hit the recursion limit as long as their TypeBinaryDeserializers implement iter_deserialize and
+    iter_stream_deserialize.
+    """
+
     def __init__(self, file_name: Optional[str], type_id_to_deserializer_map: Dict[int, TypeBinaryDeserializer]):
         self.type_id_to_deserializer_map = type_id_to_deserializer_map
         self.file_name = file_name
         self.uuid_to_obj: Dict[UUID, Any] = {}
+        # Objects of format version 2 and later, indexed by their integer references.
+        self.ref_to_obj: List[Any] = []
 
     def deserialize(self, dict_value: Dict[int, Any]):
-        from hana04.base.serialize.hana_serializable import HanaSerializable
+        return run_work_stack(self.deserialize_value, dict_value)
+
+    def run(self, iterator: Generator) -> Any:
+        """
+        Run a generator returned by an iter_deserialize or iter_stream_deserialize method to completion and return its
+        return value.
+        """
+        return run_work_stack(self.deserialize_value, iterator)
+
+    def deserialize_value(self, dict_value: Any) -> Any:
+        """
+        Return the deserialized value, or a generator that returns it, of dict_value, which is either a serialized
+        value or a MessageUnpacker whose next value is to be deserialized.
+        """
+        if isinstance(dict_value, MessageUnpacker):
+            return self.stream_deserialize_value(dict_value)
 
         assert TYPE_TAG in dict_value
         assert isinstance(dict_value[TYPE_TAG], int)
@@ -44,24 +95,97 @@ class BinaryDeserializer:
 
         type_id = dict_value[TYPE_TAG]
         if type_id == TYPE_ID_LOOKUP:
-            uuid = UUID(bytes=dict_value[VALUE_TAG])
-            return self.uuid_to_obj[uuid]
+            return self.lookup(dict_value[VALUE_TAG])
 
         deserializer = self.type_id_to_deserializer_map[type_id]
+        iterator = deserializer.iter_deserialize(dict_value[VALUE_TAG], self)
+        if iterator is not None:
+            return self.iter_register(iterator, dict_value.get(UUID_TAG, None), 0, None)
         result = deserializer.deserialize(dict_value[VALUE_TAG], self)
+        self.register(result, dict_value.get(UUID_TAG, None))
+        return result
 
-        if isinstance(result, HanaSerializable):
-            if UUID_TAG in dict_value:
-                uuid = UUID(bytes=dict_value[UUID_TAG])
+    def stream_deserialize(self, unpacker: MessageUnpacker):
+        """
+        Deserialize the next value in the unpacker. The type tag must come before the value tag, which is always
+        the case for output of BinarySerializer.
+        """
+        return run_work_stack(self.deserialize_value, unpacker)
+
+    def stream_deserialize_value(self, unpacker: MessageUnpacker) -> Any:
+        map_size = unpacker.read_map_header()
+        type_id = None
+        has_result = False
+        result = None
+        ref_value = None
+        for index in range(map_size):
+            key = unpacker.unpack()
+            if key == TYPE_TAG:
+                type_id = unpacker.unpack()
+                assert isinstance(type_id, int)
+            elif key == VALUE_TAG:
+                assert type_id is not None
+                if type_id == TYPE_ID_LOOKUP:
+                    result = self.lookup(unpacker.unpack())
+                else:
+                    deserializer = self.type_id_to_deserializer_map[type_id]
+                    iterator = deserializer.iter_stream_deserialize(unpacker, self)
+                    if iterator is not None:
+                        return self.iter_register(iterator, ref_value, map_size - index - 1, unpacker)
+                    result = deserializer.stream_deserialize(unpacker, self)
+                has_result = True
+            elif key == UUID_TAG:
+                ref_value = unpacker.unpack()
             else:
-                uuid = uuid4()
-            self.uuid_to_obj[uuid] = result
+                unpacker.skip()
+        assert has_result
 
+        if type_id != TYPE_ID_LOOKUP:
+            self.register(result, ref_value)
         return result
 
-    def deserialize_extensions(self, dict_value: Dict[int, Any], hana_extensible: HanaExtensible):
-        from hana04.base.serialize.hana_late_deserializable import HanaLateDeserializable
+    def iter_register(self,
+                      iterator: Generator,
+                      ref_value: Optional[Any],
+                      num_remaining_entries: int,
+                      unpacker: Optional[MessageUnpacker]) -> Generator:
+        """
+        Run iterator, read the reference from the entries of the map that come after the value in the unpacker, if
+        any, and register the result.
+        """
+        result = yield iterator
+        for _ in range(num_remaining_entries):
+            key = unpacker.unpack()
+            if key == UUID_TAG:
+                ref_value = unpacker.unpack()
+            else:
+                unpacker.skip()
+        self.register(result, ref_value)
+        return result
+
+    def lookup(self, ref_value: Any):
+        if isinstance(ref_value, int):
+            return self.ref_to_obj[ref_value]
+        else:
+            return self.uuid_to_obj[UUID(bytes=ref_value)]
 
+    def register(self, obj: Any, ref_value: Optional[Any]):
+        from hana04.base.serialize.hana_serializable import HanaSerializable
+
+        # Values that are not HanaSerializable only have references if they were deduplicated.
+        if ref_value is None and not isinstance(obj, HanaSerializable):
+            return
+        if isinstance(ref_value, int):
+            # References are usually registered in increasing order, but extensions are not registered at all.
+            if ref_value >= len(self.ref_to_obj):
+                self.ref_to_obj.extend([None] * (ref_value + 1 - len(self.ref_to_obj)))
+            self.ref_to_obj[ref_value] = obj
+        elif ref_value is not None:
+            self.uuid_to_obj[UUID(bytes=ref_value)] = obj
+        else:
+            self.uuid_to_obj[uuid4()] = obj
+
+    def deserialize_extensions(self, dict_value: Dict[int, Any], hana_extensible: HanaExtensible):
         if EXTENSION_TAG not in dict_value:
             return
 
@@ -69,25 +193,44 @@ class BinaryDeserializer:
         assert isinstance(extension_values, list)
 
         for extension_value in extension_values:
-            assert isinstance(extension_value, dict)
-            assert TYPE_TAG in extension_value
-            type_id = extension_value[TYPE_TAG]
-            assert isinstance(type_id, int)
-            assert type_id in self.type_id_to_deserializer_map
-            deserializer = self.type_id_to_deserializer_map[type_id]
-            deserialized_type = deserializer.get_serialized_type()
-            assert issubclass(deserialized_type, HanaLateDeserializable)
-            extension = hana_extensible.get_extension(deserialized_type)
-            assert isinstance(extension, HanaLateDeserializable)
-            extension.binary_deserialize(extension_value, self)
+            self.deserialize_extension(extension_value, hana_extensible)
+
+    def stream_deserialize_extensions(self, unpacker: MessageUnpacker, hana_extensible: HanaExtensible):
+        """
+        Deserialize the extensions of the given extensible from the unpacker, which must be positioned at the array
+        stored under EXTENSION_TAG.
+        """
+        num_extensions = unpacker.read_array_header()
+        for _ in range(num_extensions):
+            self.deserialize_extension(unpacker.unpack(), hana_extensible)
+
+    def deserialize_extension(self, extension_value: Dict[int, Any], hana_extensible: HanaExtensible):
+        from hana04.base.serialize.hana_late_deserializable import HanaLateDeserializable
+
+        assert isinstance(extension_value, dict)
+        assert TYPE_TAG in extension_value
+        type_id = extension_value[TYPE_TAG]
+        assert isinstance(type_id, int)
+        assert type_id in self.type_id_to_deserializer_map
+        deserializer = self.type_id_to_deserializer_map[type_id]
+        deserialized_type = deserializer.get_serialized_type()
+        assert issubclass(deserialized_type, HanaLateDeserializable)
+        extension = hana_extensible.get_extension(deserialized_type)
+        assert isinstance(extension, HanaLateDeserializable)
+        extension.binary_deserialize(extension_value, self)
 
     @injectable_class
     class Factory:
         def __init__(self, type_id_to_deserializer_map: TypeIdToBinaryDeserializerMap):
             self.type_id_to_deserializer_map = type_id_to_deserializer_map.value
 
-        def create(self, file_name: Optional[str] = None):
-            return BinaryDeserializer(file_name, self.type_id_to_deserializer_map)
+        def create(self, file_name: Optional[str] = None, profile: Optional['SerializationProfile'] = None):
+            """
+            If profile is not None, the type deserializers record what they do in it. See SerializationProfile.
+            """
+            if profile is None:
+                return BinaryDeserializer(file_name, self.type_id_to_deserializer_map)
+            return BinaryDeserializer(file_name, profile.wrap_binary_deserializers(self.type_id_to_deserializer_map))
 
     class Module(JyuusuModule):
         def configure(self, binder: Binder):
@@ -1,16 +1,23 @@
+import hashlib
 from abc import ABC, abstractmethod
-from typing import Optional, TypeVar, Generic, Dict, Any
+from io import BytesIO
+from typing import Optional, TypeVar, Generic, Dict, Any, Union, Callable, Generator, Tuple, List
 from uuid import UUID, uuid4
 
 from hana04.base.extension.hana_extensible import HanaExtensible
-from hana04.base.serialize.binary.constants import TYPE_TAG, VALUE_TAG, UUID_TAG
+from hana04.base.serialize.binary.constants import TYPE_TAG, VALUE_TAG, UUID_TAG, BINARY_FORMAT_VERSION_UUID_REFS, \
+    BINARY_FORMAT_VERSION, BINARY_FORMAT_VERSION_SHARED_VALUES
 from hana04.base.type_ids import TYPE_ID_LOOKUP
 from hana04.base.util.message_packer import MessagePacker
+from hana04.base.util.work_stack import WorkStack, run_work_stack
 from jyuusu.binder import Binder, Module as JyuusuModule
 from jyuusu.constructor_resolver import injectable_class, memoized
 
 T = TypeVar("T")
 
+# Values whose packed content is shorter than this are not worth replacing with lookups.
+DEFAULT_DEDUPE_MIN_SIZE = 16
+
 
 class TypeBinarySerializer(Generic[T], ABC):
     @abstractmethod
@@ -21,6 +28,14 @@ class TypeBinarySerializer(Generic[T], ABC):
     def get_type_id(self) -> int:
         pass
 
+    def iter_serialize(self, obj: T, packer: MessagePacker, serializer: 'BinarySerializer') -> Optional[Generator]:
+        """
+        Return a generator that does what serialize does but yields the values it would pass to serializer.serialize,
+        so that BinarySerializer serializes them without recursion, or None if obj must be serialized with serialize.
+        Serializers of values that contain other values should override it.
+        """
+        return None
+
 
 @memoized
 @injectable_class
@@ -36,66 +51,248 @@ class TypeToBinarySerializerMap:
         self.value = value
 
 
+class BinarySerializerDispatchCache:
+    """
+    Maps the class of a serialized object to a function (binary_serializer, obj) that packs it, so that
+    BinarySerializer.serialize does not have to check whether the object is a HanaSerializable and look up its
+    TypeBinarySerializer every time. The type ID of a HanaSerializable is assumed to depend only on its class. The
+    function returns None after packing the object, or a generator that packs it, as BinarySerializer.serialize_value
+    does.
+    """
+
+    def __init__(self,
+                 type_id_to_serializer: Dict[int, TypeBinarySerializer],
+                 type_to_serializer: Dict[type, TypeBinarySerializer]):
+        self.type_id_to_serializer = type_id_to_serializer
+        self.type_to_serializer = type_to_serializer
+        self.encoders: Dict[type, Callable[['BinarySerializer', Any], Optional[Generator]]] = {}
+        for type_ in type_to_serializer.keys():
+            self.encoders[type_] = self.create_non_serializable_encoder(type_to_serializer[type_])
+
+    def get_encoder(self, obj: Any) -> Callable[['BinarySerializer', Any], Optional[Generator]]:
+        from hana04.base.serialize.hana_serializable import HanaSerializable
+
+        encoder = self.encoders.get(obj.__class__)
+        if encoder is None:
+            if isinstance(obj, HanaSerializable):
+                encoder = self.create_serializable_encoder(self.type_id_to_serializer[obj.get_serialized_type_id()])
+            else:
+                encoder = self.create_non_serializable_encoder(self.type_to_serializer[obj.__class__])
+            self.encoders[obj.__class__] = encoder
+        return encoder
+
+    @staticmethod
+    def create_serializable_encoder(serializer: TypeBinarySerializer):
+        def encode(binary_serializer: BinarySerializer, obj: Any) -> Optional[Generator]:
+            if id(obj) in binary_serializer.obj_id_to_ref:
+                binary_serializer.pack_lookup(obj)
+                return None
+            return binary_serializer.iter_pack_serializable(obj, serializer)
+
+        return encode
+
+    @staticmethod
+    def create_non_serializable_encoder(serializer: TypeBinarySerializer):
+        def encode(binary_serializer: BinarySerializer, obj: Any) -> Optional[Generator]:
+            return binary_serializer.iter_pack_non_serializable(obj, serializer)
+
+        return encode
+
+
 class BinarySerializer:
+    """
+    Writes values in the binary format. Nested values are serialized with a WorkStack, so deep object graphs, such
+    as long linked lists, do not hit the recursion limit as long as their TypeBinarySerializers implement
+    iter_serialize.
+
+    If dedupe_values is True, values that are not HanaSerializable, such as Transforms and FilePaths, are
+    identified by a hash of their type ID and packed content. The first copy of each value whose content is at least
+    dedupe_min_size bytes long gets a reference, and later copies are written as lookups, which BinaryDeserializer
+    turns into the same instance. Values whose TypeBinarySerializers implement iter_serialize contain other values,
+    which are deduplicated on their own, and are always written in full.
+    """
+
     def __init__(self,
                  packer: MessagePacker,
                  file_name: Optional[str],
                  type_id_to_serializer: Dict[int, TypeBinarySerializer],
-                 type_to_serializer: Dict[type, TypeBinarySerializer]):
+                 type_to_serializer: Dict[type, TypeBinarySerializer],
+                 format_version: int = BINARY_FORMAT_VERSION_UUID_REFS,
+                 dispatch_cache: Optional[BinarySerializerDispatchCache] = None,
+                 dedupe_values: bool = False,
+                 dedupe_min_size: int = DEFAULT_DEDUPE_MIN_SIZE):
+        assert 1 <= format_version <= BINARY_FORMAT_VERSION
+        assert not dedupe_values or format_version >= BINARY_FORMAT_VERSION_SHARED_VALUES
         self.type_to_serializer = type_to_serializer
         self.type_id_to_serializer = type_id_to_serializer
+        if dispatch_cache is None:
+            dispatch_cache = BinarySerializerDispatchCache(type_id_to_serializer, type_to_serializer)
+        self.dispatch_cache = dispatch_cache
+        self.encoders = dispatch_cache.encoders
         self.file_name = file_name
         self.packer = packer
-        self.obj_id_to_uuid: Dict[int, UUID] = {}
+        self.format_version = format_version
+        # Maps id(obj) to the object's reference, which is a UUID in format version 1 and an int in later versions.
+        self.obj_id_to_ref: Dict[int, Union[UUID, int]] = {}
+        self.dedupe_values = dedupe_values
+        self.dedupe_min_size = dedupe_min_size
+        # Maps the type IDs and content hashes of deduplicated values to their references.
+        self.value_key_to_ref: Dict[Tuple[int, bytes], Union[UUID, int]] = {}
+        # The packers that pack_content_to_bytes packs into, reused from value to value. Serializing a value may
+        # serialize the values in it, so there is one for each level of nesting.
+        self.scratch_packers: List[MessagePacker] = []
+        self.num_scratch_packers_in_use = 0
 
     def serialize(self, obj: Any):
-        from hana04.base.serialize.hana_serializable import HanaSerializable
+        run_work_stack(self.serialize_value, obj)
 
-        if isinstance(obj, HanaSerializable):
-            if id(obj) in self.obj_id_to_uuid:
-                self.pack_lookup(obj)
-            else:
-                serializer = self.type_id_to_serializer[obj.get_serialized_type_id()]
-                self.pack_serializable(obj, serializer)
-        else:
-            serializer = self.type_to_serializer[obj.__class__]
-            self.pack_non_serializable(obj, serializer)
+    def start_serialize(self, obj: Any) -> WorkStack:
+        """
+        Return a WorkStack that serializes obj when it is run. Running it a limited number of steps at a time lets
+        the caller pause the serialization, e.g., to flush the packer.
+        """
+        return WorkStack(self.serialize_value, obj)
+
+    def run(self, iterator: Generator) -> Any:
+        """
+        Run a generator returned by an iter_serialize method to completion and return its return value.
+        """
+        return run_work_stack(self.serialize_value, iterator)
+
+    def serialize_value(self, obj: Any) -> Optional[Generator]:
+        """
+        Serialize obj and return None, or return a generator that serializes it if it contains values that should be
+        serialized without recursion.
+        """
+        encoder = self.encoders.get(obj.__class__)
+        if encoder is None:
+            encoder = self.dispatch_cache.get_encoder(obj)
+        return encoder(self, obj)
 
     def pack_lookup(self, obj: Any):
-        assert id(obj) in self.obj_id_to_uuid
-        uuid = self.obj_id_to_uuid[id(obj)]
+        assert id(obj) in self.obj_id_to_ref
+        self.pack_lookup_ref(self.obj_id_to_ref[id(obj)])
+
+    def pack_lookup_ref(self, ref: Union[UUID, int]):
         self.packer.pack_map_header(2)
         if True:
             self.packer.pack_int(TYPE_TAG)
             self.packer.pack_int(TYPE_ID_LOOKUP)
         if True:
             self.packer.pack_int(VALUE_TAG)
-            self.packer.pack_bytes(uuid.bytes)
+            self.pack_ref(ref)
 
-    def pack_serializable(self, obj, serializer: TypeBinarySerializer):
+    def iter_pack_serializable(self, obj, serializer: TypeBinarySerializer) -> Generator:
         self.packer.pack_map_header(3)
         if True:
             self.packer.pack_int(TYPE_TAG)
             self.packer.pack_int(obj.get_serialized_type_id())
         if True:
             self.packer.pack_int(VALUE_TAG)
-            serializer.serialize(obj, self.packer, self)
+            iterator = serializer.iter_serialize(obj, self.packer, self)
+            if iterator is None:
+                serializer.serialize(obj, self.packer, self)
+            else:
+                yield iterator
         if True:
-            uuid = uuid4()
-            self.obj_id_to_uuid[id(obj)] = uuid
+            ref = self.assign_ref(obj)
             self.packer.pack_int(UUID_TAG)
-            self.packer.pack_bytes(uuid.bytes)
+            self.pack_ref(ref)
+
+    def assign_ref(self, obj: Any) -> Union[UUID, int]:
+        ref = self.new_ref()
+        self.obj_id_to_ref[id(obj)] = ref
+        return ref
+
+    def new_ref(self) -> Union[UUID, int]:
+        if self.format_version == BINARY_FORMAT_VERSION_UUID_REFS:
+            return uuid4()
+        else:
+            return len(self.obj_id_to_ref) + len(self.value_key_to_ref)
+
+    def pack_ref(self, ref: Union[UUID, int]):
+        if isinstance(ref, UUID):
+            self.packer.pack_bytes(ref.bytes)
+        else:
+            self.packer.pack_int(ref)
 
-    def pack_non_serializable(self, obj, serializer: TypeBinarySerializer):
+    def iter_pack_non_serializable(self, obj, serializer: TypeBinarySerializer) -> Optional[Generator]:
+        """
+        Pack obj and return None, or return a generator that packs the rest of it.
+        """
+        if self.dedupe_values:
+            content = self.pack_content_to_bytes(obj, serializer)
+            if content is not None:
+                self.pack_deduped_value(serializer.get_type_id(), content)
+                return None
         self.packer.pack_map_header(2)
         if True:
             self.packer.pack_int(TYPE_TAG)
             self.packer.pack_int(serializer.get_type_id())
         if True:
             self.packer.pack_int(VALUE_TAG)
-            serializer.serialize(obj, self.packer, self)
+            iterator = serializer.iter_serialize(obj, self.packer, self)
+            if iterator is None:
+                serializer.serialize(obj, self.packer, self)
+            return iterator
+
+    def pack_content_to_bytes(self, obj, serializer: TypeBinarySerializer) -> Optional[bytes]:
+        """
+        Return the packed content of obj, or None if its serializer implements iter_serialize.
+        """
+        if self.num_scratch_packers_in_use == len(self.scratch_packers):
+            self.scratch_packers.append(MessagePacker(BytesIO()))
+        scratch_packer = self.scratch_packers[self.num_scratch_packers_in_use]
+        scratch_packer.out.seek(0)
+        scratch_packer.out.truncate()
+        self.num_scratch_packers_in_use += 1
+        packer = self.packer
+        self.packer = scratch_packer
+        try:
+            iterator = serializer.iter_serialize(obj, scratch_packer, self)
+            if iterator is not None:
+                iterator.close()
+                return None
+            serializer.serialize(obj, scratch_packer, self)
+            return scratch_packer.out.getvalue()
+        finally:
+            self.packer = packer
+            self.num_scratch_packers_in_use -= 1
+
+    def pack_deduped_value(self, type_id: int, content: bytes):
+        """
+        Write a value with the given packed content, or a lookup if a value with the same type ID and content has
+        already been written.
+
+        A content that defines a HanaSerializable or another value contains a new reference, so it is never equal
+        to an earlier content. Discarding the content of a copy therefore never discards a definition.
+        """
+        if len(content) >= self.dedupe_min_size:
+            key = (type_id, hashlib.blake2b(content, digest_size=16).digest())
+            ref = self.value_key_to_ref.get(key)
+            if ref is not None:
+                self.pack_lookup_ref(ref)
+                return
+            ref = self.new_ref()
+            self.value_key_to_ref[key] = ref
+            self.packer.pack_map_header(3)
+        else:
+            ref = None
+            self.packer.pack_map_header(2)
+        if True:
+            self.packer.pack_int(TYPE_TAG)
+            self.packer.pack_int(type_id)
+        if True:
+            self.packer.pack_int(VALUE_TAG)
+            self.packer.write_packed(content)
+        if ref is not None:
+            self.packer.pack_int(UUID_TAG)
+            self.pack_ref(ref)
 
     def serialize_extensions(self, hana_extensible: HanaExtensible):
+        self.run(self.iter_serialize_extensions(hana_extensible))
+
+    def iter_serialize_extensions(self, hana_extensible: HanaExtensible) -> Generator:
         from hana04.base.serialize.hana_late_deserializable import HanaLateDeserializable
 
         serialized_extensions = [
@@ -103,7 +300,7 @@ class BinarySerializer:
             isinstance(extension, HanaLateDeserializable)]
         self.packer.pack_array_header(len(serialized_extensions))
         for extension in serialized_extensions:
-            self.serialize(extension)
+            yield extension
 
     @injectable_class
     class Factory:
@@ -112,9 +309,34 @@ class BinarySerializer:
                      type_to_serializer: TypeToBinarySerializerMap):
             self.type_to_serializer = type_to_serializer.value
             self.type_id_to_serializer = type_id_to_serializer.value
+            self.dispatch_cache = BinarySerializerDispatchCache(self.type_id_to_serializer, self.type_to_serializer)
 
-        def create(self, packer: MessagePacker, file_name: Optional[str] = None):
-            return BinarySerializer(packer, file_name, self.type_id_to_serializer, self.type_to_serializer)
+        def create(self,
+                   packer: MessagePacker,
+                   file_name: Optional[str] = None,
+                   format_version: int = BINARY_FORMAT_VERSION_UUID_REFS,
+                   dedupe_values: bool = False,
+                   profile: Optional['SerializationProfile'] = None):
+            """
+            If profile is not None, the type serializers record what they do in it. See SerializationProfile.
+            """
+            if profile is None:
+                return BinarySerializer(
+                    packer,
+                    file_name,
+                    self.type_id_to_serializer,
+                    self.type_to_serializer,
+                    format_version,
+                    self.dispatch_cache,
+                    dedupe_values)
+            return BinarySerializer(
+                packer,
+                file_name,
+                profile.wrap_binary_serializers(self.type_id_to_serializer),
+                profile.wrap_binary_serializers(self.type_to_serializer),
+                format_version,
+                None,
+                dedupe_values)
 
     class Module(JyuusuModule):
         def configure(self, binder: Binder):
@@ -2,3 +2,28 @@ TYPE_TAG = -1
 UUID_TAG = -2
 VALUE_TAG = -3
 EXTENSION_TAG = -4
+
+
+# Binary files written by FileSerializer start with these bytes. 0xc1 is never used by msgpack, so a file that starts
+# with the magic number cannot be confused with a headerless file that holds a single msgpack value.
+BINARY_FILE_MAGIC = b"\xc1HANA04B"
+# Version 1 identifies objects by 16-byte UUIDs.
+BINARY_FORMAT_VERSION_UUID_REFS = 1
+# Version 2 identifies objects by sequential integers, which msgpack packs in as little as one byte.
+BINARY_FORMAT_VERSION_INT_REFS = 2
+# Version 3 writes List properties of fixed-width numbers as packed arrays. See hana04.base.util.packed_array.
+BINARY_FORMAT_VERSION_PACKED_ARRAYS = 3
+# Version 4 writes properties declared as numpy.int32, numpy.int64, numpy.float32, numpy.float64, bool or str as bare
+# msgpack values. See hana04.apt.extensible.property_type_spec.UNTAGGED_PRIMITIVES.
+BINARY_FORMAT_VERSION_UNTAGGED_PRIMITIVES = 4
+# Version 5 writes Dict properties whose keys are such primitives as msgpack maps instead of arrays of HanaMapEntry.
+BINARY_FORMAT_VERSION_NATIVE_MAPS = 5
+# In version 6, values that are not HanaSerializable may also have references, and later copies of them may be
+# written as lookups. BinarySerializer only writes them if it is created with dedupe_values=True.
+BINARY_FORMAT_VERSION_SHARED_VALUES = 6
+# The format version is packed as a msgpack integer right after the magic number.
+BINARY_FORMAT_VERSION = BINARY_FORMAT_VERSION_SHARED_VALUES
+
+# Indexed archives start and end with this magic number. See hana04.base.serialize.binary.indexed_archive.
+INDEXED_ARCHIVE_MAGIC = b"\xc1HANA04I"
+INDEXED_ARCHIVE_VERSION = 1
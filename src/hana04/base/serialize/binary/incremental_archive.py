@@ -0,0 +1,211 @@
+import os
+from io import BytesIO
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple
+
+import msgpack
+
+from hana04.base.extension.hana_extensible import HanaExtensible
+from hana04.base.serialize.binary.binary_serializer import BinarySerializer, TypeBinarySerializer, \
+    BinarySerializerDispatchCache
+from hana04.base.serialize.binary.constants import INDEXED_ARCHIVE_MAGIC, INDEXED_ARCHIVE_VERSION
+from hana04.base.serialize.binary.indexed_archive import IndexedArchiveSerializer, INDEXED_ARCHIVE_TRAILER
+from hana04.base.util.message_packer import BufferedMessagePacker
+
+
+class _Record(NamedTuple):
+    offset: int
+    length: int
+    type_id: int
+    # None if the object must be written again on every save.
+    signature: Optional[Tuple]
+    # The references of the objects that the record refers to with lookups.
+    child_refs: List[int]
+    # The references assigned while the record was written, which are the object's and its extensions'.
+    owned_refs: List[int]
+
+
+class IncrementalArchiveSerializer(IndexedArchiveSerializer):
+    """
+    Saves successive versions of an object graph to the same indexed archive.
+
+    The first save writes the whole archive. A later save appends a new root record and a new index to the end of
+    the file. It also appends records for the objects that are new or whose signature has changed. The records of
+    the other objects stay where they are, because every object keeps its reference across saves and a record refers
+    to other objects only by reference. Finding the changed objects takes a walk over the references that the
+    records of the last save hold. Only the changed objects are encoded and written, so the cost of a save grows
+    with the size of the change rather than with the size of the graph. Readers see the last index.
+
+    The signature of an object is what get_variable_versions returns for it and for its extensions that are
+    HanaLateDeserializable. An object whose get_variable_versions returns None is written again on every save. The
+    serializer keeps the objects of the last saved graph alive, so that their ids still identify them in the next
+    save. Objects whose content can change other than through their Variables must not be saved incrementally.
+
+    The replaced records and indices stay in the file. compact() makes the next save rewrite the whole archive. So
+    does a change in the size of the file since the last save.
+    """
+
+    def __init__(self,
+                 file_name: str,
+                 type_id_to_serializer: Dict[int, TypeBinarySerializer],
+                 type_to_serializer: Dict[type, TypeBinarySerializer],
+                 dispatch_cache: Optional[BinarySerializerDispatchCache] = None):
+        super().__init__(None, file_name, type_id_to_serializer, type_to_serializer, dispatch_cache)
+        self.records: Dict[int, _Record] = {}
+        self.ref_to_obj: Dict[int, Any] = {}
+        self.next_ref = 0
+        self.file_size: Optional[int] = None
+        # The child and owned references of the records being written, innermost last.
+        self.record_stack: List[Tuple[List[int], List[int]]] = []
+        self.written_refs: Set[int] = set()
+
+    def compact(self):
+        """
+        Forget what the previous saves wrote, so that the next save rewrites the whole archive.
+        """
+        self.obj_id_to_ref.clear()
+        self.records.clear()
+        self.ref_to_obj.clear()
+        self.next_ref = 0
+        self.file_size = None
+
+    def num_records_written_by_last_save(self) -> int:
+        return len(self.written_refs)
+
+    def save(self, obj: Any):
+        if self.file_size is not None \
+                and (not os.path.exists(self.file_name) or os.path.getsize(self.file_name) != self.file_size):
+            self.compact()
+        try:
+            with open(self.file_name, "wb" if self.file_size is None else "ab") as out:
+                self.out = out
+                if self.file_size is None:
+                    self.position = 0
+                    self.write(INDEXED_ARCHIVE_MAGIC)
+                    self.write(msgpack.packb(INDEXED_ARCHIVE_VERSION))
+                else:
+                    self.position = self.file_size
+                self.write_version(obj)
+            self.file_size = self.position
+        except BaseException:
+            self.compact()
+            raise
+        finally:
+            self.out = None
+
+    def write_version(self, obj: Any):
+        self.packer = BufferedMessagePacker(BytesIO())
+        self.written_refs = set()
+
+        def serialize_root():
+            yield obj
+
+        self.record_stack.append(([], []))
+        root_offset, root_length = self.run(self.iter_write_record(serialize_root()))
+        root_child_refs, _ = self.record_stack.pop()
+        self.remove_unreachable(self.write_changed_records(root_child_refs))
+
+        index = [[ref, record.offset, record.length, record.type_id] for ref, record in self.records.items()]
+        index_offset = self.position
+        self.write(msgpack.packb([root_offset, root_length, index]))
+        self.write(INDEXED_ARCHIVE_TRAILER.pack(index_offset))
+        self.write(INDEXED_ARCHIVE_MAGIC)
+
+    def write_changed_records(self, root_child_refs: List[int]) -> Set[int]:
+        """
+        Write the records of the objects reachable from the root whose signatures have changed, and return the
+        references of all reachable objects.
+        """
+        visited = set()
+        stack = list(root_child_refs)
+        while stack:
+            ref = stack.pop()
+            if ref in visited:
+                continue
+            visited.add(ref)
+            record = self.records.get(ref)
+            if record is None:
+                # An extension that is written inside the record of its owner.
+                continue
+            if ref not in self.written_refs:
+                obj = self.ref_to_obj[ref]
+                if record.signature is None or record.signature != IncrementalArchiveSerializer.get_signature(obj):
+                    serializer = self.type_id_to_serializer[obj.get_serialized_type_id()]
+                    self.run(self.iter_pack_serializable(obj, serializer))
+                    record = self.records[ref]
+            stack.extend(record.child_refs)
+        return visited
+
+    def remove_unreachable(self, reachable_refs: Set[int]):
+        live_refs = set()
+        for ref in reachable_refs:
+            if ref in self.records:
+                live_refs.update(self.records[ref].owned_refs)
+        for ref in list(self.ref_to_obj.keys()):
+            if ref not in live_refs:
+                obj = self.ref_to_obj.pop(ref)
+                del self.obj_id_to_ref[id(obj)]
+                self.records.pop(ref, None)
+
+    @staticmethod
+    def get_signature(obj: Any) -> Optional[Tuple]:
+        from hana04.base.serialize.hana_late_deserializable import HanaLateDeserializable
+
+        versions = obj.get_variable_versions()
+        if versions is None:
+            return None
+        signature = [versions]
+        if isinstance(obj, HanaExtensible):
+            for extension in obj.get_extensions():
+                if not isinstance(extension, HanaLateDeserializable):
+                    continue
+                extension_versions = extension.get_variable_versions()
+                if extension_versions is None:
+                    return None
+                signature.append((id(extension), extension_versions))
+        return tuple(signature)
+
+    def new_ref(self) -> int:
+        ref = self.next_ref
+        self.next_ref += 1
+        return ref
+
+    def assign_ref(self, obj: Any) -> int:
+        # Objects written again keep their references.
+        ref = self.obj_id_to_ref.get(id(obj))
+        if ref is None:
+            ref = self.new_ref()
+            self.obj_id_to_ref[id(obj)] = ref
+            self.ref_to_obj[ref] = obj
+        if self.record_stack:
+            self.record_stack[-1][1].append(ref)
+        return ref
+
+    def pack_lookup(self, obj: Any):
+        super().pack_lookup(obj)
+        if self.record_stack:
+            self.record_stack[-1][0].append(self.obj_id_to_ref[id(obj)])
+
+    def iter_pack_serializable(self, obj, serializer: TypeBinarySerializer):
+        self.record_stack.append(([], []))
+        offset, length = yield self.iter_write_record(BinarySerializer.iter_pack_serializable(self, obj, serializer))
+        child_refs, owned_refs = self.record_stack.pop()
+        ref = self.obj_id_to_ref[id(obj)]
+        signature = IncrementalArchiveSerializer.get_signature(obj)
+        self.records[ref] = _Record(offset, length, obj.get_serialized_type_id(), signature, child_refs, owned_refs)
+        self.written_refs.add(ref)
+        self.pack_lookup(obj)
+
+    def iter_serialize_extensions(self, hana_extensible: HanaExtensible):
+        from hana04.base.serialize.hana_late_deserializable import HanaLateDeserializable
+
+        serialized_extensions = [
+            extension for extension in hana_extensible.get_extensions() if
+            isinstance(extension, HanaLateDeserializable)]
+        self.packer.pack_array_header(len(serialized_extensions))
+        for extension in serialized_extensions:
+            # Extensions written inside the record of their owner are written there again.
+            if self.obj_id_to_ref.get(id(extension)) in self.records:
+                self.pack_lookup(extension)
+            else:
+                serializer = self.type_id_to_serializer[extension.get_serialized_type_id()]
+                yield BinarySerializer.iter_pack_serializable(self, extension, serializer)
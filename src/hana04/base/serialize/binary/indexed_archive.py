@@ -0,0 +1,207 @@
+import mmap
+import struct
+from io import BytesIO, BufferedIOBase
+from typing import Any, Dict, Generator, List, Optional, Tuple
+
+import msgpack
+
+from hana04.base.extension.hana_extensible import HanaExtensible
+from hana04.base.serialize.binary.binary_deserializer import BinaryDeserializer, TypeBinaryDeserializer
+from hana04.base.serialize.binary.binary_serializer import BinarySerializer, TypeBinarySerializer, \
+    BinarySerializerDispatchCache
+from hana04.base.serialize.binary.constants import INDEXED_ARCHIVE_MAGIC, INDEXED_ARCHIVE_VERSION, \
+    BINARY_FORMAT_VERSION_INT_REFS, TYPE_TAG, VALUE_TAG
+from hana04.base.type_ids import TYPE_ID_LOOKUP
+from hana04.base.util.message_packer import BufferedMessagePacker
+
+INDEXED_ARCHIVE_TRAILER = struct.Struct("<Q")
+
+
+class IndexedArchiveSerializer(BinarySerializer):
+    """
+    Writes an indexed archive. An indexed archive stores every HanaSerializable of an object graph as a separate
+    msgpack record, followed by an index from object reference to the position of its record, so that a reader can
+    decode only the objects it needs.
+
+    Layout:
+        INDEXED_ARCHIVE_MAGIC
+        INDEXED_ARCHIVE_VERSION as a msgpack integer
+        the records
+        the index, a msgpack array [root_offset, root_length, [[ref, offset, length, type_id], ...]]
+        the offset of the index as an 8-byte little-endian unsigned integer
+        INDEXED_ARCHIVE_MAGIC
+
+    A record is what BinarySerializer writes for a single object with format version BINARY_FORMAT_VERSION_INT_REFS,
+    except that the HanaSerializables it contains are written as lookups. Children are written before their
+    parents. Extensions are written inside the record of their owner because deserialize_extensions needs their
+    content. The root record holds the serialized root value, which is a lookup if the root is a HanaSerializable.
+    """
+
+    def __init__(self,
+                 out: BufferedIOBase,
+                 file_name: Optional[str],
+                 type_id_to_serializer: Dict[int, TypeBinarySerializer],
+                 type_to_serializer: Dict[type, TypeBinarySerializer],
+                 dispatch_cache: Optional[BinarySerializerDispatchCache] = None):
+        super().__init__(
+            BufferedMessagePacker(BytesIO()),
+            file_name,
+            type_id_to_serializer,
+            type_to_serializer,
+            BINARY_FORMAT_VERSION_INT_REFS,
+            dispatch_cache)
+        self.out = out
+        self.position = 0
+        # [ref, offset, length, type_id] of every record except the root record.
+        self.index: List[List[int]] = []
+
+    def write(self, data: bytes):
+        self.out.write(data)
+        self.position += len(data)
+
+    def write_archive(self, obj: Any):
+        self.write(INDEXED_ARCHIVE_MAGIC)
+        self.write(msgpack.packb(INDEXED_ARCHIVE_VERSION))
+        def serialize_root():
+            yield obj
+
+        root_offset, root_length = self.run(self.iter_write_record(serialize_root()))
+        index_offset = self.position
+        self.write(msgpack.packb([root_offset, root_length, self.index]))
+        self.write(INDEXED_ARCHIVE_TRAILER.pack(index_offset))
+        self.write(INDEXED_ARCHIVE_MAGIC)
+
+    def iter_write_record(self, iterator: Generator) -> Generator:
+        """
+        Run iterator, which writes to self.packer, with a new packer and write what it packed as a record. Return the
+        offset and the length of the record. Records of the values it yields come before it.
+        """
+        parent_packer = self.packer
+        record_out = BytesIO()
+        self.packer = BufferedMessagePacker(record_out)
+        try:
+            yield iterator
+            self.packer.flush()
+        finally:
+            self.packer = parent_packer
+        record = record_out.getvalue()
+        offset = self.position
+        self.write(record)
+        return offset, len(record)
+
+    def iter_pack_serializable(self, obj, serializer: TypeBinarySerializer) -> Generator:
+        offset, length = yield self.iter_write_record(BinarySerializer.iter_pack_serializable(self, obj, serializer))
+        self.index.append([self.obj_id_to_ref[id(obj)], offset, length, obj.get_serialized_type_id()])
+        self.pack_lookup(obj)
+
+    def iter_serialize_extensions(self, hana_extensible: HanaExtensible) -> Generator:
+        from hana04.base.serialize.hana_late_deserializable import HanaLateDeserializable
+
+        serialized_extensions = [
+            extension for extension in hana_extensible.get_extensions() if
+            isinstance(extension, HanaLateDeserializable)]
+        self.packer.pack_array_header(len(serialized_extensions))
+        for extension in serialized_extensions:
+            if id(extension) in self.obj_id_to_ref:
+                self.pack_lookup(extension)
+            else:
+                serializer = self.type_id_to_serializer[extension.get_serialized_type_id()]
+                yield BinarySerializer.iter_pack_serializable(self, extension, serializer)
+
+
+class IndexedArchiveDeserializer(BinaryDeserializer):
+    def __init__(self, archive: 'IndexedArchive', type_id_to_deserializer_map: Dict[int, TypeBinaryDeserializer]):
+        super().__init__(archive.file_name, type_id_to_deserializer_map)
+        self.archive = archive
+
+    def deserialize_value(self, dict_value: Any) -> Any:
+        # Records of objects that are not materialized yet are deserialized in place of lookups, so that long chains
+        # of records do not make the deserialization recurse.
+        if dict_value.__class__ is dict and dict_value.get(TYPE_TAG) == TYPE_ID_LOOKUP:
+            ref_value = dict_value.get(VALUE_TAG)
+            if isinstance(ref_value, int) and not self.is_materialized(ref_value):
+                return super().deserialize_value(self.archive.read_record(ref_value))
+        return super().deserialize_value(dict_value)
+
+    def lookup(self, ref_value: Any):
+        if isinstance(ref_value, int) and not self.is_materialized(ref_value):
+            return self.deserialize(self.archive.read_record(ref_value))
+        return super().lookup(ref_value)
+
+    def is_materialized(self, ref: int) -> bool:
+        return ref < len(self.ref_to_obj) and self.ref_to_obj[ref] is not None
+
+
+class IndexedArchive:
+    """
+    A read-only view of an indexed archive. The file is memory-mapped, and objects are decoded when they or an object
+    that refers to them are requested. The archive must stay open while objects are being materialized.
+    """
+
+    def __init__(self, file_name: str, type_id_to_deserializer_map: Dict[int, TypeBinaryDeserializer]):
+        self.file_name = file_name
+        self.deserializer = IndexedArchiveDeserializer(self, type_id_to_deserializer_map)
+        self.entries: Dict[int, Tuple[int, int, int]] = {}
+        self.file = open(file_name, "rb")
+        try:
+            self.buffer = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self.file.close()
+            raise
+        try:
+            self.read_index()
+        except Exception:
+            self.close()
+            raise
+
+    def read_index(self):
+        magic_size = len(INDEXED_ARCHIVE_MAGIC)
+        trailer_size = INDEXED_ARCHIVE_TRAILER.size + magic_size
+        if len(self.buffer) < magic_size + trailer_size \
+                or self.buffer[:magic_size] != INDEXED_ARCHIVE_MAGIC \
+                or self.buffer[-magic_size:] != INDEXED_ARCHIVE_MAGIC:
+            raise ValueError("%s is not an indexed archive" % self.file_name)
+        unpacker = msgpack.Unpacker()
+        unpacker.feed(self.buffer[magic_size:magic_size + 9])
+        version = unpacker.unpack()
+        if version != INDEXED_ARCHIVE_VERSION:
+            raise ValueError("Unsupported indexed archive version %s in %s" % (version, self.file_name))
+        (index_offset,) = INDEXED_ARCHIVE_TRAILER.unpack_from(self.buffer, len(self.buffer) - trailer_size)
+        root_offset, root_length, index = msgpack.unpackb(self.buffer[index_offset:len(self.buffer) - trailer_size])
+        self.root_entry = (root_offset, root_length)
+        for ref, offset, length, type_id in index:
+            self.entries[ref] = (offset, length, type_id)
+
+    def read_record(self, ref: int) -> Dict[int, Any]:
+        offset, length, _ = self.entries[ref]
+        return self.unpack(offset, length)
+
+    def unpack(self, offset: int, length: int) -> Any:
+        return msgpack.unpackb(self.buffer[offset:offset + length], strict_map_key=False)
+
+    def root(self) -> Any:
+        return self.deserializer.deserialize(self.unpack(*self.root_entry))
+
+    def get(self, ref: int) -> Any:
+        if ref not in self.entries:
+            raise KeyError(ref)
+        return self.deserializer.lookup(ref)
+
+    def refs(self) -> List[int]:
+        return sorted(self.entries.keys())
+
+    def type_id(self, ref: int) -> int:
+        return self.entries[ref][2]
+
+    def is_materialized(self, ref: int) -> bool:
+        return self.deserializer.is_materialized(ref)
+
+    def close(self):
+        self.buffer.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
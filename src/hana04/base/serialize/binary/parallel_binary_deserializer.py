@@ -0,0 +1,291 @@
+import mmap
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import msgpack
+
+from hana04.base.serialize.binary.binary_deserializer import BinaryDeserializer, TypeBinaryDeserializer
+from hana04.base.serialize.binary.constants import TYPE_TAG, VALUE_TAG, EXTENSION_TAG
+from hana04.base.util.hana_map_entry import HanaMapEntry
+
+
+class DependentSubtreesError(Exception):
+    """
+    Raised when the top-level children of a file cannot be deserialized independently of one another.
+    """
+    pass
+
+
+class PreDecodedValue(dict):
+    """
+    Stands in for the serialized form of a value that has already been deserialized. It is a dict so that it passes
+    the checks that TypeBinaryDeserializers do on their inputs.
+    """
+
+    def __init__(self, value: Any):
+        super().__init__()
+        self.value = value
+
+
+class _Subtree(NamedTuple):
+    start: int
+    end: int
+
+
+class PreDecodedValueDeserializer(BinaryDeserializer):
+    def deserialize_value(self, dict_value: Any) -> Any:
+        if dict_value.__class__ is PreDecodedValue:
+            return dict_value.value
+        return super().deserialize_value(dict_value)
+
+
+class _WorkerBinaryDeserializer(BinaryDeserializer):
+    def lookup(self, ref_value: Any):
+        try:
+            result = super().lookup(ref_value)
+        except (KeyError, IndexError):
+            raise DependentSubtreesError()
+        if result is None:
+            raise DependentSubtreesError()
+        return result
+
+
+class _HanaSerializablePickler(pickle.Pickler):
+    """
+    Pickles HanaSerializables, whose classes are usually generated and cannot be pickled by reference, as their type
+    IDs and binary content with PreDecodedValues in place of serialized values.
+    """
+
+    def __init__(self, file):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.obj_id_to_index: Dict[int, int] = {}
+        # Keeps the pickled objects alive so that their ids are not reused.
+        self.objs: List[Any] = []
+
+    def persistent_id(self, obj: Any):
+        from hana04.base.serialize.hana_serializable import HanaSerializable
+
+        if not isinstance(obj, HanaSerializable):
+            return None
+        if id(obj) in self.obj_id_to_index:
+            return "ref", self.obj_id_to_index[id(obj)]
+        index = len(self.objs)
+        self.obj_id_to_index[id(obj)] = index
+        self.objs.append(obj)
+        return "new", index, obj.get_serialized_type_id(), _HanaSerializablePickler.get_content(obj)
+
+    @staticmethod
+    def get_content(obj: Any) -> Dict[int, Any]:
+        from hana04.base.extension.hana_extensible import HanaExtensible
+        from hana04.base.serialize.hana_late_deserializable import HanaLateDeserializable
+
+        property_values = obj.get_binary_property_values()
+        if property_values is None:
+            raise DependentSubtreesError()
+        content = {}
+        for property_id, value in property_values.items():
+            if isinstance(value, list):
+                content[property_id] = [PreDecodedValue(item) for item in value]
+            elif isinstance(value, dict):
+                content[property_id] = [PreDecodedValue(HanaMapEntry(key, item)) for key, item in value.items()]
+            else:
+                content[property_id] = PreDecodedValue(value)
+        if isinstance(obj, HanaExtensible):
+            content[EXTENSION_TAG] = [
+                {
+                    TYPE_TAG: extension.get_serialized_type_id(),
+                    VALUE_TAG: _HanaSerializablePickler.get_content(extension),
+                }
+                for extension in obj.get_extensions() if isinstance(extension, HanaLateDeserializable)
+            ]
+        return content
+
+
+class _HanaSerializableUnpickler(pickle.Unpickler):
+    def __init__(self, file, deserializer: PreDecodedValueDeserializer):
+        super().__init__(file)
+        self.deserializer = deserializer
+        self.objs: Dict[int, Any] = {}
+
+    def persistent_load(self, pid):
+        if pid[0] == "ref":
+            return self.objs[pid[1]]
+        _, index, type_id, content = pid
+        obj = self.deserializer.type_id_to_deserializer_map[type_id].deserialize(content, self.deserializer)
+        self.objs[index] = obj
+        return obj
+
+
+_worker_deserializer_factory: Optional[BinaryDeserializer.Factory] = None
+
+
+def _initialize_worker(deserializer_factory_provider: Callable[[], BinaryDeserializer.Factory]):
+    global _worker_deserializer_factory
+    _worker_deserializer_factory = deserializer_factory_provider()
+
+
+def _deserialize_ranges(file_name: str, ranges: List[Tuple[int, int]]) -> Optional[bytes]:
+    """
+    Deserialize the values in the given byte ranges of the file. Return the pickled values and the objects with
+    references, or None if a value refers to an object outside the ranges or the values cannot be sent back. Other
+    errors are real decoding errors and are raised.
+    """
+    deserializer = _WorkerBinaryDeserializer(file_name, _worker_deserializer_factory.type_id_to_deserializer_map)
+    try:
+        with open(file_name, "rb") as fin:
+            with mmap.mmap(fin.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                values = [
+                    deserializer.deserialize(msgpack.unpackb(buffer[start:end], strict_map_key=False))
+                    for start, end in ranges
+                ]
+        refs = [(uuid.bytes, obj) for uuid, obj in deserializer.uuid_to_obj.items()]
+        refs.extend((ref, obj) for ref, obj in enumerate(deserializer.ref_to_obj) if obj is not None)
+        out = BytesIO()
+        _HanaSerializablePickler(out).dump((values, refs))
+        return out.getvalue()
+    except DependentSubtreesError:
+        return None
+    except (pickle.PicklingError, TypeError, AttributeError):
+        # pickle raises these for values it cannot pickle, such as open files and instances of local classes.
+        return None
+
+
+def _is_array_header(first_byte: int) -> bool:
+    return 0x90 <= first_byte <= 0x9f or first_byte == 0xdc or first_byte == 0xdd
+
+
+def _is_map_header(first_byte: int) -> bool:
+    return 0x80 <= first_byte <= 0x8f or first_byte == 0xde or first_byte == 0xdf
+
+
+def _is_tagged_map(buffer: mmap.mmap, position: int) -> bool:
+    """
+    Return whether the value at the position is a map whose first key is TYPE_TAG, which BinarySerializer always
+    writes first.
+    """
+    first_byte = buffer[position]
+    if not _is_map_header(first_byte):
+        return False
+    if first_byte == 0xde:
+        key_position = position + 3
+    elif first_byte == 0xdf:
+        key_position = position + 5
+    else:
+        key_position = position + 1
+    # TYPE_TAG is packed as a negative fixint.
+    return key_position < len(buffer) and buffer[key_position] == TYPE_TAG & 0xff
+
+
+class ParallelBinaryDeserializer(PreDecodedValueDeserializer):
+    """
+    Deserializes a binary file whose root is a HanaObject by decoding the values of its properties, and the items of
+    its List and Dict properties, in a ProcessPoolExecutor.
+
+    The worker processes create their own BinaryDeserializer.Factory by calling deserializer_factory_provider, which
+    must therefore be picklable, e.g., a module-level function that creates an injector. DependentSubtreesError is
+    raised, which makes FileDeserializer read the file serially, if a value a worker decodes refers to an object
+    decoded by another worker, or if an object cannot be sent back, for example because its
+    get_binary_property_values returns None. Errors in decoding the values themselves are raised as they are. The
+    result is the same as that of BinaryDeserializer regardless of how the values are split among the workers.
+    """
+
+    def __init__(self,
+                 file_name: Optional[str],
+                 type_id_to_deserializer_map: Dict[int, TypeBinaryDeserializer],
+                 deserializer_factory_provider: Callable[[], BinaryDeserializer.Factory],
+                 max_workers: Optional[int] = None):
+        super().__init__(file_name, type_id_to_deserializer_map)
+        self.deserializer_factory_provider = deserializer_factory_provider
+        self.max_workers = max_workers
+
+    def deserialize_file(self, buffer: mmap.mmap, data_offset: int) -> Any:
+        root, subtrees = self.scan(buffer, data_offset)
+        subtree_ranges = [(subtree.start, subtree.end) for subtree in subtrees]
+        if len(subtree_ranges) < 2:
+            raise DependentSubtreesError()
+
+        with ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                initializer=_initialize_worker,
+                initargs=(self.deserializer_factory_provider,)) as executor:
+            num_chunks = min(len(subtree_ranges), executor._max_workers * 4)
+            chunks = [
+                subtree_ranges[len(subtree_ranges) * i // num_chunks:len(subtree_ranges) * (i + 1) // num_chunks]
+                for i in range(num_chunks)
+            ]
+            pickled_results = list(executor.map(_deserialize_ranges, [self.file_name] * num_chunks, chunks))
+
+        values = []
+        for pickled in pickled_results:
+            if pickled is None:
+                raise DependentSubtreesError()
+            chunk_values, refs = _HanaSerializableUnpickler(BytesIO(pickled), self).load()
+            values.extend(chunk_values)
+            for ref_value, obj in refs:
+                self.register(obj, ref_value)
+
+        value_iter = iter(values)
+
+        def resolve(item):
+            if isinstance(item, _Subtree):
+                return PreDecodedValue(next(value_iter))
+            return item
+
+        content = root[VALUE_TAG]
+        for key, value in content.items():
+            if isinstance(value, list):
+                content[key] = [resolve(item) for item in value]
+            else:
+                content[key] = resolve(value)
+        return self.deserialize(root)
+
+    def scan(self, buffer: mmap.mmap, data_offset: int) -> Tuple[Dict[int, Any], List[_Subtree]]:
+        """
+        Find the byte ranges of the values to decode in parallel, which are the maps that are property values or items
+        of property values. Return the root map, in whose content the maps are replaced by their _Subtrees, together
+        with the _Subtrees in the order they appear in the file. Other values, such as untagged primitives and the
+        extensions, are unpacked.
+        """
+        buffer.seek(data_offset)
+        unpacker = msgpack.Unpacker(buffer, max_buffer_size=0, strict_map_key=False)
+
+        def position():
+            return data_offset + unpacker.tell()
+
+        subtrees = []
+
+        def scan_value():
+            # Other maps, such as Dicts written as msgpack maps, are unpacked.
+            if not _is_tagged_map(buffer, position()):
+                return unpacker.unpack()
+            start = position()
+            unpacker.skip()
+            subtree = _Subtree(start, position())
+            subtrees.append(subtree)
+            return subtree
+
+        if not _is_map_header(buffer[position()]):
+            raise DependentSubtreesError()
+        root = {}
+        for _ in range(unpacker.read_map_header()):
+            key = unpacker.unpack()
+            if key != VALUE_TAG:
+                root[key] = unpacker.unpack()
+                continue
+            if not _is_map_header(buffer[position()]):
+                raise DependentSubtreesError()
+            content = {}
+            for _ in range(unpacker.read_map_header()):
+                property_id = unpacker.unpack()
+                if property_id == EXTENSION_TAG:
+                    content[property_id] = unpacker.unpack()
+                elif _is_array_header(buffer[position()]):
+                    content[property_id] = [scan_value() for _ in range(unpacker.read_array_header())]
+                else:
+                    content[property_id] = scan_value()
+            root[key] = content
+        if TYPE_TAG not in root or VALUE_TAG not in root:
+            raise DependentSubtreesError()
+        return root, subtrees
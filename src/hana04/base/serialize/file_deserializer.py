@@ -1,24 +1,132 @@
-import json
-from typing import Any
+import io
+import mmap
+from typing import Any, Callable, Optional, Tuple, Union
 
+from msgpack import Unpacker
+
+from hana04.base.serialize.binary.binary_deserializer import BinaryDeserializer
+from hana04.base.serialize.binary.constants import BINARY_FILE_MAGIC, BINARY_FORMAT_VERSION, \
+    BINARY_FORMAT_VERSION_UUID_REFS
+from hana04.base.serialize.binary.indexed_archive import IndexedArchive
+from hana04.base.serialize.binary.parallel_binary_deserializer import ParallelBinaryDeserializer, \
+    DependentSubtreesError
+from hana04.base.serialize.profiling import SerializationProfile
 from hana04.base.serialize.readable.readable_deserializer import ReadableDeserializer
+from hana04.base.serialize.readable.readable_stream_reader import ReadableStreamReader
+from hana04.base.util.compression import open_decompressed, read_compression
+from hana04.base.util.message_unpacker import MessageUnpacker
 from jyuusu.binder import Binder, Module as JyuusuModule
 from jyuusu.constructor_resolver import injectable_class, memoized
 
+# The magic number followed by the format version, which msgpack packs in at most 9 bytes.
+BINARY_HEADER_MAX_SIZE = len(BINARY_FILE_MAGIC) + 9
+
 
 @memoized
 @injectable_class
 class FileDeserializer:
-    def __init__(self, readable_deserializer_factory: ReadableDeserializer.Factory):
+    def __init__(self,
+                 readable_deserializer_factory: ReadableDeserializer.Factory,
+                 binary_deserializer_factory: BinaryDeserializer.Factory):
         self.readable_deserializer_factory = readable_deserializer_factory
+        self.binary_deserializer_factory = binary_deserializer_factory
+
+    def readable_deserialize(self, file_name: str, profile: Optional[SerializationProfile] = None) -> Any:
+        """
+        Read a file written by FileSerializer.readable_serialize. The file is parsed a chunk at a time, and the children
+        of the root object are deserialized as soon as they are parsed. See ReadableStreamReader. If profile is not
+        None, the time spent on each type is recorded in it.
+        """
+        deserializer = self.readable_deserializer_factory.create(file_name, profile)
+        with open(file_name, "rb") as fin:
+            decompressed = open_decompressed(fin)
+            with io.TextIOWrapper(fin if decompressed is None else decompressed, encoding="utf-8") as text:
+                return ReadableStreamReader(text).read(deserializer)
+
+    def binary_deserialize(self, file_name: str, profile: Optional[SerializationProfile] = None) -> Any:
+        """
+        Read a file written by FileSerializer.binary_serialize. Files without the format header are read as a
+        single msgpack value, which is what writing a BinarySerializer's output to a file by hand produces.
+        Compressed files are decompressed as they are read, so ndarrays in them do not share the file's memory.
+        See readable_deserialize for profile.
+        """
+        with open(file_name, "rb") as fin:
+            decompressed = open_decompressed(fin)
+            if decompressed is not None:
+                header = decompressed.peek(BINARY_HEADER_MAX_SIZE)
+                data_offset, _ = FileDeserializer.read_binary_header(header, file_name)
+                decompressed.read(data_offset)
+                deserializer = self.binary_deserializer_factory.create(file_name, profile)
+                return deserializer.stream_deserialize(MessageUnpacker(decompressed))
+            buffer = mmap.mmap(fin.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            buffer.seek(FileDeserializer.read_binary_header(buffer, file_name)[0])
+            deserializer = self.binary_deserializer_factory.create(file_name, profile)
+            return deserializer.stream_deserialize(MessageUnpacker(buffer))
+        finally:
+            FileDeserializer.close_buffer(buffer)
+
+    @staticmethod
+    def close_buffer(buffer: mmap.mmap):
+        """
+        Close the mmap unless deserialized values, such as numpy arrays, still share its memory. In that case the
+        mmap is closed when the last of them is garbage collected.
+        """
+        try:
+            buffer.close()
+        except BufferError:
+            pass
+
+    def parallel_binary_deserialize(self,
+                                    file_name: str,
+                                    deserializer_factory_provider: Callable[[], BinaryDeserializer.Factory],
+                                    max_workers: Optional[int] = None) -> Any:
+        """
+        Read a file written by FileSerializer.binary_serialize, decoding the top-level children of the root object in
+        a process pool. See ParallelBinaryDeserializer for the requirements on deserializer_factory_provider. The file
+        is read with binary_deserialize instead if the children cannot be decoded independently or if the file is
+        compressed.
+        """
+        with open(file_name, "rb") as fin:
+            if read_compression(fin) is not None:
+                return self.binary_deserialize(file_name)
+            with mmap.mmap(fin.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                data_offset, _ = FileDeserializer.read_binary_header(buffer, file_name)
+                deserializer = ParallelBinaryDeserializer(
+                    file_name,
+                    self.binary_deserializer_factory.type_id_to_deserializer_map,
+                    deserializer_factory_provider,
+                    max_workers)
+                try:
+                    return deserializer.deserialize_file(buffer, data_offset)
+                except DependentSubtreesError:
+                    pass
+        return self.binary_deserialize(file_name)
+
+    @staticmethod
+    def read_binary_header(buffer: Union[mmap.mmap, bytes], file_name: str) -> Tuple[int, int]:
+        """
+        Return the offset of the serialized value and the format version of a binary file. buffer may also hold just
+        the first BINARY_HEADER_MAX_SIZE bytes of the file.
+        """
+        magic_size = len(BINARY_FILE_MAGIC)
+        if buffer[:magic_size] != BINARY_FILE_MAGIC:
+            return 0, BINARY_FORMAT_VERSION_UUID_REFS
+        unpacker = Unpacker()
+        unpacker.feed(buffer[magic_size:BINARY_HEADER_MAX_SIZE])
+        version = unpacker.unpack()
+        if not isinstance(version, int) or version < 1 or version > BINARY_FORMAT_VERSION:
+            raise ValueError("Unsupported binary format version %s in %s" % (version, file_name))
+        return magic_size + unpacker.tell(), version
 
-    def readable_deserialize(self, file_name: str) -> Any:
-        fin = open(file_name, "rt", encoding="utf-8")
-        content = json.load(fin)
-        deserializer = self.readable_deserializer_factory.create(file_name)
-        return deserializer.deserialize(content)
+    def open_indexed_archive(self, file_name: str) -> IndexedArchive:
+        """
+        Open a file written by FileSerializer.indexed_archive_serialize. The caller should close the archive.
+        """
+        return IndexedArchive(file_name, self.binary_deserializer_factory.type_id_to_deserializer_map)
 
     class Module(JyuusuModule):
         def configure(self, binder: Binder):
             binder.install_module(ReadableDeserializer.Module)
+            binder.install_module(BinaryDeserializer.Module)
             binder.install_class(FileDeserializer)
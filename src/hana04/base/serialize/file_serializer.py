@@ -1,8 +1,16 @@
-import json
 import os
-from typing import Any
+from typing import Any, Optional
 
+from hana04.base.serialize.binary.binary_serializer import BinarySerializer
+from hana04.base.serialize.binary.constants import BINARY_FILE_MAGIC, BINARY_FORMAT_VERSION
+from hana04.base.serialize.binary.incremental_archive import IncrementalArchiveSerializer
+from hana04.base.serialize.binary.indexed_archive import IndexedArchiveSerializer
+from hana04.base.serialize.profiling import SerializationProfile
+from hana04.base.serialize.readable.constants import READABLE_LAYOUT_CHILDREN, READABLE_IDS_UUID
 from hana04.base.serialize.readable.readable_serializer import ReadableSerializer
+from hana04.base.serialize.readable.readable_stream_writer import ReadableStreamWriter
+from hana04.base.util.compression import CompressedWriter
+from hana04.base.util.message_packer import BufferedMessagePacker
 from jyuusu.binder import Binder, Module as JyuusuModule
 from jyuusu.constructor_resolver import injectable_class, memoized
 
@@ -10,16 +18,101 @@ from jyuusu.constructor_resolver import injectable_class, memoized
 @memoized
 @injectable_class
 class FileSerializer:
-    def __init__(self, readable_serializer_factory: ReadableSerializer.Factory):
+    def __init__(self,
+                 readable_serializer_factory: ReadableSerializer.Factory,
+                 binary_serializer_factory: BinarySerializer.Factory):
         self.readable_serializer_factory = readable_serializer_factory
+        self.binary_serializer_factory = binary_serializer_factory
 
-    def readable_serialize(self, obj: Any, file_name: str):
-        content = self.readable_serializer_factory.create(file_name).serialize(obj)
-        os.makedirs(os.path.dirname(file_name), exist_ok=True)
-        with open(file_name, "wt", encoding='utf-8') as fout:
-            fout.write(json.dumps(content, indent=2, ensure_ascii=False))
+    def readable_serialize(self,
+                           obj: Any,
+                           file_name: str,
+                           compression: Optional[str] = None,
+                           compression_level: Optional[int] = None,
+                           profile: Optional[SerializationProfile] = None,
+                           indent: Optional[int] = 2,
+                           layout: str = READABLE_LAYOUT_CHILDREN,
+                           id_strategy: str = READABLE_IDS_UUID):
+        """
+        Write obj as JSON indented by indent spaces, or without whitespace if indent is None. The JSON is written while
+        it is being produced. See ReadableStreamWriter. layout is READABLE_LAYOUT_CHILDREN or READABLE_LAYOUT_PROPS.
+        The latter groups the children of HanaSerializables by property, which makes files with long lists smaller and
+        faster to read. id_strategy is READABLE_IDS_UUID, READABLE_IDS_SEQUENTIAL or READABLE_IDS_CONTENT. The last two
+        give shorter ids, and READABLE_IDS_CONTENT writes the same file for the same object graph every time. If
+        compression is one of the names in hana04.base.util.compression, such as COMPRESSION_ZLIB, the JSON is
+        compressed in a background thread.
+        FileDeserializer detects the codec. If profile is not None, the time spent on each type is recorded in it.
+        """
+        # Serializers of large values, such as numpy arrays, may write files next to the JSON file.
+        FileSerializer.make_parent_dirs(file_name)
+        serializer = self.readable_serializer_factory.create(file_name, profile, layout, id_strategy)
+        if compression is None:
+            with open(file_name, "wt", encoding='utf-8') as fout:
+                ReadableStreamWriter(serializer, fout.write, indent).write_value(obj)
+            return
+        with open(file_name, "wb") as fout:
+            with CompressedWriter(fout, compression, compression_level) as out:
+                ReadableStreamWriter(serializer, lambda text: out.write(text.encode("utf-8")), indent).write_value(obj)
+
+    def binary_serialize(self,
+                         obj: Any,
+                         file_name: str,
+                         compression: Optional[str] = None,
+                         compression_level: Optional[int] = None,
+                         dedupe_values: bool = False,
+                         profile: Optional[SerializationProfile] = None):
+        """
+        Write obj in the current binary format. See readable_serialize for compression and profile, and
+        BinarySerializer for dedupe_values.
+        """
+        FileSerializer.make_parent_dirs(file_name)
+        with open(file_name, "wb") as fout:
+            if compression is None:
+                self.write_binary(obj, fout, file_name, dedupe_values, profile)
+                return
+            with CompressedWriter(fout, compression, compression_level) as out:
+                self.write_binary(obj, out, file_name, dedupe_values, profile)
+
+    def write_binary(self,
+                     obj: Any,
+                     out: Any,
+                     file_name: str,
+                     dedupe_values: bool,
+                     profile: Optional[SerializationProfile] = None):
+        packer = BufferedMessagePacker(out)
+        out.write(BINARY_FILE_MAGIC)
+        packer.pack_int(BINARY_FORMAT_VERSION)
+        serializer = self.binary_serializer_factory.create(
+            packer, file_name, BINARY_FORMAT_VERSION, dedupe_values, profile)
+        serializer.serialize(obj)
+        packer.flush()
+
+    def indexed_archive_serialize(self, obj: Any, file_name: str):
+        FileSerializer.make_parent_dirs(file_name)
+        factory = self.binary_serializer_factory
+        with open(file_name, "wb") as fout:
+            serializer = IndexedArchiveSerializer(
+                fout, file_name, factory.type_id_to_serializer, factory.type_to_serializer, factory.dispatch_cache)
+            serializer.write_archive(obj)
+
+    def create_incremental_archive_serializer(self, file_name: str) -> IncrementalArchiveSerializer:
+        """
+        Return an IncrementalArchiveSerializer whose save method writes successive versions of an object graph to
+        the indexed archive file_name. FileDeserializer.open_indexed_archive reads the last saved version.
+        """
+        FileSerializer.make_parent_dirs(file_name)
+        factory = self.binary_serializer_factory
+        return IncrementalArchiveSerializer(
+            file_name, factory.type_id_to_serializer, factory.type_to_serializer, factory.dispatch_cache)
+
+    @staticmethod
+    def make_parent_dirs(file_name: str):
+        dir_name = os.path.dirname(file_name)
+        if len(dir_name) > 0:
+            os.makedirs(dir_name, exist_ok=True)
 
     class Module(JyuusuModule):
         def configure(self, binder: Binder):
             binder.install_module(ReadableSerializer.Module)
-            binder.install_class(FileSerializer)
\ No newline at end of file
+            binder.install_module(BinarySerializer.Module)
+            binder.install_class(FileSerializer)
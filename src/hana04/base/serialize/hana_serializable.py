@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Generator, Tuple
 
 from hana04.base.serialize.binary.binary_serializer import BinarySerializer
 from hana04.base.serialize.readable.readable_serializer import ReadableSerializer
@@ -22,3 +22,53 @@ class HanaSerializable(ABC):
     @abstractmethod
     def binary_serialize_content(self, packer: MessagePacker, binary_serializer: BinarySerializer):
         pass
+
+    def get_readable_child_values(self) -> Optional[List[Tuple[str, Any]]]:
+        """
+        Return the (func, value) pairs whose JSON, in order, make up get_readable_children_list, or None if the list
+        must be created with get_readable_children_list. ReadableSerializer then serializes the values without
+        recursion.
+        """
+        return None
+
+    def get_readable_prop_values(self) -> Optional[List[Tuple[str, List[Any], bool]]]:
+        """
+        Return the (name, values, is_list) triples of the properties that have readable children, for the
+        READABLE_LAYOUT_PROPS layout, or None if the object must be written in the READABLE_LAYOUT_CHILDREN layout.
+        values are the property's children in order. If is_list is True, they are written as a JSON array even if
+        there is only one of them.
+        """
+        return None
+
+    def iter_binary_serialize_content(self,
+                                      packer: MessagePacker,
+                                      binary_serializer: BinarySerializer) -> Optional[Generator]:
+        """
+        Return a generator that does what binary_serialize_content does but yields the values it would pass to
+        binary_serializer.serialize, or None if the content must be written with binary_serialize_content.
+        """
+        return None
+
+    def iter_readable_serialize_content(self, readable_serializer: ReadableSerializer) -> Optional[Generator]:
+        """
+        Return a generator that returns the JSON of the object without its id, in the layout of readable_serializer,
+        and yields the values it would pass to readable_serializer.serialize, or None if the JSON must be created
+        from get_readable_child_values or get_readable_prop_values.
+        """
+        return None
+
+    def get_variable_versions(self) -> Optional[Tuple[int, ...]]:
+        """
+        Return the versions of the Variables among the values that binary_serialize_content writes, or None if the
+        content may change in other ways. IncrementalArchiveSerializer writes the object again only if they change.
+        """
+        return None
+
+    def get_binary_property_values(self) -> Optional[Dict[int, Any]]:
+        """
+        Return the values that binary_serialize_content writes, keyed by property ID, with Variables replaced by their
+        values and absent optional values left out, or None if the object cannot describe its content this way.
+        ParallelBinaryDeserializer uses it to send objects between processes, and reads files with objects that
+        return None serially.
+        """
+        return None
@@ -1,8 +1,11 @@
-from typing import Dict, Any, TypeVar
+from abc import ABC
+from typing import Dict, Any, TypeVar, Optional, Generator, List, Tuple
 
 from hana04.base.extension.hana_extensible import HanaExtensible
 from hana04.base.serialize.binary.binary_serializer import TypeBinarySerializer, BinarySerializer
 from hana04.base.serialize.hana_serializable import HanaSerializable
+from hana04.base.serialize.readable.constants import READABLE_LAYOUT_PROPS
+from hana04.base.serialize.readable.readable_deserializer import TypeReadableDeserializer
 from hana04.base.serialize.readable.readable_serializer import TypeReadableSerializer, ReadableSerializer
 from hana04.base.util.message_packer import MessagePacker
 
@@ -11,6 +14,10 @@ T = TypeVar('T', bound=HanaSerializable, contravariant=True)
 
 class HanaSerializableReadableSerializer(TypeReadableSerializer[T]):
     def serialize(self, obj: T, serializer: ReadableSerializer) -> Dict[str, Any]:
+        if serializer.layout == READABLE_LAYOUT_PROPS:
+            prop_values = obj.get_readable_prop_values()
+            if prop_values is not None:
+                return serializer.run(self.iter_serialize_prop_values(obj, prop_values, serializer))
         result = {
             "type": obj.get_serialized_type_name(),
             "children": obj.get_readable_children_list(serializer),
@@ -19,6 +26,66 @@ class HanaSerializableReadableSerializer(TypeReadableSerializer[T]):
             result["extensions"] = serializer.serialize_extensions(obj)
         return result
 
+    def iter_serialize(self, obj: T, serializer: ReadableSerializer) -> Optional[Generator]:
+        iterator = obj.iter_readable_serialize_content(serializer)
+        if iterator is not None:
+            return iterator
+        if serializer.layout == READABLE_LAYOUT_PROPS:
+            prop_values = obj.get_readable_prop_values()
+            if prop_values is not None:
+                return self.iter_serialize_prop_values(obj, prop_values, serializer)
+        child_values = obj.get_readable_child_values()
+        if child_values is None:
+            return None
+        return self.iter_serialize_child_values(obj, child_values, serializer)
+
+    def iter_serialize_child_values(self,
+                                    obj: T,
+                                    child_values: List[Tuple[str, Any]],
+                                    serializer: ReadableSerializer) -> Generator:
+        children = []
+        for func, value in child_values:
+            children.append(serializer.add_func((yield value), func))
+        result = {
+            "type": obj.get_serialized_type_name(),
+            "children": children,
+        }
+        if isinstance(obj, HanaExtensible):
+            result["extensions"] = yield serializer.iter_serialize_extensions(obj)
+        return result
+
+    def iter_serialize_prop_values(self,
+                                   obj: T,
+                                   prop_values: List[Tuple[str, List[Any], bool]],
+                                   serializer: ReadableSerializer) -> Generator:
+        props = {}
+        for name, values, is_list in prop_values:
+            if is_list:
+                items = []
+                for value in values:
+                    items.append((yield value))
+                props[name] = items
+            else:
+                assert len(values) == 1
+                props[name] = yield values[0]
+        result = {
+            "type": obj.get_serialized_type_name(),
+            "props": props,
+        }
+        if isinstance(obj, HanaExtensible):
+            result["extensions"] = yield serializer.iter_serialize_extensions(obj)
+        return result
+
+
+class HanaSerializableReadableDeserializer(TypeReadableDeserializer[T], ABC):
+    """
+    Deserializes the JSON written by HanaSerializableReadableSerializer in either layout. Its deserialize and
+    iter_deserialize read json["children"], or the items of json["props"], in a single pass and read the other fields,
+    except "type", only after that. ReadableStreamReader relies on this to pass the children while it is parsing
+    them.
+    """
+    pass
+
 
 class HanaSerializableBinarySerializer(TypeBinarySerializer[T]):
     def __init__(self, type_id: int):
@@ -27,5 +94,8 @@ class HanaSerializableBinarySerializer(TypeBinarySerializer[T]):
     def serialize(self, obj: T, packer: MessagePacker, serializer: BinarySerializer):
         obj.binary_serialize_content(packer, serializer)
 
+    def iter_serialize(self, obj: T, packer: MessagePacker, serializer: BinarySerializer) -> Optional[Generator]:
+        return obj.iter_binary_serialize_content(packer, serializer)
+
     def get_type_id(self) -> int:
         return self.type_id
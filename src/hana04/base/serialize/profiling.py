@@ -0,0 +1,360 @@
+import time
+from typing import Any, Callable, Dict, Generator, List, Optional, Tuple, Union
+
+from hana04.base.serialize.binary.binary_deserializer import TypeBinaryDeserializer
+from hana04.base.serialize.binary.binary_serializer import TypeBinarySerializer
+from hana04.base.serialize.readable.readable_deserializer import TypeReadableDeserializer
+from hana04.base.serialize.readable.readable_serializer import TypeReadableSerializer
+from hana04.base.util.message_packer import MessagePacker
+from hana04.base.util.message_unpacker import MessageUnpacker
+
+BINARY_SERIALIZE = "binary_serialize"
+BINARY_DESERIALIZE = "binary_deserialize"
+READABLE_SERIALIZE = "readable_serialize"
+READABLE_DESERIALIZE = "readable_deserialize"
+
+
+class TypeProfile:
+    """
+    What one operation, such as BINARY_SERIALIZE, spent on the values of one type. type_key is the type ID in the
+    binary operations and the type name in the readable ones.
+    """
+
+    def __init__(self, operation: str, type_key: Union[int, str]):
+        self.operation = operation
+        self.type_key = type_key
+        # The name of the class of the first value, or its serialized type name if it is a HanaSerializable.
+        self.name: Optional[str] = None
+        self.num_calls = 0
+        self.seconds = 0.0
+        # The bytes packed or read by the type's serializer or deserializer. Only binary serialization and
+        # deserialization from a MessageUnpacker count bytes.
+        self.num_bytes = 0
+
+    def set_name(self, value: Any):
+        from hana04.base.serialize.hana_serializable import HanaSerializable
+
+        if isinstance(value, HanaSerializable):
+            self.name = value.get_serialized_type_name()
+        else:
+            self.name = value.__class__.__name__
+
+
+class SerializationProfile:
+    """
+    Collects a TypeProfile for every type that a serializer or deserializer created with the profile handles. The
+    factories of BinarySerializer, BinaryDeserializer, ReadableSerializer and ReadableDeserializer take an optional
+    profile. With a profile, they wrap the type serializers or deserializers in ones that record the calls, so a
+    serializer created without a profile runs exactly as before.
+
+    The time of a type is the time spent in its serializer or deserializer, including the steps of the generators that
+    they return. Children that the generators yield are run by the WorkStack as separate steps, so their time counts
+    toward their own types only. Children that a serializer serializes by calling the serializer recursively count
+    toward both.
+    """
+
+    def __init__(self):
+        self.type_profiles: Dict[Tuple[str, Union[int, str]], TypeProfile] = {}
+
+    def get_type_profile(self, operation: str, type_key: Union[int, str]) -> TypeProfile:
+        key = (operation, type_key)
+        type_profile = self.type_profiles.get(key)
+        if type_profile is None:
+            type_profile = TypeProfile(operation, type_key)
+            self.type_profiles[key] = type_profile
+        return type_profile
+
+    def wrap_binary_serializers(self, serializers: Dict[Any, TypeBinarySerializer]) -> Dict[Any, TypeBinarySerializer]:
+        return {
+            key: ProfiledTypeBinarySerializer(
+                serializer, self.get_type_profile(BINARY_SERIALIZE, serializer.get_type_id()))
+            for key, serializer in serializers.items()
+        }
+
+    def wrap_binary_deserializers(
+            self, deserializers: Dict[int, TypeBinaryDeserializer]) -> Dict[int, TypeBinaryDeserializer]:
+        return {
+            type_id: ProfiledTypeBinaryDeserializer(deserializer, self.get_type_profile(BINARY_DESERIALIZE, type_id))
+            for type_id, deserializer in deserializers.items()
+        }
+
+    def wrap_readable_serializers(self,
+                                  serializers: Dict[Any, TypeReadableSerializer]) -> Dict[Any, TypeReadableSerializer]:
+        return {
+            key: ProfiledTypeReadableSerializer(serializer, self, key if isinstance(key, str) else None)
+            for key, serializer in serializers.items()
+        }
+
+    def wrap_readable_deserializers(
+            self, deserializers: Dict[str, TypeReadableDeserializer]) -> Dict[str, TypeReadableDeserializer]:
+        return {
+            type_name: ProfiledTypeReadableDeserializer(
+                deserializer, self.get_type_profile(READABLE_DESERIALIZE, type_name))
+            for type_name, deserializer in deserializers.items()
+        }
+
+    def get_type_profiles(self, operation: Optional[str] = None) -> List[TypeProfile]:
+        """
+        Return the type profiles of the operation, or of all operations if it is None, with the slowest first.
+        """
+        return sorted(
+            [
+                type_profile for type_profile in self.type_profiles.values()
+                if type_profile.num_calls > 0 and (operation is None or type_profile.operation == operation)
+            ],
+            key=lambda type_profile: -type_profile.seconds)
+
+    def report(self, operation: Optional[str] = None, limit: Optional[int] = None) -> str:
+        """
+        Return a table of the type profiles with the slowest types first, at most limit of them per operation.
+        """
+        lines = []
+        operations = sorted(set(key[0] for key in self.type_profiles.keys())) if operation is None else [operation]
+        for operation_ in operations:
+            type_profiles = self.get_type_profiles(operation_)
+            if len(type_profiles) == 0:
+                continue
+            total_seconds = sum(type_profile.seconds for type_profile in type_profiles)
+            total_bytes = sum(type_profile.num_bytes for type_profile in type_profiles)
+            if len(lines) > 0:
+                lines.append("")
+            lines.append(operation_)
+            lines.append("%-32s %-24s %10s %12s %7s %12s %7s" % (
+                "type", "name", "calls", "seconds", "time%", "bytes", "bytes%"))
+            for type_profile in type_profiles[:limit]:
+                lines.append("%-32s %-24s %10d %12.6f %6.1f%% %12d %6.1f%%" % (
+                    type_profile.type_key,
+                    type_profile.name,
+                    type_profile.num_calls,
+                    type_profile.seconds,
+                    100.0 * type_profile.seconds / total_seconds if total_seconds > 0 else 0.0,
+                    type_profile.num_bytes,
+                    100.0 * type_profile.num_bytes / total_bytes if total_bytes > 0 else 0.0))
+        return "\n".join(lines)
+
+
+def iter_profile(type_profile: TypeProfile,
+                 iterator: Generator,
+                 get_position: Optional[Callable[[], Tuple[Any, int]]] = None) -> Generator:
+    """
+    Run iterator as a WorkStack would, adding the time of each of its steps to type_profile. get_position returns the
+    stream that the step writes to or reads from and the position in it, so that the bytes of the step can be
+    counted.
+    """
+    value = None
+    error = None
+    while True:
+        if get_position is not None:
+            stream, start_position = get_position()
+        start = time.perf_counter()
+        try:
+            if error is None:
+                item = iterator.send(value)
+            else:
+                item = iterator.throw(error)
+                error = None
+        except StopIteration as e:
+            type_profile.seconds += time.perf_counter() - start
+            if get_position is not None:
+                count_bytes(type_profile, stream, start_position, get_position())
+            return e.value
+        except BaseException:
+            type_profile.seconds += time.perf_counter() - start
+            raise
+        type_profile.seconds += time.perf_counter() - start
+        if get_position is not None:
+            count_bytes(type_profile, stream, start_position, get_position())
+        try:
+            value = yield item
+        except Exception as e:
+            value = None
+            error = e
+
+
+def count_bytes(type_profile: TypeProfile, stream: Any, start_position: int, end: Tuple[Any, int]):
+    # The stream can change between the steps of a generator, e.g. when an indexed archive starts a new record.
+    if end[0] is stream:
+        type_profile.num_bytes += end[1] - start_position
+
+
+class ProfiledTypeBinarySerializer(TypeBinarySerializer):
+    def __init__(self, inner: TypeBinarySerializer, type_profile: TypeProfile):
+        self.inner = inner
+        self.type_profile = type_profile
+
+    def serialize(self, obj: Any, packer: MessagePacker, serializer: 'BinarySerializer'):
+        type_profile = self.type_profile
+        if type_profile.name is None:
+            type_profile.set_name(obj)
+        start_position = packer.position()
+        start = time.perf_counter()
+        self.inner.serialize(obj, packer, serializer)
+        type_profile.seconds += time.perf_counter() - start
+        type_profile.num_calls += 1
+        type_profile.num_bytes += packer.position() - start_position
+
+    def get_type_id(self) -> int:
+        return self.inner.get_type_id()
+
+    def iter_serialize(self, obj: Any, packer: MessagePacker, serializer: 'BinarySerializer') -> Optional[Generator]:
+        type_profile = self.type_profile
+        start = time.perf_counter()
+        iterator = self.inner.iter_serialize(obj, packer, serializer)
+        type_profile.seconds += time.perf_counter() - start
+        if iterator is None:
+            # serialize is called next and counts the call.
+            return None
+        if type_profile.name is None:
+            type_profile.set_name(obj)
+        type_profile.num_calls += 1
+        return iter_profile(type_profile, iterator, lambda: (serializer.packer, serializer.packer.position()))
+
+
+class ProfiledTypeBinaryDeserializer(TypeBinaryDeserializer):
+    def __init__(self, inner: TypeBinaryDeserializer, type_profile: TypeProfile):
+        self.inner = inner
+        self.type_profile = type_profile
+
+    def deserialize(self, value: Any, binary_deserializer: 'BinaryDeserializer') -> Any:
+        type_profile = self.type_profile
+        start = time.perf_counter()
+        result = self.inner.deserialize(value, binary_deserializer)
+        type_profile.seconds += time.perf_counter() - start
+        type_profile.num_calls += 1
+        if type_profile.name is None:
+            type_profile.set_name(result)
+        return result
+
+    def get_serialized_type(self) -> type:
+        return self.inner.get_serialized_type()
+
+    def stream_deserialize(self, unpacker: MessageUnpacker, binary_deserializer: 'BinaryDeserializer') -> Any:
+        type_profile = self.type_profile
+        start_position = unpacker.tell()
+        start = time.perf_counter()
+        result = self.inner.stream_deserialize(unpacker, binary_deserializer)
+        type_profile.seconds += time.perf_counter() - start
+        type_profile.num_calls += 1
+        type_profile.num_bytes += unpacker.tell() - start_position
+        if type_profile.name is None:
+            type_profile.set_name(result)
+        return result
+
+    def iter_deserialize(self, value: Any, binary_deserializer: 'BinaryDeserializer') -> Optional[Generator]:
+        type_profile = self.type_profile
+        start = time.perf_counter()
+        iterator = self.inner.iter_deserialize(value, binary_deserializer)
+        type_profile.seconds += time.perf_counter() - start
+        if iterator is None:
+            return None
+        type_profile.num_calls += 1
+        return self.iter_set_name(iter_profile(type_profile, iterator))
+
+    def iter_stream_deserialize(self,
+                                unpacker: MessageUnpacker,
+                                binary_deserializer: 'BinaryDeserializer') -> Optional[Generator]:
+        type_profile = self.type_profile
+        start_position = unpacker.tell()
+        start = time.perf_counter()
+        iterator = self.inner.iter_stream_deserialize(unpacker, binary_deserializer)
+        type_profile.seconds += time.perf_counter() - start
+        if iterator is None:
+            return None
+        type_profile.num_calls += 1
+        type_profile.num_bytes += unpacker.tell() - start_position
+        return self.iter_set_name(iter_profile(type_profile, iterator, lambda: (unpacker, unpacker.tell())))
+
+    def iter_set_name(self, iterator: Generator) -> Generator:
+        result = yield iterator
+        if self.type_profile.name is None:
+            self.type_profile.set_name(result)
+        return result
+
+
+class ProfiledTypeReadableSerializer(TypeReadableSerializer):
+    """
+    The type name of a value is only known from its JSON, so the type profile is looked up after the first call.
+    """
+
+    def __init__(self, inner: TypeReadableSerializer, profile: SerializationProfile, type_name: Optional[str]):
+        self.inner = inner
+        self.profile = profile
+        self.type_profile = None if type_name is None else profile.get_type_profile(READABLE_SERIALIZE, type_name)
+
+    def get_type_profile(self, obj: Any, json: Dict[str, Any]) -> TypeProfile:
+        if self.type_profile is None:
+            type_name = json.get("type", obj.__class__.__name__)
+            self.type_profile = self.profile.get_type_profile(READABLE_SERIALIZE, type_name)
+        if self.type_profile.name is None:
+            self.type_profile.set_name(obj)
+        return self.type_profile
+
+    def serialize(self, obj: Any, serializer: 'ReadableSerializer') -> Dict[str, Any]:
+        start = time.perf_counter()
+        json = self.inner.serialize(obj, serializer)
+        seconds = time.perf_counter() - start
+        type_profile = self.get_type_profile(obj, json)
+        type_profile.seconds += seconds
+        type_profile.num_calls += 1
+        return json
+
+    def iter_serialize(self, obj: Any, serializer: 'ReadableSerializer') -> Optional[Generator]:
+        iterator = self.inner.iter_serialize(obj, serializer)
+        if iterator is None:
+            return None
+        return self.iter_serialize_profiled(obj, iterator)
+
+    def iter_serialize_profiled(self, obj: Any, iterator: Generator) -> Generator:
+        # The time is collected before the type profile is known.
+        collected = TypeProfile(READABLE_SERIALIZE, "")
+        json = yield iter_profile(collected, iterator)
+        type_profile = self.get_type_profile(obj, json)
+        type_profile.seconds += collected.seconds
+        type_profile.num_calls += 1
+        return json
+
+    def unwrap(self) -> TypeReadableSerializer:
+        return self.inner.unwrap()
+
+    def record_streamed(self, obj: Any, seconds: float):
+        type_profile = self.get_type_profile(obj, {"type": obj.get_serialized_type_name()})
+        type_profile.seconds += seconds
+        type_profile.num_calls += 1
+
+
+class ProfiledTypeReadableDeserializer(TypeReadableDeserializer):
+    def __init__(self, inner: TypeReadableDeserializer, type_profile: TypeProfile):
+        self.inner = inner
+        self.type_profile = type_profile
+
+    def deserialize(self, json: Dict[str, Any], deserializer: 'ReadableDeserializer') -> Any:
+        type_profile = self.type_profile
+        start = time.perf_counter()
+        result = self.inner.deserialize(json, deserializer)
+        type_profile.seconds += time.perf_counter() - start
+        type_profile.num_calls += 1
+        if type_profile.name is None:
+            type_profile.set_name(result)
+        return result
+
+    def get_serialized_type(self) -> type:
+        return self.inner.get_serialized_type()
+
+    def iter_deserialize(self, json: Dict[str, Any], deserializer: 'ReadableDeserializer') -> Optional[Generator]:
+        type_profile = self.type_profile
+        start = time.perf_counter()
+        iterator = self.inner.iter_deserialize(json, deserializer)
+        type_profile.seconds += time.perf_counter() - start
+        if iterator is None:
+            return None
+        type_profile.num_calls += 1
+        return self.iter_set_name(iter_profile(type_profile, iterator))
+
+    def iter_set_name(self, iterator: Generator) -> Generator:
+        result = yield iterator
+        if self.type_profile.name is None:
+            self.type_profile.set_name(result)
+        return result
+
+    def unwrap(self) -> TypeReadableDeserializer:
+        return self.inner.unwrap()
@@ -1 +1,16 @@
-LOOK_UP_TYPE_NAME = "LookUp"
\ No newline at end of file
+LOOK_UP_TYPE_NAME = "LookUp"
+
+# The children of a HanaSerializable are written as a list of JSON objects, each with a "func" field.
+READABLE_LAYOUT_CHILDREN = "children"
+# The children of a HanaSerializable are written in a JSON object keyed by property name. The children of a list or
+# map property are written as a JSON array.
+READABLE_LAYOUT_PROPS = "props"
+
+# The ids of HanaSerializables are random UUIDs.
+READABLE_IDS_UUID = "uuid"
+# The ids of HanaSerializables are "#0", "#1", ... in the order in which they are assigned. ReadableDeserializer keeps
+# the objects with such ids in a list.
+READABLE_IDS_SEQUENTIAL = "sequential"
+# The ids of HanaSerializables are derived from their content, so that serializing the same object graph again gives
+# the same JSON. See hana04.base.serialize.readable.readable_serializer.readable_content_text.
+READABLE_IDS_CONTENT = "content"
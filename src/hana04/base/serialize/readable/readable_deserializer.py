@@ -1,8 +1,9 @@
 from abc import ABC, abstractmethod
-from typing import Optional, Dict, TypeVar, Generic, Any
+from typing import Optional, Dict, TypeVar, Generic, Any, Generator, List
 
 from hana04.base.extension.hana_extensible import HanaExtensible
 from hana04.base.serialize.readable.constants import LOOK_UP_TYPE_NAME
+from hana04.base.util.work_stack import run_work_stack
 from jyuusu.binder import Binder, Module as JyuusuModule
 from jyuusu.constructor_resolver import injectable_class, memoized
 
@@ -18,6 +19,22 @@ class TypeReadableDeserializer(Generic[T], ABC):
     def get_serialized_type(self) -> type:
         pass
 
+    def iter_deserialize(self, json: Dict[str, Any], deserializer: 'ReadableDeserializer') -> Optional[Generator]:
+        """
+        Return a generator that does what deserialize does but yields the JSON it would pass to
+        deserializer.deserialize and receives the deserialized values, so that ReadableDeserializer deserializes them
+        without recursion, or None if the JSON must be deserialized with deserialize. Deserializers of values that
+        contain other values should override it.
+        """
+        return None
+
+    def unwrap(self) -> 'TypeReadableDeserializer':
+        """
+        Return the deserializer that does the work of this one, which is self unless this one wraps another, e.g. to
+        profile it.
+        """
+        return self
+
 
 @memoized
 @injectable_class
@@ -27,6 +44,11 @@ class TypeNameToReadiableDeserializerMap:
 
 
 class ReadableDeserializer:
+    """
+    Converts JSON back to values. Nested values are deserialized with a WorkStack, so deep object graphs do not hit
+    the recursion limit as long as their TypeReadableDeserializers implement iter_deserialize.
+    """
+
     def __init__(self,
                  file_name: Optional[str],
                  type_name_to_deserializer: Dict[str, TypeReadableDeserializer]):
@@ -34,24 +56,72 @@ class ReadableDeserializer:
         self.file_name = file_name
         self.type_name_to_deserializer = type_name_to_deserializer
         self.uuid_to_obj: Dict[str, HanaSerializable] = {}
+        # Objects with READABLE_IDS_SEQUENTIAL ids, indexed by the numbers in their ids.
+        self.ref_to_obj: List[Any] = []
 
     def deserialize(self, json: Dict[str, Any]) -> Any:
-        from hana04.base.serialize.hana_serializable import HanaSerializable
-
+        return run_work_stack(self.deserialize_value, json)
+
+    def run(self, iterator: Generator) -> Any:
+        """
+        Run a generator returned by an iter_deserialize method to completion and return its return value.
+        """
+        return run_work_stack(self.deserialize_value, iterator)
+
+    def deserialize_value(self, json: Dict[str, Any]) -> Any:
+        """
+        Return the deserialized value of the JSON, or a generator that returns it.
+        """
         assert "type" in json and json["type"] is not None
         type_name = json["type"]
 
         if type_name == LOOK_UP_TYPE_NAME:
             assert "id" in json and isinstance(json["id"], str)
-            return self.uuid_to_obj[json["id"]]
+            return self.lookup(json["id"])
 
         deserializer = self.type_name_to_deserializer[type_name]
-        result = deserializer.deserialize(json, self)
+        iterator = deserializer.iter_deserialize(json, self)
+        if iterator is not None:
+            return self.iter_register(iterator, json)
+        return self.register(deserializer.deserialize(json, self), json)
+
+    @staticmethod
+    def get_sequential_ref(id_: str) -> Optional[int]:
+        """
+        Return the number in a READABLE_IDS_SEQUENTIAL id, or None if id_ is another kind of id.
+        """
+        if id_.startswith("#") and id_[1:].isdigit():
+            return int(id_[1:])
+        return None
+
+    def lookup(self, id_: str) -> Any:
+        ref = ReadableDeserializer.get_sequential_ref(id_)
+        if ref is None:
+            return self.uuid_to_obj[id_]
+        obj = self.ref_to_obj[ref]
+        assert obj is not None
+        return obj
+
+    def register(self, result: Any, json: Dict[str, Any]) -> Any:
+        from hana04.base.serialize.hana_serializable import HanaSerializable
+
         if isinstance(result, HanaSerializable) and "id" in json:
-            assert isinstance(json["id"], str)
-            self.uuid_to_obj[json["id"]] = result
+            id_ = json["id"]
+            assert isinstance(id_, str)
+            ref = ReadableDeserializer.get_sequential_ref(id_)
+            if ref is None:
+                self.uuid_to_obj[id_] = result
+            else:
+                # Ids are usually registered in increasing order, but extensions are not registered at all.
+                if ref >= len(self.ref_to_obj):
+                    self.ref_to_obj.extend([None] * (ref + 1 - len(self.ref_to_obj)))
+                self.ref_to_obj[ref] = result
         return result
 
+    def iter_register(self, iterator: Generator, json: Dict[str, Any]) -> Generator:
+        result = yield iterator
+        return self.register(result, json)
+
     def deserialize_extensions(self, json: Dict[str, Any], hana_extensible: HanaExtensible):
         from hana04.base.serialize.hana_late_deserializable import HanaLateDeserializable
 
@@ -78,8 +148,14 @@ class ReadableDeserializer:
         def __init__(self, type_name_to_readable_deserializer: TypeNameToReadiableDeserializerMap):
             self.type_name_to_readable_deserializer = type_name_to_readable_deserializer.value
 
-        def create(self, file_name: Optional[str] = None):
-            return ReadableDeserializer(file_name, self.type_name_to_readable_deserializer)
+        def create(self, file_name: Optional[str] = None, profile: Optional['SerializationProfile'] = None):
+            """
+            If profile is not None, the type deserializers record what they do in it. See SerializationProfile.
+            """
+            if profile is None:
+                return ReadableDeserializer(file_name, self.type_name_to_readable_deserializer)
+            return ReadableDeserializer(
+                file_name, profile.wrap_readable_deserializers(self.type_name_to_readable_deserializer))
 
     class Module(JyuusuModule):
         def configure(self, binder: Binder):
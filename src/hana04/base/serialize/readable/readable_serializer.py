@@ -1,20 +1,77 @@
+import hashlib
+import json as json_module
 from abc import ABC, abstractmethod
-from typing import Any, Optional, Dict, Generic, TypeVar, List
-from uuid import UUID, uuid4
+from typing import Any, Optional, Dict, Generic, TypeVar, List, Callable, Generator, Union, Set
+from uuid import uuid4
 
 from hana04.base.extension.hana_extensible import HanaExtensible
-from hana04.base.serialize.readable.constants import LOOK_UP_TYPE_NAME
+from hana04.base.serialize.readable.constants import LOOK_UP_TYPE_NAME, READABLE_LAYOUT_CHILDREN, \
+    READABLE_LAYOUT_PROPS, READABLE_IDS_UUID, READABLE_IDS_SEQUENTIAL, READABLE_IDS_CONTENT
+from hana04.base.util.work_stack import run_work_stack
 from jyuusu.binder import Binder, Module as JyuusuModule
 from jyuusu.constructor_resolver import injectable_class, memoized
 
 T = TypeVar('T')
 
+# The number of hexadecimal digits of the SHA-256 digest that make up a READABLE_IDS_CONTENT id.
+CONTENT_ID_LENGTH = 16
+
+
+def readable_content_value(value: Any) -> Any:
+    """
+    Return the JSON value with every JSON object that has an "id" field, which is a HanaSerializable or a lookup of
+    one, replaced by its "id" and "func" fields.
+    """
+    if isinstance(value, dict):
+        if "id" in value:
+            if "func" in value:
+                return {"id": value["id"], "func": value["func"]}
+            return {"id": value["id"]}
+        return {key: readable_content_value(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [readable_content_value(item) for item in value]
+    return value
+
+
+def readable_content_text(json: Dict[str, Any]) -> str:
+    """
+    Return the text whose SHA-256 digest gives the READABLE_IDS_CONTENT id of a HanaSerializable with the given JSON.
+    It is the JSON without whitespace and without the "id" and "func" fields, with the HanaSerializables in it
+    replaced as readable_content_value does. The ids of the HanaSerializables in it are thus derived from their
+    content first.
+    """
+    content = {key: readable_content_value(value) for key, value in json.items() if key != "id" and key != "func"}
+    return json_module.dumps(content, separators=(",", ":"), ensure_ascii=False)
+
 
 class TypeReadableSerializer(Generic[T], ABC):
     @abstractmethod
     def serialize(self, obj: T, serializer: 'ReadableSerializer') -> Dict[str, Any]:
         pass
 
+    def iter_serialize(self, obj: T, serializer: 'ReadableSerializer') -> Optional[Generator]:
+        """
+        Return a generator that does what serialize does but yields the values it would pass to serializer.serialize
+        and receives their JSON without the "func" field, so that ReadableSerializer serializes them without
+        recursion, or None if obj must be serialized with serialize. Serializers of values that contain other values
+        should override it.
+        """
+        return None
+
+    def unwrap(self) -> 'TypeReadableSerializer':
+        """
+        Return the serializer that does the work of this one, which is self unless this one wraps another, e.g. to
+        profile it.
+        """
+        return self
+
+    def record_streamed(self, obj: T, seconds: float):
+        """
+        Called by ReadableStreamWriter when it has written the JSON of obj a piece at a time instead of calling
+        serialize or iter_serialize, with the time it spent on obj, not counting its children.
+        """
+        pass
+
 
 @memoized
 @injectable_class
@@ -30,15 +87,88 @@ class TypeToReadableSerializerMap:
         self.value = value
 
 
+class ReadableSerializerDispatchCache:
+    """
+    Maps the class of a serialized object to a function (readable_serializer, obj) that returns its JSON without the
+    "func" field, or a generator that returns it. It plays the same role as BinarySerializerDispatchCache.
+    """
+
+    def __init__(self,
+                 type_name_to_serializer: Dict[str, TypeReadableSerializer],
+                 type_to_serializer: Dict[type, TypeReadableSerializer]):
+        self.type_name_to_serializer = type_name_to_serializer
+        self.type_to_serializer = type_to_serializer
+        self.encoders: Dict[type, Callable[['ReadableSerializer', Any], Union[Dict[str, Any], Generator]]] = {}
+        for type_ in type_to_serializer.keys():
+            self.encoders[type_] = self.create_non_serializable_encoder(type_to_serializer[type_])
+
+    def get_encoder(self, obj: Any) -> Callable[['ReadableSerializer', Any], Union[Dict[str, Any], Generator]]:
+        from hana04.base.serialize.hana_serializable import HanaSerializable
+
+        encoder = self.encoders.get(obj.__class__)
+        if encoder is None:
+            if isinstance(obj, HanaSerializable):
+                encoder = self.create_serializable_encoder(
+                    self.type_name_to_serializer[obj.get_serialized_type_name()])
+            else:
+                encoder = self.create_non_serializable_encoder(self.type_to_serializer[obj.__class__])
+            self.encoders[obj.__class__] = encoder
+        return encoder
+
+    @staticmethod
+    def create_serializable_encoder(serializer: TypeReadableSerializer):
+        def encode(readable_serializer: ReadableSerializer, obj: Any) -> Union[Dict[str, Any], Generator]:
+            if id(obj) in readable_serializer.obj_id_to_uuid:
+                return readable_serializer.create_lookup(obj)
+            iterator = serializer.iter_serialize(obj, readable_serializer)
+            if iterator is not None:
+                return readable_serializer.iter_assign_id(obj, iterator)
+            return readable_serializer.assign_id(obj, serializer.serialize(obj, readable_serializer))
+
+        return encode
+
+    @staticmethod
+    def create_non_serializable_encoder(serializer: TypeReadableSerializer):
+        def encode(readable_serializer: ReadableSerializer, obj: Any) -> Union[Dict[str, Any], Generator]:
+            iterator = serializer.iter_serialize(obj, readable_serializer)
+            if iterator is not None:
+                return iterator
+            return serializer.serialize(obj, readable_serializer)
+
+        return encode
+
+
 class ReadableSerializer:
+    """
+    Converts values to JSON. Nested values are serialized with a WorkStack, so deep object graphs do not hit the
+    recursion limit as long as their TypeReadableSerializers implement iter_serialize.
+
+    layout is READABLE_LAYOUT_CHILDREN or READABLE_LAYOUT_PROPS, and says how the children of HanaSerializables are
+    written. id_strategy is READABLE_IDS_UUID, READABLE_IDS_SEQUENTIAL or READABLE_IDS_CONTENT, and says how their
+    ids are chosen. ReadableDeserializer reads all of them.
+    """
+
     def __init__(self,
                  file_name: Optional[str],
                  type_name_to_serializer: Dict[str, TypeReadableSerializer],
-                 type_to_serializer: Dict[type, TypeReadableSerializer]):
+                 type_to_serializer: Dict[type, TypeReadableSerializer],
+                 dispatch_cache: Optional[ReadableSerializerDispatchCache] = None,
+                 layout: str = READABLE_LAYOUT_CHILDREN,
+                 id_strategy: str = READABLE_IDS_UUID):
+        assert layout in (READABLE_LAYOUT_CHILDREN, READABLE_LAYOUT_PROPS)
+        assert id_strategy in (READABLE_IDS_UUID, READABLE_IDS_SEQUENTIAL, READABLE_IDS_CONTENT)
+        self.layout = layout
+        self.id_strategy = id_strategy
         self.type_to_serializer = type_to_serializer
         self.type_name_to_serializer = type_name_to_serializer
+        if dispatch_cache is None:
+            dispatch_cache = ReadableSerializerDispatchCache(type_name_to_serializer, type_to_serializer)
+        self.dispatch_cache = dispatch_cache
+        self.encoders = dispatch_cache.encoders
         self.file_name = file_name
-        self.obj_id_to_uuid: Dict[int, UUID] = {}
+        self.obj_id_to_uuid: Dict[int, str] = {}
+        # The READABLE_IDS_CONTENT ids assigned so far. Objects with the same content get suffixes.
+        self.content_ids: Set[str] = set()
 
     def add_func(self, json: Dict[str, Any], func: Optional[str]):
         if func is None:
@@ -48,36 +178,70 @@ class ReadableSerializer:
             return json
 
     def serialize(self, obj: Any, func: Optional[str] = None) -> Dict[str, Any]:
-        from hana04.base.serialize.hana_serializable import HanaSerializable
+        return self.add_func(run_work_stack(self.serialize_value, obj), func)
 
-        if id(obj) in self.obj_id_to_uuid:
-            return self.add_func(
-                {
-                    "type": LOOK_UP_TYPE_NAME,
-                    "id": str(self.obj_id_to_uuid[id(obj)])
-                },
-                func)
+    def run(self, iterator: Generator) -> Any:
+        """
+        Run a generator returned by an iter_serialize method to completion and return its return value.
+        """
+        return run_work_stack(self.serialize_value, iterator)
 
-        if isinstance(obj, HanaSerializable):
-            serializer = self.type_name_to_serializer[obj.get_serialized_type_name()]
+    def serialize_value(self, obj: Any) -> Union[Dict[str, Any], Generator]:
+        """
+        Return the JSON of obj without the "func" field, or a generator that returns it.
+        """
+        encoder = self.encoders.get(obj.__class__)
+        if encoder is None:
+            encoder = self.dispatch_cache.get_encoder(obj)
+        return encoder(self, obj)
+
+    def assign_id(self, obj: Any, json: Dict[str, Any]) -> Dict[str, Any]:
+        content_hash = None
+        if self.id_strategy == READABLE_IDS_CONTENT:
+            content_hash = hashlib.sha256(readable_content_text(json).encode("utf-8"))
+        json["id"] = self.new_id(obj, content_hash)
+        return json
+
+    def new_id(self, obj: Any, content_hash: Optional[Any] = None) -> str:
+        """
+        Assign an id to obj and return it. With READABLE_IDS_CONTENT, content_hash must be a hashlib.sha256 object
+        updated with readable_content_text of the JSON of obj.
+        """
+        if self.id_strategy == READABLE_IDS_SEQUENTIAL:
+            id_ = "#%d" % len(self.obj_id_to_uuid)
+        elif self.id_strategy == READABLE_IDS_CONTENT:
+            digest = content_hash.hexdigest()[:CONTENT_ID_LENGTH]
+            id_ = digest
+            suffix = 1
+            while id_ in self.content_ids:
+                id_ = "%s-%d" % (digest, suffix)
+                suffix += 1
+            self.content_ids.add(id_)
         else:
-            serializer = self.type_to_serializer[obj.__class__]
-        result = serializer.serialize(obj, self)
+            id_ = str(uuid4())
+        self.obj_id_to_uuid[id(obj)] = id_
+        return id_
 
-        if isinstance(obj, HanaSerializable):
-            uuid = uuid4()
-            self.obj_id_to_uuid[id(obj)] = uuid
-            result["id"] = str(uuid)
+    def iter_assign_id(self, obj: Any, iterator: Generator) -> Generator:
+        json = yield iterator
+        return self.assign_id(obj, json)
 
-        return self.add_func(result, func)
+    def create_lookup(self, obj: Any) -> Dict[str, Any]:
+        return {
+            "type": LOOK_UP_TYPE_NAME,
+            "id": self.obj_id_to_uuid[id(obj)]
+        }
 
     def serialize_extensions(self, hana_extensible: HanaExtensible) -> List[Dict[str, Any]]:
+        return self.run(self.iter_serialize_extensions(hana_extensible))
+
+    def iter_serialize_extensions(self, hana_extensible: HanaExtensible) -> Generator:
         from hana04.base.serialize.hana_late_deserializable import HanaLateDeserializable
 
         result = []
         for extension in hana_extensible.get_extensions():
             if isinstance(extension, HanaLateDeserializable):
-                result.append(self.serialize(extension))
+                result.append((yield extension))
         return result
 
     @injectable_class
@@ -87,9 +251,30 @@ class ReadableSerializer:
                      type_to_serializer: TypeToReadableSerializerMap):
             self.type_to_serializer = type_to_serializer.value
             self.type_name_to_serializer = type_name_to_serializer.value
+            self.dispatch_cache = ReadableSerializerDispatchCache(self.type_name_to_serializer, self.type_to_serializer)
 
-        def create(self, file_name: Optional[str] = None):
-            return ReadableSerializer(file_name, self.type_name_to_serializer, self.type_to_serializer)
+        def create(self,
+                   file_name: Optional[str] = None,
+                   profile: Optional['SerializationProfile'] = None,
+                   layout: str = READABLE_LAYOUT_CHILDREN,
+                   id_strategy: str = READABLE_IDS_UUID):
+            """
+            If profile is not None, the type serializers record what they do in it. See SerializationProfile.
+            """
+            if profile is None:
+                return ReadableSerializer(
+                    file_name,
+                    self.type_name_to_serializer,
+                    self.type_to_serializer,
+                    self.dispatch_cache,
+                    layout,
+                    id_strategy)
+            return ReadableSerializer(
+                file_name,
+                profile.wrap_readable_serializers(self.type_name_to_serializer),
+                profile.wrap_readable_serializers(self.type_to_serializer),
+                layout=layout,
+                id_strategy=id_strategy)
 
     class Module(JyuusuModule):
         def configure(self, binder: Binder):
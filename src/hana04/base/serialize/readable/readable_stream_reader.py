@@ -0,0 +1,266 @@
+import json
+import re
+from typing import Any, Dict, Generator, List, Optional, TextIO
+
+from hana04.base.serialize.hana_serializable_serializers import HanaSerializableReadableDeserializer
+from hana04.base.serialize.readable.readable_deserializer import ReadableDeserializer
+
+DEFAULT_READ_SIZE = 1 << 16
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+# The characters that can continue a JSON number.
+_NUMBER_CHARS = frozenset("0123456789.eE+-")
+
+
+class ReadableChildrenStream:
+    """
+    The "children" of the root object of a file read by ReadableStreamReader. The children are parsed while they are
+    iterated over, so it can be iterated over only once. The fields of the root object that come after the children
+    are added to it when the iteration ends.
+    """
+
+    def __init__(self, reader: 'ReadableStreamReader', json: Dict[str, Any]):
+        self.reader = reader
+        self.json = json
+        self.started = False
+        self.finished = False
+
+    def __iter__(self) -> Generator:
+        assert not self.started, "The children of a streamed root object can be iterated over only once."
+        self.started = True
+        reader = self.reader
+        first = True
+        while True:
+            if reader.peek() == "]":
+                reader.position += 1
+                break
+            if not first:
+                reader.expect(",")
+            first = False
+            yield reader.decode_value()
+        reader.read_members(self.json)
+        self.finished = True
+
+    def finish(self):
+        """
+        Skip the children that have not been iterated over, so that the rest of the root object is read.
+        """
+        if self.finished:
+            return
+        if not self.started:
+            for _ in self:
+                pass
+            return
+        raise ValueError("The children of the root object were not iterated over to the end.")
+
+
+class ReadablePropsStream(ReadableChildrenStream):
+    """
+    The "props" of the root object of a file read by ReadableStreamReader. Its items method yields the (name, value)
+    pairs of the properties while they are parsed, so it can be called only once.
+    """
+
+    def items(self) -> Generator:
+        return iter(self)
+
+    def __iter__(self) -> Generator:
+        assert not self.started, "The props of a streamed root object can be iterated over only once."
+        self.started = True
+        reader = self.reader
+        first = True
+        while True:
+            if reader.peek() == "}":
+                reader.position += 1
+                break
+            if not first:
+                reader.expect(",")
+            first = False
+            name = reader.decode_key()
+            yield name, reader.decode_value()
+        reader.read_members(self.json)
+        self.finished = True
+
+
+_STREAMED_MEMBERS = {
+    ("children", "["): ReadableChildrenStream,
+    ("props", "{"): ReadablePropsStream,
+}
+
+
+class ReadableStreamReader:
+    """
+    Reads a JSON file written by FileSerializer.readable_serialize from source a chunk at a time, with
+    json.JSONDecoder.raw_decode over a sliding buffer.
+
+    If the root is an object whose deserializer is a HanaSerializableReadableDeserializer, its children are passed to
+    the deserializer as a ReadableChildrenStream, or a ReadablePropsStream if the file has the READABLE_LAYOUT_PROPS
+    layout. Each child is parsed when the deserializer reaches it and is
+    deserialized before the next one is read, so the JSON of the file is never held in memory whole. Memory is bounded
+    by the JSON of the largest property of the root, which holds a whole list or map. Other roots are parsed whole and
+    passed to ReadableDeserializer.deserialize.
+
+    raw_decode parses nested values recursively in C. Values nested too deeply for it, such as the children of a long
+    chain of HanaSerializables, are parsed again with an explicit stack, so deep object graphs written by
+    ReadableStreamWriter can be read back.
+    """
+
+    def __init__(self, source: TextIO, read_size: int = DEFAULT_READ_SIZE):
+        self.source = source
+        self.read_size = read_size
+        self.decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.position = 0
+        self.eof = False
+
+    def read_more(self, size: int):
+        chunk = self.source.read(size)
+        if len(chunk) == 0:
+            self.eof = True
+            return
+        # Drop what has been consumed, so that the buffer only holds the value being parsed.
+        self.buffer = self.buffer[self.position:] + chunk
+        self.position = 0
+
+    def skip_whitespace(self):
+        while True:
+            self.position = _WHITESPACE.match(self.buffer, self.position).end()
+            if self.position < len(self.buffer) or self.eof:
+                return
+            self.read_more(self.read_size)
+
+    def peek(self) -> str:
+        """
+        Skip whitespace and return the next character without consuming it, or "" at the end of the file.
+        """
+        self.skip_whitespace()
+        return self.buffer[self.position:self.position + 1]
+
+    def expect(self, char: str):
+        if self.peek() != char:
+            raise json.JSONDecodeError("Expecting '%s'" % char, self.buffer, self.position)
+        self.position += 1
+
+    def decode_value(self) -> Any:
+        self.skip_whitespace()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+                # A number may continue in the part that has not been read yet. raw_decode stops a number before a
+                # "." or an "e" with nothing after it, so it is only complete if a character that cannot be part of
+                # it follows.
+                if self.eof or (end < len(self.buffer) and self.buffer[end] not in _NUMBER_CHARS):
+                    self.position = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            except RecursionError:
+                return self.decode_nested_value()
+            # Read at least as much as the buffer holds, so that a large value is parsed a bounded number of times.
+            self.read_more(max(self.read_size, len(self.buffer) - self.position))
+
+    def decode_nested_value(self) -> Any:
+        """
+        Do what decode_value does with an explicit stack of the arrays and objects being parsed, each with the key of
+        its next member if it is an object. Only the values that are not arrays or objects are parsed by
+        decode_value.
+        """
+        stack: List[List[Any]] = []
+        while True:
+            char = self.peek()
+            if char == "[":
+                self.position += 1
+                value = []
+                if self.peek() != "]":
+                    stack.append([value, None])
+                    continue
+                self.position += 1
+            elif char == "{":
+                self.position += 1
+                value = {}
+                if self.peek() != "}":
+                    stack.append([value, self.decode_key()])
+                    continue
+                self.position += 1
+            else:
+                value = self.decode_value()
+            # Add value to the innermost container, and close the containers that end after it.
+            while stack:
+                container, key = stack[-1]
+                if key is None:
+                    container.append(value)
+                else:
+                    container[key] = value
+                char = self.peek()
+                if char == ",":
+                    self.position += 1
+                    if key is not None:
+                        stack[-1][1] = self.decode_key()
+                    break
+                if char != ("]" if key is None else "}"):
+                    raise json.JSONDecodeError("Expecting ',' delimiter", self.buffer, self.position)
+                self.position += 1
+                stack.pop()
+                value = container
+            if not stack:
+                return value
+
+    def decode_key(self) -> str:
+        """
+        Read the name of an object member and the colon after it.
+        """
+        key = self.decode_value()
+        if not isinstance(key, str):
+            raise json.JSONDecodeError("Expecting a property name", self.buffer, self.position)
+        self.expect(":")
+        return key
+
+    def read_members(self, json_object: Dict[str, Any], deserializer: Optional[ReadableDeserializer] = None) \
+            -> Optional[ReadableChildrenStream]:
+        """
+        Read the members of an object whose opening brace has been consumed, up to and including its closing brace,
+        into json_object. If deserializer is given and the object's type is deserialized by a
+        HanaSerializableReadableDeserializer, stop at its children and return them as a ReadableChildrenStream or a
+        ReadablePropsStream.
+        """
+        first = len(json_object) == 0
+        while True:
+            if self.peek() == "}":
+                self.position += 1
+                return None
+            if not first:
+                self.expect(",")
+            first = False
+            key = self.decode_key()
+            stream_class = _STREAMED_MEMBERS.get((key, self.peek()))
+            if deserializer is not None \
+                    and stream_class is not None \
+                    and self.is_streamed_type(deserializer, json_object.get("type")):
+                self.position += 1
+                children = stream_class(self, json_object)
+                json_object[key] = children
+                return children
+            json_object[key] = self.decode_value()
+
+    @staticmethod
+    def is_streamed_type(deserializer: ReadableDeserializer, type_name: Optional[str]) -> bool:
+        type_deserializer = deserializer.type_name_to_deserializer.get(type_name)
+        return type_deserializer is not None \
+            and isinstance(type_deserializer.unwrap(), HanaSerializableReadableDeserializer)
+
+    def read(self, deserializer: ReadableDeserializer) -> Any:
+        """
+        Read the whole file and return the deserialized root.
+        """
+        if self.peek() != "{":
+            result = deserializer.deserialize(self.decode_value())
+        else:
+            self.position += 1
+            json_object = {}
+            children = self.read_members(json_object, deserializer)
+            result = deserializer.deserialize(json_object)
+            if children is not None:
+                children.finish()
+        if self.peek() != "":
+            raise json.JSONDecodeError("Extra data", self.buffer, self.position)
+        return result
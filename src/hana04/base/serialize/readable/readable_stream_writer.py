@@ -0,0 +1,257 @@
+import functools
+import hashlib
+import json
+import time
+from typing import Any, Callable, List, Optional, Tuple
+
+from hana04.base.extension.hana_extensible import HanaExtensible
+from hana04.base.serialize.hana_serializable import HanaSerializable
+from hana04.base.serialize.hana_serializable_serializers import HanaSerializableReadableSerializer
+from hana04.base.serialize.readable.constants import READABLE_LAYOUT_PROPS, READABLE_IDS_CONTENT
+from hana04.base.serialize.readable.readable_serializer import ReadableSerializer, readable_content_value, \
+    TypeReadableSerializer
+
+DEFAULT_WRITE_SIZE = 1 << 16
+
+
+class _Frame:
+    def __init__(self,
+                 obj: HanaSerializable,
+                 type_serializer: TypeReadableSerializer,
+                 func: Optional[str],
+                 children: List[Tuple[Optional[str], Any, str, int]],
+                 end: str,
+                 level: int):
+        self.obj = obj
+        self.type_serializer = type_serializer
+        self.func = func
+        # The (func, value, text written before it, indentation level) of each child.
+        self.children = children
+        self.next_child_index = 0
+        # The text written after the last child, which closes the children or the props.
+        self.end = end
+        self.level = level
+        # With READABLE_IDS_CONTENT, the hash of the content of the object, and the text of the content before each
+        # child and after the last one.
+        self.content_hash = None
+        self.content_befores: List[str] = []
+        self.content_end = ""
+        # The time spent on the object so far, not counting its children. See TypeReadableSerializer.record_streamed.
+        self.seconds = 0.0
+
+
+class ReadableStreamWriter:
+    """
+    Writes the JSON of a value as text while its HanaSerializables are being serialized, instead of building the JSON
+    of the whole value first. The text is what json.dumps(serializer.serialize(obj), indent=indent,
+    ensure_ascii=False) would return, except that it has no whitespace if indent is None.
+
+    The JSON of a HanaSerializable whose readable serializer is a HanaSerializableReadableSerializer is written a piece
+    at a time, in the layout of serializer, with an explicit stack, so it is never held in memory and deep object
+    graphs do not hit the recursion limit. Other values, such as primitives and map entries, are serialized with
+    serializer and written whole, so memory is bounded by the largest of them rather than by the whole file.
+    """
+
+    def __init__(self,
+                 serializer: ReadableSerializer,
+                 write: Callable[[str], Any],
+                 indent: Optional[int] = 2,
+                 write_size: int = DEFAULT_WRITE_SIZE):
+        self.serializer = serializer
+        self.write_function = write
+        self.indent = indent
+        self.write_size = write_size
+        self.pieces: List[str] = []
+        self.num_pending_chars = 0
+        self.key_separator = ":" if indent is None else ": "
+
+    def write(self, piece: str):
+        self.pieces.append(piece)
+        self.num_pending_chars += len(piece)
+        if self.num_pending_chars >= self.write_size:
+            self.flush()
+
+    def flush(self):
+        if len(self.pieces) > 0:
+            self.write_function("".join(self.pieces))
+            self.pieces.clear()
+            self.num_pending_chars = 0
+
+    def newline(self, level: int, compact: bool = False) -> str:
+        if compact or self.indent is None:
+            return ""
+        return "\n" + " " * (self.indent * level)
+
+    def write_json(self, value: Any, level: int):
+        text = json.dumps(
+            value,
+            indent=self.indent,
+            ensure_ascii=False,
+            separators=(",", self.key_separator))
+        if self.indent is not None and level > 0:
+            # Strings in JSON cannot contain line breaks, so every line break is between tokens.
+            text = text.replace("\n", self.newline(level))
+        self.write(text)
+
+    def key_text(self, key: str, level: int, first: bool = False, compact: bool = False) -> str:
+        return ("" if first else ",") \
+            + self.newline(level, compact) \
+            + json.dumps(key, ensure_ascii=False) \
+            + (":" if compact else self.key_separator)
+
+    def write_key(self, key: str, level: int, first: bool = False):
+        self.write(self.key_text(key, level, first))
+
+    @staticmethod
+    def update_content(frame: _Frame, text: str):
+        if frame.content_hash is not None:
+            frame.content_hash.update(text.encode("utf-8"))
+
+    @staticmethod
+    def content_json(value: Any) -> str:
+        return json.dumps(readable_content_value(value), separators=(",", ":"), ensure_ascii=False)
+
+    def write_value(self, obj: Any):
+        """
+        Write the JSON of obj and flush it.
+        """
+        frame = self.open_object(obj, None, 0)
+        if frame is None:
+            self.write_json(self.serializer.serialize(obj), 0)
+            self.flush()
+            return
+        stack = [frame]
+        while stack:
+            frame = stack[-1]
+            if frame.next_child_index < len(frame.children):
+                func, value, before, child_level = frame.children[frame.next_child_index]
+                if frame.content_hash is not None:
+                    ReadableStreamWriter.update_content(frame, frame.content_befores[frame.next_child_index])
+                frame.next_child_index += 1
+                self.write(before)
+                child_frame = self.open_object(value, func, child_level)
+                if child_frame is None:
+                    value_json = self.serializer.serialize(value, func)
+                    self.write_json(value_json, child_level)
+                    if frame.content_hash is not None:
+                        ReadableStreamWriter.update_content(frame, ReadableStreamWriter.content_json(value_json))
+                else:
+                    stack.append(child_frame)
+            else:
+                id_ = self.close_object(frame)
+                stack.pop()
+                if stack and stack[-1].content_hash is not None:
+                    lookup = {"id": id_} if frame.func is None else {"id": id_, "func": frame.func}
+                    ReadableStreamWriter.update_content(stack[-1], ReadableStreamWriter.content_json(lookup))
+        self.flush()
+
+    def open_object(self, obj: Any, func: Optional[str], level: int) -> Optional[_Frame]:
+        """
+        Write the start of the JSON of obj up to its first child and return the frame that writes the rest, or return
+        None without writing anything if obj is not written a piece at a time.
+        """
+        if not isinstance(obj, HanaSerializable) or id(obj) in self.serializer.obj_id_to_uuid:
+            return None
+        type_serializer = self.serializer.type_name_to_serializer.get(obj.get_serialized_type_name())
+        if type_serializer is None or not isinstance(type_serializer.unwrap(), HanaSerializableReadableSerializer):
+            return None
+        start_time = time.perf_counter()
+        prop_values = None
+        if self.serializer.layout == READABLE_LAYOUT_PROPS:
+            prop_values = obj.get_readable_prop_values()
+        if prop_values is not None:
+            layout = functools.partial(self.layout_props, obj, prop_values)
+        else:
+            child_values = obj.get_readable_child_values()
+            if child_values is None:
+                return None
+            layout = functools.partial(self.layout_children, obj, child_values)
+        start, children, end = layout(level, False)
+        self.write(start)
+        frame = _Frame(obj, type_serializer, func, children, end, level)
+        if self.serializer.id_strategy == READABLE_IDS_CONTENT:
+            # The content from which the id of obj is derived is its JSON without whitespace, as laid out for level 0,
+            # with its HanaSerializables replaced by their ids. See readable_content_text.
+            content_start, content_children, frame.content_end = layout(0, True)
+            frame.content_hash = hashlib.sha256(content_start.encode("utf-8"))
+            frame.content_befores = [before for _, _, before, _ in content_children]
+        frame.seconds = time.perf_counter() - start_time
+        return frame
+
+    def layout_children(self,
+                        obj: HanaSerializable,
+                        child_values: List[Tuple[str, Any]],
+                        level: int,
+                        compact: bool) -> Tuple[str, List[Tuple[Optional[str], Any, str, int]], str]:
+        """
+        Return the text up to the first child, the children with the text before each of them, and the text after
+        the last child of the JSON of obj in the READABLE_LAYOUT_CHILDREN layout.
+        """
+        start = self.type_text(obj, "children", level, compact)
+        if len(child_values) == 0:
+            return start + "[]", [], ""
+        children = [
+            (child_func, value, ("," if index > 0 else "") + self.newline(level + 2, compact), level + 2)
+            for index, (child_func, value) in enumerate(child_values)
+        ]
+        return start + "[", children, self.newline(level + 1, compact) + "]"
+
+    def layout_props(self,
+                     obj: HanaSerializable,
+                     prop_values: List[Tuple[str, List[Any], bool]],
+                     level: int,
+                     compact: bool) -> Tuple[str, List[Tuple[Optional[str], Any, str, int]], str]:
+        """
+        Do what layout_children does for the READABLE_LAYOUT_PROPS layout.
+        """
+        start = self.type_text(obj, "props", level, compact)
+        if len(prop_values) == 0:
+            return start + "{}", [], ""
+        children = []
+        # The text that closes the array of the previous property, if it is a list.
+        close_list = ""
+        for index, (name, values, is_list) in enumerate(prop_values):
+            before = close_list + self.key_text(name, level + 2, index == 0, compact)
+            if is_list:
+                for item_index, value in enumerate(values):
+                    if item_index == 0:
+                        children.append((None, value, before + "[" + self.newline(level + 3, compact), level + 3))
+                    else:
+                        children.append((None, value, "," + self.newline(level + 3, compact), level + 3))
+                close_list = self.newline(level + 2, compact) + "]"
+            else:
+                children.append((None, values[0], before, level + 2))
+                close_list = ""
+        return start + "{", children, close_list + self.newline(level + 1, compact) + "}"
+
+    def type_text(self, obj: HanaSerializable, children_key: str, level: int, compact: bool) -> str:
+        return "{" \
+            + self.key_text("type", level + 1, True, compact) \
+            + json.dumps(obj.get_serialized_type_name(), ensure_ascii=False) \
+            + self.key_text(children_key, level + 1, False, compact)
+
+    def close_object(self, frame: _Frame) -> str:
+        """
+        Write the rest of the JSON of the object of frame and return its id.
+        """
+        start_time = time.perf_counter()
+        level = frame.level
+        self.write(frame.end)
+        ReadableStreamWriter.update_content(frame, frame.content_end)
+        if isinstance(frame.obj, HanaExtensible):
+            extensions = self.serializer.serialize_extensions(frame.obj)
+            self.write_key("extensions", level + 1)
+            self.write_json(extensions, level + 1)
+            ReadableStreamWriter.update_content(
+                frame, self.key_text("extensions", 0, compact=True) + ReadableStreamWriter.content_json(extensions))
+        ReadableStreamWriter.update_content(frame, "}")
+        id_ = self.serializer.new_id(frame.obj, frame.content_hash)
+        self.write_key("id", level + 1)
+        self.write_json(id_, level + 1)
+        if frame.func is not None:
+            self.write_key("func", level + 1)
+            self.write_json(frame.func, level + 1)
+        self.write(self.newline(level))
+        self.write("}")
+        frame.type_serializer.record_streamed(frame.obj, frame.seconds + time.perf_counter() - start_time)
+        return id_
@@ -2,3 +2,6 @@ TYPE_ID_LOOKUP = 1
 
 TYPE_ID_HANA_MAP_ENTRY = 10002
 TYPE_NAME_HANA_MAP_ENTRY = "HanaMapEntry"
+
+# Lists of fixed-width numbers written as one binary blob. See hana04.base.util.packed_array.
+TYPE_ID_PACKED_ARRAY = 10003
@@ -0,0 +1,196 @@
+import bz2
+import io
+import lzma
+import queue
+import zlib
+from io import BufferedIOBase
+from threading import Thread
+from typing import Any, Callable, NamedTuple, Optional
+
+# Compressed files start with these bytes followed by a byte that identifies the codec. The rest of the file is the
+# compressed content of the uncompressed file. 0xc1 is never used by msgpack and cannot start a JSON document, so a
+# compressed file cannot be confused with an uncompressed one.
+COMPRESSED_FILE_MAGIC = b"\xc1HANA04Z"
+
+COMPRESSION_ZLIB = "zlib"
+COMPRESSION_LZMA = "lzma"
+COMPRESSION_BZ2 = "bz2"
+
+DEFAULT_CHUNK_SIZE = 1 << 20
+DEFAULT_MAX_PENDING_CHUNKS = 4
+DEFAULT_READ_SIZE = 1 << 20
+
+
+class _Codec(NamedTuple):
+    codec_id: int
+    name: str
+    create_compressor: Callable[[Optional[int]], Any]
+    create_decompressor: Callable[[], Any]
+
+
+_CODECS = [
+    _Codec(
+        1,
+        COMPRESSION_ZLIB,
+        lambda level: zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION if level is None else level),
+        zlib.decompressobj),
+    _Codec(
+        2,
+        COMPRESSION_LZMA,
+        lambda level: lzma.LZMACompressor(preset=level),
+        lzma.LZMADecompressor),
+    _Codec(
+        3,
+        COMPRESSION_BZ2,
+        lambda level: bz2.BZ2Compressor(9 if level is None else level),
+        bz2.BZ2Decompressor),
+]
+_NAME_TO_CODEC = {codec.name: codec for codec in _CODECS}
+_ID_TO_CODEC = {codec.codec_id: codec for codec in _CODECS}
+
+
+def _get_codec(compression: str) -> _Codec:
+    if compression not in _NAME_TO_CODEC:
+        raise ValueError("Unsupported compression %s" % compression)
+    return _NAME_TO_CODEC[compression]
+
+
+class CompressedWriter:
+    """
+    Compresses the bytes written to it and writes them to out after the compressed file header. The compression and
+    the writes to out happen in a background thread, so they overlap the work of the thread that produces the bytes.
+    zlib, lzma and bz2 release the GIL while they compress.
+
+    The bytes are handed to the background thread in chunks of at least chunk_size bytes. At most max_pending_chunks
+    chunks wait to be compressed, after which write() blocks. close() must be called to write the end of the
+    compressed stream. Errors raised in the background thread are raised again by the next write() or by close().
+    """
+
+    def __init__(self,
+                 out: BufferedIOBase,
+                 compression: str,
+                 level: Optional[int] = None,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 max_pending_chunks: int = DEFAULT_MAX_PENDING_CHUNKS):
+        assert chunk_size > 0
+        assert max_pending_chunks > 0
+        codec = _get_codec(compression)
+        self.out = out
+        self.compressor = codec.create_compressor(level)
+        self.chunk_size = chunk_size
+        self.buffer = bytearray()
+        self.chunks = queue.Queue(maxsize=max_pending_chunks)
+        self.error: Optional[Exception] = None
+        self.closed = False
+        out.write(COMPRESSED_FILE_MAGIC + bytes([codec.codec_id]))
+        self.thread = Thread(target=self.compress_chunks, daemon=True)
+        self.thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def compress_chunks(self):
+        while True:
+            # None marks the end of the stream.
+            chunk = self.chunks.get()
+            if self.error is None:
+                try:
+                    if chunk is None:
+                        self.out.write(self.compressor.flush())
+                    else:
+                        self.out.write(self.compressor.compress(chunk))
+                except Exception as e:
+                    # Keep taking chunks so that the writing thread does not block.
+                    self.error = e
+            if chunk is None:
+                return
+
+    def check_error(self):
+        if self.error is not None:
+            raise self.error
+
+    def write(self, data) -> int:
+        assert not self.closed
+        self.check_error()
+        self.buffer += data
+        if len(self.buffer) >= self.chunk_size:
+            self.chunks.put(self.buffer)
+            self.buffer = bytearray()
+        return len(data)
+
+    def flush(self):
+        """
+        Hand the buffered bytes to the background thread. This does not end a compressed block, which would make the
+        compression worse, so the bytes are not necessarily in out when flush() returns.
+        """
+        if len(self.buffer) > 0:
+            self.chunks.put(self.buffer)
+            self.buffer = bytearray()
+
+    def close(self):
+        if self.closed:
+            return
+        self.flush()
+        self.chunks.put(None)
+        self.thread.join()
+        self.closed = True
+        self.check_error()
+
+
+class DecompressingReader(io.RawIOBase):
+    """
+    Reads the uncompressed content of a compressed file from source, which must be positioned right after the
+    compressed file header.
+    """
+
+    def __init__(self, source: BufferedIOBase, decompressor: Any, read_size: int = DEFAULT_READ_SIZE):
+        super().__init__()
+        self.source = source
+        self.decompressor = decompressor
+        self.read_size = read_size
+        self.pending = bytearray()
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        while len(self.pending) < len(b) and not self.decompressor.eof:
+            data = self.source.read(self.read_size)
+            if len(data) == 0:
+                raise EOFError("The compressed file ended before the end of the compressed stream")
+            self.pending += self.decompressor.decompress(data)
+        n = min(len(b), len(self.pending))
+        b[:n] = self.pending[:n]
+        del self.pending[:n]
+        return n
+
+
+def read_compression(source: BufferedIOBase) -> Optional[str]:
+    """
+    Read the compressed file header at the current position of source and return the name of the codec. If there is
+    no header, seek back and return None.
+    """
+    position = source.tell()
+    header = source.read(len(COMPRESSED_FILE_MAGIC) + 1)
+    if len(header) <= len(COMPRESSED_FILE_MAGIC) or header[:len(COMPRESSED_FILE_MAGIC)] != COMPRESSED_FILE_MAGIC:
+        source.seek(position)
+        return None
+    codec_id = header[len(COMPRESSED_FILE_MAGIC)]
+    if codec_id not in _ID_TO_CODEC:
+        raise ValueError("Unsupported compression codec %d" % codec_id)
+    return _ID_TO_CODEC[codec_id].name
+
+
+def open_decompressed(source: BufferedIOBase, read_size: int = DEFAULT_READ_SIZE) -> Optional[io.BufferedReader]:
+    """
+    Return a reader of the uncompressed content of source if it starts with the compressed file header. Otherwise,
+    return None and leave source where it was.
+    """
+    compression = read_compression(source)
+    if compression is None:
+        return None
+    decompressor = _NAME_TO_CODEC[compression].create_decompressor()
+    return io.BufferedReader(DecompressingReader(source, decompressor, read_size), buffer_size=read_size)
@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from typing import Any, Dict
+from typing import Any, Dict, Generator
 
 from hana04.base.serialize.binary.binary_deserializer import TypeBinaryDeserializer, BinaryDeserializer
 from hana04.base.serialize.binary.binary_serializer import TypeBinarySerializer, BinarySerializer
@@ -7,6 +7,7 @@ from hana04.base.serialize.readable.readable_deserializer import TypeReadableDes
 from hana04.base.serialize.readable.readable_serializer import TypeReadableSerializer, ReadableSerializer
 from hana04.base.type_ids import TYPE_NAME_HANA_MAP_ENTRY, TYPE_ID_HANA_MAP_ENTRY
 from hana04.base.util.message_packer import MessagePacker
+from hana04.base.util.message_unpacker import MessageUnpacker
 from jyuusu.binder import Binder, Module as JyuusuModule
 from jyuusu.constructor_resolver import memoized, injectable_class
 
@@ -21,10 +22,13 @@ class HanaMapEntry:
 @injectable_class
 class HanaMapEntryReadableSerializer(TypeReadableSerializer[HanaMapEntry]):
     def serialize(self, obj: HanaMapEntry, serializer: ReadableSerializer) -> Dict[str, Any]:
+        return serializer.run(self.iter_serialize(obj, serializer))
+
+    def iter_serialize(self, obj: HanaMapEntry, serializer: ReadableSerializer) -> Generator:
         return {
             "type": TYPE_NAME_HANA_MAP_ENTRY,
-            "key": serializer.serialize(obj.key),
-            "value": serializer.serialize(obj.value),
+            "key": (yield obj.key),
+            "value": (yield obj.value),
         }
 
 
@@ -32,8 +36,11 @@ class HanaMapEntryReadableSerializer(TypeReadableSerializer[HanaMapEntry]):
 @injectable_class
 class HanaMapEntryReadableDeserializer(TypeReadableDeserializer[HanaMapEntry]):
     def deserialize(self, json: Dict[str, Any], deserializer: ReadableDeserializer) -> HanaMapEntry:
-        key = deserializer.deserialize(json["key"])
-        value = deserializer.deserialize(json["value"])
+        return deserializer.run(self.iter_deserialize(json, deserializer))
+
+    def iter_deserialize(self, json: Dict[str, Any], deserializer: ReadableDeserializer) -> Generator:
+        key = yield json["key"]
+        value = yield json["value"]
         return HanaMapEntry(key, value)
 
     def get_serialized_type(self) -> type:
@@ -44,9 +51,12 @@ class HanaMapEntryReadableDeserializer(TypeReadableDeserializer[HanaMapEntry]):
 @injectable_class
 class HanaMapEntryBinarySerializer(TypeBinarySerializer[HanaMapEntry]):
     def serialize(self, obj: HanaMapEntry, packer: MessagePacker, serializer: BinarySerializer):
+        serializer.run(self.iter_serialize(obj, packer, serializer))
+
+    def iter_serialize(self, obj: HanaMapEntry, packer: MessagePacker, serializer: BinarySerializer) -> Generator:
         packer.pack_array_header(2)
-        serializer.serialize(obj.key)
-        serializer.serialize(obj.value)
+        yield obj.key
+        yield obj.value
 
     def get_type_id(self) -> int:
         return TYPE_ID_HANA_MAP_ENTRY
@@ -56,11 +66,21 @@ class HanaMapEntryBinarySerializer(TypeBinarySerializer[HanaMapEntry]):
 @injectable_class
 class HanaMapEntryBinaryDeserializer(TypeBinaryDeserializer[HanaMapEntry]):
     def deserialize(self, value: Any, deserializer: BinaryDeserializer) -> HanaMapEntry:
+        return deserializer.run(self.iter_deserialize(value, deserializer))
+
+    def iter_deserialize(self, value: Any, deserializer: BinaryDeserializer) -> Generator:
         assert isinstance(value, list)
         assert isinstance(value[0], dict)
         assert isinstance(value[1], dict)
-        deserialized_key = deserializer.deserialize(value[0])
-        deserialized_value = deserializer.deserialize(value[1])
+        deserialized_key = yield value[0]
+        deserialized_value = yield value[1]
+        return HanaMapEntry(deserialized_key, deserialized_value)
+
+    def iter_stream_deserialize(self, unpacker: MessageUnpacker, deserializer: BinaryDeserializer) -> Generator:
+        num_items = unpacker.read_array_header()
+        assert num_items == 2
+        deserialized_key = yield unpacker
+        deserialized_value = yield unpacker
         return HanaMapEntry(deserialized_key, deserialized_value)
 
     def get_serialized_type(self) -> type:
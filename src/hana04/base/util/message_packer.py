@@ -2,6 +2,9 @@ from io import BufferedIOBase
 
 from msgpack import Packer
 
+DEFAULT_FLUSH_THRESHOLD = 1 << 20
+DEFAULT_FLUSH_CHECK_INTERVAL = 512
+
 
 class MessagePacker:
     def __init__(self, out: BufferedIOBase):
@@ -31,4 +34,115 @@ class MessagePacker:
         self.out.write(self.packer.pack_map_header(n))
 
     def pack_bytes(self, value: bytes):
-        self.out.write(self.packer.pack(value))
\ No newline at end of file
+        self.out.write(self.packer.pack(value))
+
+    def write_packed(self, data: bytes):
+        """
+        Write msgpack values that have already been packed.
+        """
+        self.out.write(data)
+
+    def position(self) -> int:
+        """
+        Return the number of bytes written to out so far. out must support tell().
+        """
+        return self.out.tell()
+
+    def flush(self):
+        pass
+
+
+class BufferedMessagePacker(MessagePacker):
+    """
+    A MessagePacker that accumulates its output in the internal buffer of a msgpack Packer instead of calling
+    out.write() for every value. The buffer is written to out in chunks of at least flush_threshold bytes, so
+    flush() must be called after the last value has been packed.
+    """
+
+    def __init__(self,
+                 out: BufferedIOBase,
+                 flush_threshold: int = DEFAULT_FLUSH_THRESHOLD,
+                 flush_check_interval: int = DEFAULT_FLUSH_CHECK_INTERVAL):
+        super().__init__(out)
+        assert flush_threshold > 0
+        assert flush_check_interval > 0
+        self.flush_threshold = flush_threshold
+        self.flush_check_interval = flush_check_interval
+        self.packer = Packer(autoreset=False)
+        # Bytes that msgpack's buffer cannot hold, i.e. single precision floats, and everything packed before them.
+        self.spilled = bytearray()
+        self.num_unchecked_values = 0
+        self.num_written_bytes = 0
+
+    def pack_str(self, value: str):
+        self.packer.pack(value)
+        self.check_flush_now()
+
+    def pack_bool(self, value: bool):
+        self.packer.pack(value)
+        self.count_value()
+
+    def pack_int(self, value: int):
+        self.packer.pack(value)
+        self.count_value()
+
+    def pack_single_float(self, value: float):
+        self.spilled += self.packer.getbuffer()
+        self.packer.reset()
+        self.spilled += self.single_float_packer.pack(value)
+        self.count_value()
+
+    def pack_double_float(self, value: float):
+        self.packer.pack(value)
+        self.count_value()
+
+    def pack_array_header(self, n: int):
+        self.packer.pack_array_header(n)
+        self.count_value()
+
+    def pack_map_header(self, n: int):
+        self.packer.pack_map_header(n)
+        self.count_value()
+
+    def pack_bytes(self, value: bytes):
+        self.packer.pack(value)
+        self.check_flush_now()
+
+    def write_packed(self, data: bytes):
+        self.spilled += self.packer.getbuffer()
+        self.packer.reset()
+        self.spilled += data
+        self.check_flush_now()
+
+    def count_value(self):
+        self.num_unchecked_values += 1
+        if self.num_unchecked_values >= self.flush_check_interval:
+            self.check_flush_now()
+
+    def check_flush_now(self):
+        self.num_unchecked_values = 0
+        if self.buffered_size() >= self.flush_threshold:
+            self.write_buffer()
+
+    def buffered_size(self) -> int:
+        return len(self.spilled) + len(self.packer.getbuffer())
+
+    def position(self) -> int:
+        """
+        Return the number of bytes packed so far, including the ones that have not been written to out.
+        """
+        return self.num_written_bytes + self.buffered_size()
+
+    def write_buffer(self):
+        self.num_written_bytes += self.buffered_size()
+        if len(self.spilled) > 0:
+            self.out.write(self.spilled)
+            self.spilled.clear()
+        self.out.write(self.packer.getbuffer())
+        self.packer.reset()
+
+    def flush(self):
+        self.write_buffer()
+        self.num_unchecked_values = 0
+        if hasattr(self.out, "flush"):
+            self.out.flush()
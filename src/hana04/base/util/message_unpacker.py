@@ -0,0 +1,62 @@
+import mmap
+from io import BufferedIOBase
+from typing import Any, Optional, Union
+
+from msgpack import Unpacker
+
+DEFAULT_READ_SIZE = 1 << 20
+
+
+class MessageUnpacker:
+    """
+    Reads msgpack values from a binary stream one at a time, so that a reader can walk maps and arrays without
+    decoding them as a whole.
+    """
+
+    def __init__(self, source: BufferedIOBase, read_size: int = DEFAULT_READ_SIZE):
+        # max_buffer_size=0 lifts msgpack's 100MiB limit on a single value.
+        self.unpacker = Unpacker(source, read_size=read_size, max_buffer_size=0, strict_map_key=False)
+        if isinstance(source, mmap.mmap):
+            self.buffer = source
+            self.buffer_offset = source.tell()
+        else:
+            self.buffer = None
+            self.buffer_offset = 0
+
+    def unpack(self) -> Any:
+        return self.unpacker.unpack()
+
+    def read_map_header(self) -> int:
+        return self.unpacker.read_map_header()
+
+    def read_array_header(self) -> int:
+        return self.unpacker.read_array_header()
+
+    def skip(self):
+        self.unpacker.skip()
+
+    def tell(self) -> int:
+        return self.unpacker.tell()
+
+    def next_is_map(self) -> Optional[bool]:
+        """
+        Return whether the next value is a map without reading it, or None if the source is not an mmap, in which
+        case the next byte cannot be seen.
+        """
+        if self.buffer is None:
+            return None
+        first_byte = self.buffer[self.buffer_offset + self.unpacker.tell()]
+        return 0x80 <= first_byte <= 0x8f or first_byte == 0xde or first_byte == 0xdf
+
+    def read_bytes_view(self, size: int) -> Union[bytes, memoryview]:
+        """
+        Read the next value, which must be a bin of the given size. If the source is an mmap, return a view into it
+        instead of copying the bytes. The mmap cannot be closed while the view is alive.
+        """
+        if self.buffer is None:
+            result = self.unpacker.unpack()
+            assert len(result) == size
+            return result
+        self.unpacker.skip()
+        end = self.buffer_offset + self.unpacker.tell()
+        return memoryview(self.buffer)[end - size:end]
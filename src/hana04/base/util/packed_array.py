@@ -0,0 +1,68 @@
+from typing import Any, Dict, Iterable, List
+
+import numpy
+
+from hana04.base.serialize.binary.binary_deserializer import TypeBinaryDeserializer, BinaryDeserializer
+from hana04.base.serialize.binary.constants import TYPE_TAG, VALUE_TAG
+from hana04.base.type_ids import TYPE_ID_PACKED_ARRAY
+from hana04.base.util.message_packer import MessagePacker
+from jyuusu.binder import Binder, Module as JyuusuModule
+from jyuusu.constructor_resolver import memoized, injectable_class
+
+# Element types of packed arrays, indexed by dtype code. Elements are stored little-endian.
+PACKED_ARRAY_DTYPES: List[numpy.dtype] = [
+    numpy.dtype("<i4"),
+    numpy.dtype("<i8"),
+    numpy.dtype("<f4"),
+    numpy.dtype("<f8"),
+]
+
+# The dtype codes of the scalar types whose lists can be packed.
+PACKED_ARRAY_DTYPE_CODES: Dict[type, int] = {
+    numpy.int32: 0,
+    numpy.int64: 1,
+    numpy.float32: 2,
+    numpy.float64: 3,
+}
+
+
+def pack_packed_array(packer: MessagePacker, values: Iterable[Any], dtype_code: int):
+    """
+    Write the values as {TYPE_TAG: TYPE_ID_PACKED_ARRAY, VALUE_TAG: [dtype_code, raw little-endian bytes]}. The
+    values are converted to the dtype, so callers must check that they are of the scalar type of the dtype code.
+    """
+    packer.pack_map_header(2)
+    if True:
+        packer.pack_int(TYPE_TAG)
+        packer.pack_int(TYPE_ID_PACKED_ARRAY)
+    if True:
+        packer.pack_int(VALUE_TAG)
+        packer.pack_array_header(2)
+        packer.pack_int(dtype_code)
+        packer.pack_bytes(numpy.array(values, dtype=PACKED_ARRAY_DTYPES[dtype_code]).tobytes())
+
+
+@memoized
+@injectable_class
+class PackedArrayBinaryDeserializer(TypeBinaryDeserializer[numpy.ndarray]):
+    """
+    Returns a read-only array that shares memory with the packed bytes. Iterating over it yields numpy scalars of
+    the type the list was declared with.
+    """
+
+    def deserialize(self, value: Any, deserializer: BinaryDeserializer) -> numpy.ndarray:
+        assert isinstance(value, list)
+        assert len(value) == 2
+        return numpy.frombuffer(value[1], dtype=PACKED_ARRAY_DTYPES[value[0]])
+
+    def get_serialized_type(self) -> type:
+        return numpy.ndarray
+
+
+class Module(JyuusuModule):
+    def configure(self, binder: Binder):
+        binder.install_class(PackedArrayBinaryDeserializer)
+        binder.install_module(BinaryDeserializer.Module)
+        binder.bind_to_dict(int, TypeBinaryDeserializer) \
+            .with_key(TYPE_ID_PACKED_ARRAY) \
+            .to_type(PackedArrayBinaryDeserializer)
@@ -0,0 +1,93 @@
+from types import GeneratorType
+from typing import Any, Callable, Generator, List, Optional
+
+
+class WorkStack:
+    """
+    Runs nested work without recursion. A unit of work is a generator, which may yield
+
+    - another generator, which is run to completion first, after which its return value is sent back, or
+    - any other item, which is passed to expand. expand either does the work for the item and returns its result,
+      which is sent back, or returns a generator that does the work.
+
+    The generators are kept on an explicit stack, so the depth of the work is not limited by the recursion limit.
+    Exceptions are thrown into the generator that yielded the failed work, as if the generators had called one
+    another. The work can be paused and resumed by running a limited number of steps at a time.
+    """
+
+    def __init__(self, expand: Callable[[Any], Any], item: Any):
+        self.expand = expand
+        self.stack: List[Generator] = []
+        self.value = None
+        self.error: Optional[Exception] = None
+        if item.__class__ is not GeneratorType:
+            item = expand(item)
+        if item.__class__ is GeneratorType:
+            self.stack.append(item)
+        else:
+            self.value = item
+
+    @property
+    def finished(self) -> bool:
+        return len(self.stack) == 0
+
+    @property
+    def result(self) -> Any:
+        assert self.finished
+        return self.value
+
+    def run(self, max_steps: Optional[int] = None) -> bool:
+        """
+        Run the work until it finishes or max_steps generators have been resumed. Return whether the work has
+        finished.
+        """
+        stack = self.stack
+        expand = self.expand
+        value = self.value
+        error = self.error
+        num_steps = 0
+        while stack:
+            if max_steps is not None and num_steps >= max_steps:
+                break
+            num_steps += 1
+            generator = stack[-1]
+            try:
+                if error is None:
+                    item = generator.send(value)
+                else:
+                    item = generator.throw(error)
+                    error = None
+            except StopIteration as e:
+                stack.pop()
+                value = e.value
+                continue
+            except Exception as e:
+                stack.pop()
+                if not stack:
+                    raise
+                error = e
+                continue
+            if item.__class__ is not GeneratorType:
+                try:
+                    item = expand(item)
+                except Exception as e:
+                    error = e
+                    continue
+                if item.__class__ is not GeneratorType:
+                    value = item
+                    continue
+            stack.append(item)
+            value = None
+        self.value = value
+        self.error = error
+        return not stack
+
+
+def run_work_stack(expand: Callable[[Any], Any], item: Any) -> Any:
+    """
+    Run the work for item, which is either a generator or an item to pass to expand, to completion and return its
+    result. See WorkStack.
+    """
+    work_stack = WorkStack(expand, item)
+    work_stack.run()
+    return work_stack.value
@@ -11,6 +11,7 @@ import hana04.serialize.primitive.file_path
 import hana04.serialize.primitive.cache_key
 import hana04.serialize.primitive.direct
 import hana04.serialize.primitive.cached
+import hana04.serialize.primitive.ndarray
 
 
 class HanaSerializeModule(JyuusuModule):
@@ -26,3 +27,4 @@ class HanaSerializeModule(JyuusuModule):
         binder.install_module(hana04.serialize.primitive.cache_key.Module)
         binder.install_module(hana04.serialize.primitive.direct.Module)
         binder.install_module(hana04.serialize.primitive.cached.Module)
+        binder.install_module(hana04.serialize.primitive.ndarray.Module)
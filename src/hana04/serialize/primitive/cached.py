@@ -1,4 +1,4 @@
-from typing import Dict, Any
+from typing import Dict, Any, Generator
 
 from hana04.apt.serialize.decorators import hana_readable_serializer_by_type, hana_readable_deserializer, \
     hana_binary_serializer_by_type, hana_binary_deserializer, hana_binary_deserializer_module, \
@@ -9,6 +9,7 @@ from hana04.base.serialize.binary.binary_serializer import TypeBinarySerializer,
 from hana04.base.serialize.readable.readable_deserializer import TypeReadableDeserializer, ReadableDeserializer
 from hana04.base.serialize.readable.readable_serializer import TypeReadableSerializer, ReadableSerializer
 from hana04.base.util.message_packer import MessagePacker
+from hana04.base.util.message_unpacker import MessageUnpacker
 from hana04.serialize.type_ids import TYPE_ID_DIRECT, TYPE_NAME_DIRECT
 from jyuusu.binder import Binder, Module as JyuusuModule
 from jyuusu.constructor_resolver import injectable_class, memoized
@@ -19,9 +20,12 @@ from jyuusu.constructor_resolver import injectable_class, memoized
 @injectable_class
 class DirectReadableSerializer(TypeReadableSerializer[Direct]):
     def serialize(self, obj: Direct, serializer: ReadableSerializer) -> Dict[str, Any]:
+        return serializer.run(self.iter_serialize(obj, serializer))
+
+    def iter_serialize(self, obj: Direct, serializer: ReadableSerializer) -> Generator:
         return {
             "type": TYPE_NAME_DIRECT,
-            "value": serializer.serialize(obj.value),
+            "value": (yield obj.value),
         }
 
 
@@ -30,7 +34,10 @@ class DirectReadableSerializer(TypeReadableSerializer[Direct]):
 @injectable_class
 class DirectReadableDeserializer(TypeReadableDeserializer[Direct]):
     def deserialize(self, json: Dict[str, Any], deserializer: ReadableDeserializer) -> Direct:
-        value = deserializer.deserialize(json["value"])
+        return deserializer.run(self.iter_deserialize(json, deserializer))
+
+    def iter_deserialize(self, json: Dict[str, Any], deserializer: ReadableDeserializer) -> Generator:
+        value = yield json["value"]
         return Direct.of(value)
 
     def get_serialized_type(self) -> type:
@@ -44,6 +51,9 @@ class DirectBinarySerializer(TypeBinarySerializer[Direct]):
     def serialize(self, obj: Direct, packer: MessagePacker, serializer: BinarySerializer):
         serializer.serialize(obj.value)
 
+    def iter_serialize(self, obj: Direct, packer: MessagePacker, serializer: BinarySerializer) -> Generator:
+        yield obj.value
+
     def get_type_id(self) -> int:
         return TYPE_ID_DIRECT
 
@@ -53,8 +63,15 @@ class DirectBinarySerializer(TypeBinarySerializer[Direct]):
 @injectable_class
 class DirectBinaryDeserializer(TypeBinaryDeserializer[Direct]):
     def deserialize(self, value: Any, deserializer: BinaryDeserializer) -> Direct:
+        return deserializer.run(self.iter_deserialize(value, deserializer))
+
+    def iter_deserialize(self, value: Any, deserializer: BinaryDeserializer) -> Generator:
         assert isinstance(value, dict)
-        deserialized = deserializer.deserialize(value)
+        deserialized = yield value
+        return Direct.of(deserialized)
+
+    def iter_stream_deserialize(self, unpacker: MessageUnpacker, deserializer: BinaryDeserializer) -> Generator:
+        deserialized = yield unpacker
         return Direct.of(deserialized)
 
     def get_serialized_type(self) -> type:
@@ -1,4 +1,4 @@
-from typing import Dict, Any
+from typing import Dict, Any, Generator
 
 from hana04.apt.serialize.decorators import hana_readable_serializer_by_type, hana_readable_deserializer, \
     hana_binary_serializer_by_type, hana_binary_deserializer, hana_binary_deserializer_module, \
@@ -9,6 +9,7 @@ from hana04.base.serialize.binary.binary_serializer import TypeBinarySerializer,
 from hana04.base.serialize.readable.readable_deserializer import TypeReadableDeserializer, ReadableDeserializer
 from hana04.base.serialize.readable.readable_serializer import TypeReadableSerializer, ReadableSerializer
 from hana04.base.util.message_packer import MessagePacker
+from hana04.base.util.message_unpacker import MessageUnpacker
 from hana04.serialize.type_ids import TYPE_ID_CACHED, TYPE_NAME_CACHED
 from jyuusu.binder import Binder, Module as JyuusuModule
 from jyuusu.constructor_resolver import injectable_class, memoized
@@ -19,9 +20,12 @@ from jyuusu.constructor_resolver import injectable_class, memoized
 @injectable_class
 class CachedReadableSerializer(TypeReadableSerializer[Cached]):
     def serialize(self, obj: Cached, serializer: ReadableSerializer) -> Dict[str, Any]:
+        return serializer.run(self.iter_serialize(obj, serializer))
+
+    def iter_serialize(self, obj: Cached, serializer: ReadableSerializer) -> Generator:
         return {
             "type": TYPE_NAME_CACHED,
-            "value": serializer.serialize(obj.key),
+            "value": (yield obj.key),
         }
 
 
@@ -30,7 +34,10 @@ class CachedReadableSerializer(TypeReadableSerializer[Cached]):
 @injectable_class
 class CachedReadableDeserializer(TypeReadableDeserializer[Cached]):
     def deserialize(self, json: Dict[str, Any], deserializer: ReadableDeserializer) -> Cached:
-        value = deserializer.deserialize(json["value"])
+        return deserializer.run(self.iter_deserialize(json, deserializer))
+
+    def iter_deserialize(self, json: Dict[str, Any], deserializer: ReadableDeserializer) -> Generator:
+        value = yield json["value"]
         return Cached.of(value)
 
     def get_serialized_type(self) -> type:
@@ -44,6 +51,9 @@ class CachedBinarySerializer(TypeBinarySerializer[Cached]):
     def serialize(self, obj: Cached, packer: MessagePacker, serializer: BinarySerializer):
         serializer.serialize(obj.key)
 
+    def iter_serialize(self, obj: Cached, packer: MessagePacker, serializer: BinarySerializer) -> Generator:
+        yield obj.key
+
     def get_type_id(self) -> int:
         return TYPE_ID_CACHED
 
@@ -53,8 +63,15 @@ class CachedBinarySerializer(TypeBinarySerializer[Cached]):
 @injectable_class
 class CachedBinaryDeserializer(TypeBinaryDeserializer[Cached]):
     def deserialize(self, value: Any, deserializer: BinaryDeserializer) -> Cached:
+        return deserializer.run(self.iter_deserialize(value, deserializer))
+
+    def iter_deserialize(self, value: Any, deserializer: BinaryDeserializer) -> Generator:
         assert isinstance(value, dict)
-        deserialized = deserializer.deserialize(value)
+        deserialized = yield value
+        return Cached.of(deserialized)
+
+    def iter_stream_deserialize(self, unpacker: MessageUnpacker, deserializer: BinaryDeserializer) -> Generator:
+        deserialized = yield unpacker
         return Cached.of(deserialized)
 
     def get_serialized_type(self) -> type:
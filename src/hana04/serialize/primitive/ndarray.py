@@ -0,0 +1,128 @@
+import hashlib
+import os
+from typing import Dict, Any, List
+
+import numpy
+
+from hana04.apt.serialize.decorators import hana_readable_serializer_by_type, hana_readable_deserializer, \
+    hana_binary_serializer_by_type, hana_binary_deserializer, hana_binary_deserializer_module, \
+    hana_binary_serializer_module, hana_readable_deserializer_module, hana_readable_serializer_module
+from hana04.base.serialize.binary.binary_deserializer import TypeBinaryDeserializer, BinaryDeserializer
+from hana04.base.serialize.binary.binary_serializer import TypeBinarySerializer, BinarySerializer
+from hana04.base.serialize.readable.readable_deserializer import TypeReadableDeserializer, ReadableDeserializer
+from hana04.base.serialize.readable.readable_serializer import TypeReadableSerializer, ReadableSerializer
+from hana04.base.util.message_packer import MessagePacker
+from hana04.base.util.message_unpacker import MessageUnpacker
+from hana04.serialize.type_ids import TYPE_ID_NDARRAY, TYPE_NAME_NDARRAY
+from jyuusu.binder import Binder, Module as JyuusuModule
+from jyuusu.constructor_resolver import injectable_class, memoized
+
+
+def get_ndarray_dtype(obj: numpy.ndarray) -> numpy.dtype:
+    if obj.dtype.hasobject:
+        raise ValueError(f"Cannot serialize an array of dtype {obj.dtype}")
+    return obj.dtype
+
+
+@hana_readable_serializer_by_type(numpy.ndarray)
+@memoized
+@injectable_class
+class NdArrayReadableSerializer(TypeReadableSerializer[numpy.ndarray]):
+    """
+    Saves the array to a .npy file next to the JSON file and records its name relative to the JSON file. The .npy
+    file is named after the JSON file and a hash of the array, so saving the same array twice writes one file. If the
+    serializer has no file name, the array is written inline as nested lists.
+    """
+
+    def serialize(self, obj: numpy.ndarray, serializer: ReadableSerializer) -> Dict[str, Any]:
+        dtype = get_ndarray_dtype(obj)
+        if serializer.file_name is None:
+            return {
+                "type": TYPE_NAME_NDARRAY,
+                "dtype": dtype.str,
+                "shape": list(obj.shape),
+                "value": obj.tolist(),
+            }
+
+        digest = hashlib.sha1()
+        digest.update(dtype.str.encode("utf-8"))
+        digest.update(repr(obj.shape).encode("utf-8"))
+        digest.update(numpy.ascontiguousarray(obj).data)
+        sidecar_name = f"{os.path.basename(serializer.file_name)}.{digest.hexdigest()[:16]}.npy"
+        sidecar_path = os.path.join(os.path.dirname(serializer.file_name), sidecar_name)
+        if not os.path.exists(sidecar_path):
+            numpy.save(sidecar_path, obj, allow_pickle=False)
+        return {
+            "type": TYPE_NAME_NDARRAY,
+            "file": sidecar_name,
+        }
+
+
+@hana_readable_deserializer(TYPE_NAME_NDARRAY)
+@memoized
+@injectable_class
+class NdArrayReadableDeserializer(TypeReadableDeserializer[numpy.ndarray]):
+    def deserialize(self, json: Dict[str, Any], deserializer: ReadableDeserializer) -> numpy.ndarray:
+        if "file" in json:
+            dir_name = os.path.dirname(deserializer.file_name) if deserializer.file_name is not None else ""
+            return numpy.load(os.path.join(dir_name, json["file"]), allow_pickle=False)
+        else:
+            return numpy.array(json["value"], dtype=numpy.dtype(json["dtype"])).reshape(json["shape"])
+
+    def get_serialized_type(self) -> type:
+        return numpy.ndarray
+
+
+@hana_binary_serializer_by_type(numpy.ndarray)
+@memoized
+@injectable_class
+class NdArrayBinarySerializer(TypeBinarySerializer[numpy.ndarray]):
+    """
+    Writes [shape, dtype string, raw bytes in C order].
+    """
+
+    def serialize(self, obj: numpy.ndarray, packer: MessagePacker, serializer: BinarySerializer):
+        dtype = get_ndarray_dtype(obj)
+        packer.pack_array_header(3)
+        packer.pack_array_header(obj.ndim)
+        for size in obj.shape:
+            packer.pack_int(size)
+        packer.pack_str(dtype.str)
+        packer.pack_bytes(numpy.ascontiguousarray(obj).data)
+
+    def get_type_id(self) -> int:
+        return TYPE_ID_NDARRAY
+
+
+@hana_binary_deserializer(TYPE_ID_NDARRAY)
+@memoized
+@injectable_class
+class NdArrayBinaryDeserializer(TypeBinaryDeserializer[numpy.ndarray]):
+    """
+    Returns read-only arrays that share memory with the unpacked bytes, or with the mmap when the unpacker reads one.
+    """
+
+    def deserialize(self, value: Any, deserializer: BinaryDeserializer) -> numpy.ndarray:
+        assert isinstance(value, list)
+        array: List = value
+        return numpy.frombuffer(array[2], dtype=numpy.dtype(array[1])).reshape(array[0])
+
+    def stream_deserialize(self, unpacker: MessageUnpacker, binary_deserializer: BinaryDeserializer) -> numpy.ndarray:
+        num_items = unpacker.read_array_header()
+        if num_items != 3:
+            raise ValueError(f"An ndarray is written as an array of 3 items, not {num_items}.")
+        shape = unpacker.unpack()
+        dtype = numpy.dtype(unpacker.unpack())
+        data = unpacker.read_bytes_view(int(numpy.prod(shape, dtype=numpy.int64)) * dtype.itemsize)
+        return numpy.frombuffer(data, dtype=dtype).reshape(shape)
+
+    def get_serialized_type(self) -> type:
+        return numpy.ndarray
+
+
+class Module(JyuusuModule):
+    def configure(self, binder: Binder):
+        binder.install_module(hana_readable_deserializer_module(NdArrayReadableDeserializer))
+        binder.install_module(hana_readable_serializer_module(NdArrayReadableSerializer))
+        binder.install_module(hana_binary_deserializer_module(NdArrayBinaryDeserializer))
+        binder.install_module(hana_binary_serializer_module(NdArrayBinarySerializer))
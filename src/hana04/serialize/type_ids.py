@@ -32,3 +32,6 @@ TYPE_NAME_DIRECT = "Direct"
 
 TYPE_ID_CACHED = 30022
 TYPE_NAME_CACHED = "Cached"
+
+TYPE_ID_NDARRAY = 30024
+TYPE_NAME_NDARRAY = "NdArray"
@@ -0,0 +1,246 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from hana04.base.module import HanaBaseModule
+from hana04.base.serialize.file_deserializer import FileDeserializer
+from hana04.base.serialize.file_serializer import FileSerializer
+from hana04.gfxbase.serialize.module import HanaGfxbaseSerializeModule
+from hana04.serialize.module import HanaSerializeModule
+from hana04_benchmark.graphs import BENCHMARK_MODULES, GRAPH_GENERATORS, SyntheticGraph
+from jyuusu.injectors import create_injector
+
+DEFAULT_SIZE = 10000
+DEFAULT_REPEAT = 3
+
+
+class BenchmarkContext(NamedTuple):
+    injector: Any
+    graph_name: str
+    size: int
+    temp_dir: str
+
+    def file_name(self, base_name: str) -> str:
+        return os.path.join(self.temp_dir, base_name)
+
+
+class BenchmarkResult(NamedTuple):
+    graph: str
+    benchmark: str
+    size: int
+    num_objects: int
+    # The number of bytes written or read by one run, or 0 if the benchmark does no I/O.
+    num_bytes: int
+    # The fastest of the timed runs.
+    seconds: float
+    objects_per_second: float
+    megabytes_per_second: Optional[float]
+    # The peak memory allocated by Python during a separate run, as measured by tracemalloc.
+    peak_memory_bytes: int
+
+
+def prepare_build(context: BenchmarkContext, graph: SyntheticGraph) -> Callable[[], int]:
+    generator = GRAPH_GENERATORS[context.graph_name]
+
+    def run():
+        generator(context.injector, context.size)
+        return 0
+
+    return run
+
+
+def prepare_binary_serialize(context: BenchmarkContext, graph: SyntheticGraph) -> Callable[[], int]:
+    file_serializer = context.injector.get_instance(FileSerializer)
+    file_name = context.file_name("serialized.hana")
+
+    def run():
+        file_serializer.binary_serialize(graph.root, file_name)
+        return os.path.getsize(file_name)
+
+    return run
+
+
+def prepare_binary_deserialize(context: BenchmarkContext, graph: SyntheticGraph) -> Callable[[], int]:
+    file_deserializer = context.injector.get_instance(FileDeserializer)
+    file_name = context.file_name("deserialized.hana")
+    context.injector.get_instance(FileSerializer).binary_serialize(graph.root, file_name)
+    num_bytes = os.path.getsize(file_name)
+
+    def run():
+        file_deserializer.binary_deserialize(file_name)
+        return num_bytes
+
+    return run
+
+
+def prepare_readable_serialize(context: BenchmarkContext, graph: SyntheticGraph) -> Callable[[], int]:
+    file_serializer = context.injector.get_instance(FileSerializer)
+    file_name = context.file_name("serialized.json")
+
+    def run():
+        file_serializer.readable_serialize(graph.root, file_name)
+        return os.path.getsize(file_name)
+
+    return run
+
+
+def prepare_readable_deserialize(context: BenchmarkContext, graph: SyntheticGraph) -> Callable[[], int]:
+    file_deserializer = context.injector.get_instance(FileDeserializer)
+    file_name = context.file_name("deserialized.json")
+    context.injector.get_instance(FileSerializer).readable_serialize(graph.root, file_name)
+    num_bytes = os.path.getsize(file_name)
+
+    def run():
+        file_deserializer.readable_deserialize(file_name)
+        return num_bytes
+
+    return run
+
+
+# A benchmark prepares a function that runs the measured operation once and returns the number of bytes it wrote or
+# read.
+BENCHMARKS: Dict[str, Callable[[BenchmarkContext, SyntheticGraph], Callable[[], int]]] = {
+    "build": prepare_build,
+    "binary_serialize": prepare_binary_serialize,
+    "binary_deserialize": prepare_binary_deserialize,
+    "readable_serialize": prepare_readable_serialize,
+    "readable_deserialize": prepare_readable_deserialize,
+}
+
+
+def create_benchmark_injector():
+    return create_injector(HanaBaseModule, HanaSerializeModule, HanaGfxbaseSerializeModule, *BENCHMARK_MODULES)
+
+
+def measure(run: Callable[[], int], repeat: int):
+    """
+    Return the fastest time of repeat runs, the number of bytes of the last run and the peak memory of one more run.
+    """
+    best_seconds = float("inf")
+    num_bytes = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        num_bytes = run()
+        best_seconds = min(best_seconds, time.perf_counter() - start)
+    # tracemalloc slows the allocations down, so the run that measures the memory is not timed.
+    tracemalloc.start()
+    try:
+        run()
+        _, peak_memory_bytes = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return best_seconds, num_bytes, peak_memory_bytes
+
+
+def run_benchmarks(graph_names: Optional[List[str]] = None,
+                   benchmark_names: Optional[List[str]] = None,
+                   size: int = DEFAULT_SIZE,
+                   repeat: int = DEFAULT_REPEAT) -> List[BenchmarkResult]:
+    if graph_names is None:
+        graph_names = list(GRAPH_GENERATORS.keys())
+    if benchmark_names is None:
+        benchmark_names = list(BENCHMARKS.keys())
+    injector = create_benchmark_injector()
+    results = []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for graph_name in graph_names:
+            graph = GRAPH_GENERATORS[graph_name](injector, size)
+            context = BenchmarkContext(injector, graph_name, size, temp_dir)
+            for benchmark_name in benchmark_names:
+                run = BENCHMARKS[benchmark_name](context, graph)
+                seconds, num_bytes, peak_memory_bytes = measure(run, repeat)
+                results.append(BenchmarkResult(
+                    graph=graph_name,
+                    benchmark=benchmark_name,
+                    size=size,
+                    num_objects=graph.num_objects,
+                    num_bytes=num_bytes,
+                    seconds=seconds,
+                    objects_per_second=graph.num_objects / seconds,
+                    megabytes_per_second=num_bytes / seconds / 1e6 if num_bytes > 0 else None,
+                    peak_memory_bytes=peak_memory_bytes))
+    return results
+
+
+def get_git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True,
+            text=True,
+            check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def results_to_json(results: List[BenchmarkResult], repeat: int) -> Dict[str, Any]:
+    return {
+        "created": datetime.datetime.now().isoformat(),
+        "commit": get_git_commit(),
+        "python_version": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "results": [result._asdict() for result in results],
+    }
+
+
+def format_results(results: List[BenchmarkResult], baseline: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Format the results as a table. If baseline is the JSON of an earlier run, also show how many times faster each
+    benchmark has become.
+    """
+    baseline_seconds = {}
+    if baseline is not None:
+        for result in baseline["results"]:
+            baseline_seconds[(result["graph"], result["benchmark"], result["size"])] = result["seconds"]
+    lines = ["%-16s %-22s %12s %12s %10s %12s" % ("graph", "benchmark", "seconds", "objects/s", "MB/s", "peak MB")]
+    for result in results:
+        megabytes_per_second = "-" if result.megabytes_per_second is None else "%.2f" % result.megabytes_per_second
+        line = "%-16s %-22s %12.6f %12.0f %10s %12.2f" % (
+            result.graph,
+            result.benchmark,
+            result.seconds,
+            result.objects_per_second,
+            megabytes_per_second,
+            result.peak_memory_bytes / 1e6)
+        key = (result.graph, result.benchmark, result.size)
+        if key in baseline_seconds:
+            line += " %8.2fx" % (baseline_seconds[key] / result.seconds)
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def main(args: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Benchmark the serialization of synthetic object graphs.")
+    parser.add_argument("--graphs", nargs="+", choices=list(GRAPH_GENERATORS.keys()), default=None)
+    parser.add_argument("--benchmarks", nargs="+", choices=list(BENCHMARKS.keys()), default=None)
+    parser.add_argument("--size", type=int, default=DEFAULT_SIZE, help="the size passed to the graph generators")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="the number of timed runs")
+    parser.add_argument("--output", default=None, help="the JSON file to save the results to")
+    parser.add_argument("--baseline", default=None, help="the JSON file of an earlier run to compare with")
+    parsed = parser.parse_args(args)
+
+    # json encodes and decodes the readable form of the deep graph recursively.
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 10000))
+    results = run_benchmarks(parsed.graphs, parsed.benchmarks, parsed.size, parsed.repeat)
+    baseline = None
+    if parsed.baseline is not None:
+        with open(parsed.baseline, "rt", encoding="utf-8") as fin:
+            baseline = json.load(fin)
+    print(format_results(results, baseline))
+    if parsed.output is not None:
+        with open(parsed.output, "wt", encoding="utf-8") as fout:
+            json.dump(results_to_json(results, parsed.repeat), fout, indent=2)
+
+
+if __name__ == "__main__":
+    main()
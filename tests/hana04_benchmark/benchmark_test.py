@@ -0,0 +1,50 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import TestCase, TestSuite
+
+from hana04_benchmark.benchmark import BENCHMARKS, format_results, main, run_benchmarks, results_to_json
+from hana04_benchmark.graphs import GRAPH_GENERATORS
+
+
+class BenchmarkTest(TestCase):
+    """
+    Runs the benchmarks on tiny graphs so that they do not break unnoticed.
+    """
+
+    def test_run_benchmarks(self):
+        results = run_benchmarks(size=20, repeat=1)
+
+        self.assertEqual(len(results), len(GRAPH_GENERATORS) * len(BENCHMARKS))
+        for result in results:
+            self.assertGreater(result.seconds, 0)
+            self.assertGreater(result.num_objects, 0)
+            self.assertGreater(result.peak_memory_bytes, 0)
+            if result.benchmark == "build":
+                self.assertIsNone(result.megabytes_per_second)
+            else:
+                self.assertGreater(result.num_bytes, 0)
+
+    def test_json_output_and_comparison(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            output = os.path.join(temp_dir, "results.json")
+            main(["--graphs", "wide", "gfx_heavy", "--size", "10", "--repeat", "1", "--output", output])
+            with open(output, "rt", encoding="utf-8") as fin:
+                baseline = json.load(fin)
+
+        self.assertEqual(len(baseline["results"]), 2 * len(BENCHMARKS))
+        self.assertEqual(baseline["results"][0]["graph"], "wide")
+        results = run_benchmarks(["wide"], ["binary_serialize"], size=10, repeat=1)
+        table = format_results(results, baseline)
+        self.assertEqual(len(table.split("\n")), 2)
+        self.assertTrue(table.endswith("x"))
+        json.dumps(results_to_json(results, 1))
+
+
+def define_test_suite(suite: TestSuite):
+    suite.addTest(unittest.makeSuite(BenchmarkTest))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,226 @@
+from typing import Any, Callable, Dict, List, NamedTuple
+
+import numpy
+
+from hana04.apt.extensible.hana_meta import hana_module
+from hana04.apt.extensible.hana_object_decorators import hana_object, hana_property
+from hana04.apt.extensible.hana_object_meta import HanaObjectMeta
+from hana04.base.changeprop.variable import Variable
+from hana04.base.extension.hana_object import HanaObject
+from hana04.gfxbase.gfxtype.aabb3d import Aabb3d
+from hana04.gfxbase.gfxtype.point3d import Point3d
+from hana04.gfxbase.gfxtype.quat4d import Quat4d
+from hana04.gfxbase.gfxtype.transform import Transform
+from hana04.gfxbase.gfxtype.vector3d import Vector3d
+
+
+@hana_object
+class BenchNode(HanaObject):
+    _HANA_META = HanaObjectMeta(
+        type_id=-10070,
+        type_names=["BenchNode"])
+
+    @hana_property(_HANA_META, 1)
+    def value(self) -> numpy.int32:
+        pass
+
+    @hana_property(_HANA_META, 2)
+    def name(self) -> str:
+        pass
+
+    @hana_property(_HANA_META, 3)
+    def children(self) -> List[HanaObject]:
+        pass
+
+
+@hana_object
+class BenchLists(HanaObject):
+    _HANA_META = HanaObjectMeta(
+        type_id=-10071,
+        type_names=["BenchLists"])
+
+    @hana_property(_HANA_META, 1)
+    def ints(self) -> List[numpy.int32]:
+        pass
+
+    @hana_property(_HANA_META, 2)
+    def floats(self) -> List[numpy.float64]:
+        pass
+
+    @hana_property(_HANA_META, 3)
+    def strings(self) -> List[str]:
+        pass
+
+
+@hana_object
+class BenchDicts(HanaObject):
+    _HANA_META = HanaObjectMeta(
+        type_id=-10072,
+        type_names=["BenchDicts"])
+
+    @hana_property(_HANA_META, 1)
+    def scores(self) -> Dict[str, numpy.float64]:
+        pass
+
+    @hana_property(_HANA_META, 2)
+    def labels(self) -> Dict[numpy.int32, str]:
+        pass
+
+
+@hana_object
+class BenchVariables(HanaObject):
+    _HANA_META = HanaObjectMeta(
+        type_id=-10073,
+        type_names=["BenchVariables"])
+
+    @hana_property(_HANA_META, 1)
+    def count(self) -> Variable[numpy.int32]:
+        pass
+
+    @hana_property(_HANA_META, 2)
+    def label(self) -> Variable[str]:
+        pass
+
+    @hana_property(_HANA_META, 3)
+    def weights(self) -> Variable[List[numpy.float64]]:
+        pass
+
+
+@hana_object
+class BenchGfx(HanaObject):
+    _HANA_META = HanaObjectMeta(
+        type_id=-10074,
+        type_names=["BenchGfx"])
+
+    @hana_property(_HANA_META, 1)
+    def position(self) -> Vector3d:
+        pass
+
+    @hana_property(_HANA_META, 2)
+    def rotation(self) -> Quat4d:
+        pass
+
+    @hana_property(_HANA_META, 3)
+    def transform(self) -> Transform:
+        pass
+
+    @hana_property(_HANA_META, 4)
+    def bounds(self) -> Aabb3d:
+        pass
+
+    @hana_property(_HANA_META, 5)
+    def points(self) -> List[Point3d]:
+        pass
+
+
+BENCHMARK_CLASSES = [BenchNode, BenchLists, BenchDicts, BenchVariables, BenchGfx]
+BENCHMARK_MODULES = [hana_module(cls) for cls in BENCHMARK_CLASSES]
+
+
+class SyntheticGraph(NamedTuple):
+    root: Any
+    # The number of HanaObjects and gfx values in the graph.
+    num_objects: int
+
+
+def builder(injector: Any, cls):
+    return injector.get_instance(cls._HANA_META.default_builder_class)
+
+
+def create_node(injector: Any, value: int, children: List[HanaObject]) -> BenchNode:
+    return builder(injector, BenchNode) \
+        .setValue(numpy.int32(value)) \
+        .setName("node%d" % value) \
+        .addChildren(*children) \
+        .build()
+
+
+def generate_wide(injector: Any, size: int) -> SyntheticGraph:
+    """
+    A root with size leaf children.
+    """
+    leaves = [create_node(injector, i, []) for i in range(size)]
+    return SyntheticGraph(create_node(injector, -1, leaves), size + 1)
+
+
+def generate_deep(injector: Any, size: int) -> SyntheticGraph:
+    """
+    A chain of size // 10 + 1 nodes, each the only child of the one before it. The chain is shorter than the other
+    graphs because the indentation of its readable form grows with its depth.
+    """
+    num_nodes = size // 10 + 1
+    node = create_node(injector, 0, [])
+    for i in range(1, num_nodes):
+        node = create_node(injector, i, [node])
+    return SyntheticGraph(node, num_nodes)
+
+
+def generate_list_heavy(injector: Any, size: int) -> SyntheticGraph:
+    """
+    size // 100 + 1 objects, each with lists of 100 integers, floats and strings.
+    """
+    num_holders = size // 100 + 1
+    holders = [
+        builder(injector, BenchLists)
+            .addInts(*[numpy.int32(i * 100 + j) for j in range(100)])
+            .addFloats(*[numpy.float64(i + j / 100.0) for j in range(100)])
+            .addStrings(*["item%d" % j for j in range(100)])
+            .build()
+        for i in range(num_holders)]
+    return SyntheticGraph(create_node(injector, -1, holders), num_holders + 1)
+
+
+def generate_dict_heavy(injector: Any, size: int) -> SyntheticGraph:
+    """
+    size // 100 + 1 objects, each with two maps of 100 entries.
+    """
+    num_holders = size // 100 + 1
+    holders = []
+    for i in range(num_holders):
+        holder_builder = builder(injector, BenchDicts)
+        for j in range(100):
+            holder_builder.putScores("key%d" % j, numpy.float64(i + j / 100.0))
+            holder_builder.putLabels(numpy.int32(j), "label%d" % j)
+        holders.append(holder_builder.build())
+    return SyntheticGraph(create_node(injector, -1, holders), num_holders + 1)
+
+
+def generate_variable_heavy(injector: Any, size: int) -> SyntheticGraph:
+    """
+    size objects whose properties are Variables.
+    """
+    holders = [
+        builder(injector, BenchVariables)
+            .setCount(numpy.int32(i))
+            .setLabel("variable%d" % i)
+            .addWeights(*[numpy.float64(j) for j in range(8)])
+            .build()
+        for i in range(size)]
+    return SyntheticGraph(create_node(injector, -1, holders), size + 1)
+
+
+def generate_gfx_heavy(injector: Any, size: int) -> SyntheticGraph:
+    """
+    size // 10 + 1 objects, each with a vector, a quaternion, a transform, a bounding box and 10 points.
+    """
+    num_holders = size // 10 + 1
+    holders = [
+        builder(injector, BenchGfx)
+            .setPosition(Vector3d(i, i + 1, i + 2))
+            .setRotation(Quat4d(1.0, 0.0, 0.0, 0.0))
+            .setTransform(Transform())
+            .setBounds(Aabb3d(Point3d(0.0, 0.0, 0.0), Point3d(i, i, i)))
+            .addPoints(*[Point3d(i, j, 0.0) for j in range(10)])
+            .build()
+        for i in range(num_holders)]
+    return SyntheticGraph(create_node(injector, -1, holders), num_holders * 15 + 1)
+
+
+GRAPH_GENERATORS: Dict[str, Callable[[Any, int], SyntheticGraph]] = {
+    "wide": generate_wide,
+    "deep": generate_deep,
+    "list_heavy": generate_list_heavy,
+    "dict_heavy": generate_dict_heavy,
+    "variable_heavy": generate_variable_heavy,
+    "gfx_heavy": generate_gfx_heavy,
+}
@@ -134,6 +134,35 @@ class HanaLateDeserializableDecoratorsTest(unittest.TestCase):
         self.assertEqual(aaa.stringListField().value(), ["111", "222", "333"])
         self.assertEqual(aaa.stringBooleanMapField().value(), {"key-1": True, "key-2": False})
 
+    def test_readable_deserialize_props(self):
+        aaa: Aaa = self.injector.get_instance(AaaBuilder).build()
+        deserializer: ReadableDeserializer = self.injector.get_instance(ReadableDeserializer.Factory).create()
+
+        aaa.readable_deserialize(
+            {
+                "type": "Aaa",
+                "props": {
+                    "stringField": {"type": "String", "value": "abc"},
+                    "stringListField": [
+                        {"type": "String", "value": "111"},
+                        {"type": "String", "value": "222"},
+                    ],
+                    "stringBooleanMapField": [
+                        {
+                            "type": "HanaMapEntry",
+                            "key": {"type": "String", "value": "key-1"},
+                            "value": {"type": "Boolean", "value": True},
+                        },
+                    ],
+                    "unknownField": {"type": "String", "value": "ignored"},
+                }
+            },
+            deserializer)
+
+        self.assertEqual(aaa.stringField().value(), "abc")
+        self.assertEqual(aaa.stringListField().value(), ["111", "222"])
+        self.assertEqual(aaa.stringBooleanMapField().value(), {"key-1": True})
+
     def test_binary_deserialize(self):
         aaa: Aaa = self.injector.get_instance(AaaBuilder).build()
         deserializer: BinaryDeserializer = self.injector.get_instance(BinaryDeserializer.Factory).create()
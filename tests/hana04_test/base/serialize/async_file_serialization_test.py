@@ -0,0 +1,171 @@
+import asyncio
+import os
+import tempfile
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase, TestSuite
+
+import numpy
+
+from hana04.base.module import HanaBaseModule
+from hana04.base.serialize.async_file_deserializer import AsyncFileDeserializer
+from hana04.base.serialize.async_file_serializer import AsyncFileSerializer
+from hana04.base.serialize.file_serializer import FileSerializer
+from hana04.base.serialize.profiling import SerializationProfile, READABLE_SERIALIZE, BINARY_SERIALIZE, \
+    READABLE_DESERIALIZE, BINARY_DESERIALIZE
+from hana04.base.serialize.readable.constants import READABLE_LAYOUT_PROPS, READABLE_IDS_SEQUENTIAL
+from hana04.base.util.compression import COMPRESSED_FILE_MAGIC, COMPRESSION_ZLIB
+from hana04.serialize.module import HanaSerializeModule
+from jyuusu.injectors import create_injector
+
+
+class AsyncFileSerializationTest(TestCase):
+    def setUp(self):
+        self.injector = create_injector(
+            HanaBaseModule,
+            HanaSerializeModule)
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_concurrent_round_trips(self):
+        async def save_and_load():
+            async with self.injector.get_instance(AsyncFileSerializer.Factory).create() as serializer, \
+                    self.injector.get_instance(AsyncFileDeserializer.Factory).create() as deserializer:
+                binary_names = [os.path.join(self.temp_dir.name, "%d.hana" % i) for i in range(8)]
+                readable_names = [os.path.join(self.temp_dir.name, "%d.json" % i) for i in range(8)]
+                await asyncio.gather(
+                    *[serializer.binary_serialize(numpy.int32(i), name) for i, name in enumerate(binary_names)],
+                    *[serializer.readable_serialize("item %d" % i, name) for i, name in enumerate(readable_names)])
+                return await asyncio.gather(
+                    *[deserializer.binary_deserialize(name) for name in binary_names],
+                    *[deserializer.readable_deserialize(name) for name in readable_names])
+
+        results = asyncio.run(save_and_load())
+
+        self.assertEqual(results[:8], [numpy.int32(i) for i in range(8)])
+        self.assertEqual(results[8:], ["item %d" % i for i in range(8)])
+
+    def test_compressed_binary_round_trip(self):
+        file_name = os.path.join(self.temp_dir.name, "data.hana")
+
+        async def save_and_load():
+            async with self.injector.get_instance(AsyncFileSerializer.Factory).create() as serializer, \
+                    self.injector.get_instance(AsyncFileDeserializer.Factory).create() as deserializer:
+                await serializer.binary_serialize(numpy.int32(10), file_name, compression=COMPRESSION_ZLIB)
+                return await deserializer.binary_deserialize(file_name)
+
+        self.assertEqual(asyncio.run(save_and_load()), numpy.int32(10))
+        with open(file_name, "rb") as fin:
+            self.assertTrue(fin.read().startswith(COMPRESSED_FILE_MAGIC))
+
+    def test_options_are_forwarded(self):
+        readable_name = os.path.join(self.temp_dir.name, "data.json")
+        binary_name = os.path.join(self.temp_dir.name, "data.hana")
+        profile = SerializationProfile()
+        file_serializer = self.injector.get_instance(FileSerializer)
+        readable_serialize = file_serializer.readable_serialize
+        readable_serialize_args = []
+
+        def recording_readable_serialize(*args):
+            readable_serialize_args.append(args)
+            readable_serialize(*args)
+
+        file_serializer.readable_serialize = recording_readable_serialize
+
+        async def save_and_load():
+            async with self.injector.get_instance(AsyncFileSerializer.Factory).create() as serializer, \
+                    self.injector.get_instance(AsyncFileDeserializer.Factory).create() as deserializer:
+                await serializer.readable_serialize(
+                    numpy.int32(1),
+                    readable_name,
+                    profile=profile,
+                    indent=None,
+                    layout=READABLE_LAYOUT_PROPS,
+                    id_strategy=READABLE_IDS_SEQUENTIAL)
+                await serializer.binary_serialize(numpy.int32(2), binary_name, profile=profile)
+                return await asyncio.gather(
+                    deserializer.readable_deserialize(readable_name, profile),
+                    deserializer.binary_deserialize(binary_name, profile))
+
+        self.assertEqual(asyncio.run(save_and_load()), [numpy.int32(1), numpy.int32(2)])
+        self.assertEqual(readable_serialize_args[0][-2:], (READABLE_LAYOUT_PROPS, READABLE_IDS_SEQUENTIAL))
+        with open(readable_name, "rt", encoding="utf-8") as fin:
+            self.assertNotIn("\n", fin.read())
+        for operation in [READABLE_SERIALIZE, BINARY_SERIALIZE, READABLE_DESERIALIZE, BINARY_DESERIALIZE]:
+            self.assertGreater(len(profile.get_type_profiles(operation)), 0)
+
+    def test_saves_are_bounded_by_max_concurrent_saves(self):
+        lock = threading.Lock()
+        counts = {"running": 0, "max_running": 0}
+        file_serializer = self.injector.get_instance(FileSerializer)
+        binary_serialize = file_serializer.binary_serialize
+
+        def counting_binary_serialize(*args):
+            with lock:
+                counts["running"] += 1
+                counts["max_running"] = max(counts["max_running"], counts["running"])
+            time.sleep(0.05)
+            binary_serialize(*args)
+            with lock:
+                counts["running"] -= 1
+
+        async def save():
+            async with self.injector.get_instance(AsyncFileSerializer.Factory).create(2) as serializer:
+                serializer.file_serializer = FileSerializerProxy(file_serializer, counting_binary_serialize)
+                await asyncio.gather(*[
+                    serializer.binary_serialize(numpy.int32(i), os.path.join(self.temp_dir.name, "%d.hana" % i))
+                    for i in range(8)
+                ])
+
+        asyncio.run(save())
+
+        self.assertEqual(counts["running"], 0)
+        self.assertEqual(counts["max_running"], 2)
+
+    def test_aclose_does_not_block_event_loop(self):
+        for factory_class in [AsyncFileSerializer.Factory, AsyncFileDeserializer.Factory]:
+            with self.subTest(factory_class=factory_class.__qualname__):
+                release = threading.Event()
+                timer = threading.Timer(0.2, release.set)
+
+                async def close_while_running():
+                    num_ticks = 0
+                    async with self.injector.get_instance(factory_class).create() as async_object:
+                        running = async_object.executor.submit(release.wait)
+                        timer.start()
+                        closing = asyncio.ensure_future(async_object.aclose())
+                        while not closing.done():
+                            num_ticks += 1
+                            await asyncio.sleep(0.01)
+                    self.assertTrue(running.done())
+                    return num_ticks
+
+                self.assertGreater(asyncio.run(close_while_running()), 5)
+                timer.join()
+
+    def test_given_executor_is_not_shut_down(self):
+        executor = ThreadPoolExecutor(max_workers=1)
+        serializer = self.injector.get_instance(AsyncFileSerializer.Factory).create(executor=executor)
+
+        serializer.close()
+
+        self.assertEqual(executor.submit(lambda: 1).result(), 1)
+        executor.shutdown()
+
+
+class FileSerializerProxy:
+    def __init__(self, file_serializer: FileSerializer, binary_serialize):
+        self.file_serializer = file_serializer
+        self.binary_serialize = binary_serialize
+
+
+def define_test_suite(suite: TestSuite):
+    suite.addTest(unittest.makeSuite(AsyncFileSerializationTest))
+
+
+if __name__ == "__main__":
+    unittest.main()
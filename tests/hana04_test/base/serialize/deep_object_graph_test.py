@@ -0,0 +1,205 @@
+import os
+import tempfile
+import unittest
+from io import BytesIO
+from typing import Dict, List, Optional
+from unittest import TestCase, TestSuite
+
+import msgpack
+import numpy
+
+from hana04.apt.extensible.hana_meta import hana_module
+from hana04.apt.extensible.hana_object_decorators import hana_object, hana_property
+from hana04.apt.extensible.hana_object_meta import HanaObjectMeta
+from hana04.base.caching.wrapped import Wrapped, Direct
+from hana04.base.extension.hana_object import HanaObject
+from hana04.base.module import HanaBaseModule
+from hana04.base.serialize.binary.binary_deserializer import BinaryDeserializer
+from hana04.base.serialize.binary.binary_serializer import BinarySerializer
+from hana04.base.serialize.binary.constants import BINARY_FORMAT_VERSION
+from hana04.base.serialize.file_deserializer import FileDeserializer
+from hana04.base.serialize.file_serializer import FileSerializer
+from hana04.base.serialize.profiling import SerializationProfile, READABLE_SERIALIZE
+from hana04.base.serialize.readable.readable_deserializer import ReadableDeserializer
+from hana04.base.serialize.readable.readable_serializer import ReadableSerializer
+from hana04.base.util.message_packer import MessagePacker
+from hana04.serialize.module import HanaSerializeModule
+from jyuusu.factory_resolver import factory_class
+from jyuusu.injectors import create_injector
+
+
+@hana_object
+class DeepNode(HanaObject):
+    _HANA_META = HanaObjectMeta(
+        type_id=-10040,
+        type_names=["DeepNode"])
+
+    @hana_property(_HANA_META, 1)
+    def value(self) -> numpy.int32:
+        pass
+
+    @hana_property(_HANA_META, 2)
+    def next(self) -> Optional[HanaObject]:
+        pass
+
+    @hana_property(_HANA_META, 3)
+    def wrappedNext(self) -> Optional[Wrapped[HanaObject]]:
+        pass
+
+    @hana_property(_HANA_META, 4)
+    def children(self) -> List[HanaObject]:
+        pass
+
+    @hana_property(_HANA_META, 5)
+    def namedChildren(self) -> Dict[str, HanaObject]:
+        pass
+
+    @hana_property(_HANA_META, 6)
+    def shared(self) -> Optional[HanaObject]:
+        pass
+
+
+class DeepObjectGraphTest(TestCase):
+    """
+    The chains are deep enough that serializing them recursively would exceed the recursion limit.
+    """
+
+    def setUp(self):
+        self.injector = create_injector(
+            HanaBaseModule,
+            HanaSerializeModule,
+            hana_module(DeepNode))
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def create(self, **values) -> DeepNode:
+        raw_data = DeepNode._HANA_META.raw_data_class()
+        for name, value in values.items():
+            setattr(raw_data, name, value)
+        return self.injector.get_instance(factory_class(DeepNode._HANA_META.impl_class)).create(raw_data)
+
+    def create_chain(self, length: int, num_kinds: int = 4) -> DeepNode:
+        """
+        Create a chain of nodes with values 0, ..., length - 1 that links each node to the next through each of the
+        first num_kinds kinds of property in turn. Every tenth node also refers to a node shared by the whole chain.
+        The first two kinds refer to the next node directly, so ReadableStreamWriter writes chains of them a piece at
+        a time.
+        """
+        shared = self.create(value=numpy.int32(-1))
+        node = None
+        for i in reversed(range(length)):
+            values = {"value": numpy.int32(i)}
+            if node is not None:
+                kind = i % num_kinds
+                if kind == 0:
+                    values["next"] = node
+                elif kind == 1:
+                    values["children"] = [node]
+                elif kind == 2:
+                    values["wrappedNext"] = Direct.of(node)
+                else:
+                    values["namedChildren"] = {"next": node}
+            if i % 10 == 0:
+                values["shared"] = shared
+            node = self.create(**values)
+        return node
+
+    def assert_chain(self, node: DeepNode, length: int, num_kinds: int = 4):
+        shared = None
+        for i in range(length):
+            self.assertTrue(isinstance(node, DeepNode))
+            self.assertEqual(node.value(), i)
+            if i % 10 == 0:
+                if shared is None:
+                    shared = node.shared()
+                    self.assertEqual(shared.value(), -1)
+                self.assertIs(node.shared(), shared)
+            else:
+                self.assertIsNone(node.shared())
+            kind = i % num_kinds
+            if kind == 0:
+                node = node.next()
+            elif kind == 1:
+                node = node.children()[0] if len(node.children()) > 0 else None
+            elif kind == 2:
+                node = node.wrappedNext().value if node.wrappedNext() is not None else None
+            else:
+                node = node.namedChildren().get("next")
+        self.assertIsNone(node)
+
+    def test_binary_file_round_trip(self):
+        file_name = os.path.join(self.temp_dir.name, "chain.hanab")
+        self.injector.get_instance(FileSerializer).binary_serialize(self.create_chain(5000), file_name)
+
+        self.assert_chain(self.injector.get_instance(FileDeserializer).binary_deserialize(file_name), 5000)
+
+    def test_indexed_archive_round_trip(self):
+        file_name = os.path.join(self.temp_dir.name, "chain.hanaidx")
+        self.injector.get_instance(FileSerializer).indexed_archive_serialize(self.create_chain(5000), file_name)
+
+        with self.injector.get_instance(FileDeserializer).open_indexed_archive(file_name) as archive:
+            self.assert_chain(archive.root(), 5000)
+
+    def test_readable_round_trip(self):
+        json = self.injector.get_instance(ReadableSerializer.Factory).create().serialize(self.create_chain(5000))
+
+        self.assert_chain(self.injector.get_instance(ReadableDeserializer.Factory).create().deserialize(json), 5000)
+
+    def test_readable_file_round_trip(self):
+        file_name = os.path.join(self.temp_dir.name, "chain.json")
+        for profile in [None, SerializationProfile()]:
+            with self.subTest(profile=profile):
+                # Indenting the JSON would make the file grow with the square of the length of the chain.
+                self.injector.get_instance(FileSerializer).readable_serialize(
+                    self.create_chain(5000, num_kinds=2), file_name, profile=profile, indent=None)
+
+                node = self.injector.get_instance(FileDeserializer).readable_deserialize(file_name, profile)
+                self.assert_chain(node, 5000, num_kinds=2)
+
+    def test_profiled_readable_file_serialization(self):
+        file_name = os.path.join(self.temp_dir.name, "chain.json")
+        profile = SerializationProfile()
+
+        self.injector.get_instance(FileSerializer).readable_serialize(
+            self.create_chain(3000, num_kinds=2), file_name, profile=profile)
+
+        type_profile = profile.get_type_profile(READABLE_SERIALIZE, "DeepNode")
+        self.assertEqual(type_profile.num_calls, 3001)
+
+    def test_binary_value_round_trip(self):
+        # msgpack itself limits how deeply values can be nested.
+        for format_version in range(1, BINARY_FORMAT_VERSION + 1):
+            with self.subTest(format_version=format_version):
+                out = BytesIO()
+                serializer = self.injector.get_instance(BinarySerializer.Factory).create(
+                    MessagePacker(out), format_version=format_version)
+                serializer.serialize(self.create_chain(300))
+                value = msgpack.unpackb(out.getvalue(), strict_map_key=False)
+
+                deserializer = self.injector.get_instance(BinaryDeserializer.Factory).create()
+                self.assert_chain(deserializer.deserialize(value), 300)
+
+    def test_paused_serialization_writes_same_bytes(self):
+        chain = self.create_chain(100)
+        factory = self.injector.get_instance(BinarySerializer.Factory)
+        expected = BytesIO()
+        factory.create(MessagePacker(expected), format_version=BINARY_FORMAT_VERSION).serialize(chain)
+
+        out = BytesIO()
+        work_stack = factory.create(MessagePacker(out), format_version=BINARY_FORMAT_VERSION).start_serialize(chain)
+        num_runs = 1
+        while not work_stack.run(max_steps=3):
+            num_runs += 1
+
+        self.assertGreater(num_runs, 1)
+        self.assertEqual(out.getvalue(), expected.getvalue())
+
+
+def define_test_suite(suite: TestSuite):
+    suite.addTest(unittest.makeSuite(DeepObjectGraphTest))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import unittest
+from io import BytesIO
+from unittest import TestCase, TestSuite
+
+import msgpack
+import numpy
+
+from hana04.apt.extensible.hana_meta import hana_module
+from hana04.apt.extensible.hana_object_decorators import hana_object, hana_property
+from hana04.apt.extensible.hana_object_meta import HanaObjectMeta
+from hana04.base.extension.hana_object import HanaObject
+from hana04.base.module import HanaBaseModule
+from hana04.base.serialize.binary.binary_serializer import BinarySerializer
+from hana04.base.serialize.binary.constants import TYPE_TAG, VALUE_TAG, UUID_TAG
+from hana04.base.serialize.readable.readable_serializer import ReadableSerializer
+from hana04.base.type_ids import TYPE_ID_LOOKUP
+from hana04.base.util.message_packer import MessagePacker
+from hana04.serialize.module import HanaSerializeModule
+from jyuusu.factory_resolver import factory_class
+from jyuusu.injectors import create_injector
+
+
+@hana_object
+class Aaa(HanaObject):
+    _HANA_META = HanaObjectMeta(
+        type_id=-10010,
+        type_names=["Aaa"])
+
+    @hana_property(_HANA_META, 1)
+    def intField(self) -> numpy.int32:
+        pass
+
+
+class DispatchCacheTest(TestCase):
+    def setUp(self):
+        self.injector = create_injector(
+            HanaBaseModule,
+            HanaSerializeModule,
+            hana_module(Aaa))
+
+    def create_aaa(self) -> Aaa:
+        raw_data = Aaa._HANA_META.raw_data_class()
+        raw_data.intField = numpy.int32(10)
+        return self.injector.get_instance(factory_class(Aaa._HANA_META.impl_class)).create(raw_data)
+
+    def test_binary_dispatch_cache_is_warmed_up_and_shared(self):
+        factory: BinarySerializer.Factory = self.injector.get_instance(BinarySerializer.Factory)
+        aaa = self.create_aaa()
+
+        self.assertTrue(numpy.int32 in factory.dispatch_cache.encoders)
+        self.assertFalse(aaa.__class__ in factory.dispatch_cache.encoders)
+        first = factory.create(MessagePacker(BytesIO()))
+        first.serialize(aaa)
+        second = factory.create(MessagePacker(BytesIO()))
+
+        self.assertTrue(aaa.__class__ in factory.dispatch_cache.encoders)
+        self.assertIs(first.encoders, second.encoders)
+
+    def test_binary_dispatch_cache_packs_lookups(self):
+        factory: BinarySerializer.Factory = self.injector.get_instance(BinarySerializer.Factory)
+        aaa = self.create_aaa()
+        buffer = BytesIO()
+        serializer = factory.create(MessagePacker(buffer))
+
+        serializer.serialize(aaa)
+        serializer.serialize(aaa)
+
+        unpacker = msgpack.Unpacker(strict_map_key=False)
+        unpacker.feed(buffer.getvalue())
+        first, second = list(unpacker)
+        self.assertEqual(second, {TYPE_TAG: TYPE_ID_LOOKUP, VALUE_TAG: first[UUID_TAG]})
+
+    def test_readable_dispatch_cache_is_warmed_up_and_shared(self):
+        factory: ReadableSerializer.Factory = self.injector.get_instance(ReadableSerializer.Factory)
+        aaa = self.create_aaa()
+
+        self.assertTrue(numpy.int32 in factory.dispatch_cache.encoders)
+        first = factory.create()
+        serialized = first.serialize(aaa, "field")
+        lookup = first.serialize(aaa, "other")
+        second = factory.create()
+
+        self.assertTrue(aaa.__class__ in factory.dispatch_cache.encoders)
+        self.assertIs(first.encoders, second.encoders)
+        self.assertEqual(lookup, {"type": "LookUp", "id": serialized["id"], "func": "other"})
+
+
+def define_test_suite(suite: TestSuite):
+    suite.addTest(unittest.makeSuite(DispatchCacheTest))
+
+
+if __name__ == "__main__":
+    unittest.main()
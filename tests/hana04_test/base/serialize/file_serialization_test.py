@@ -0,0 +1,159 @@
+import mmap
+import os
+import tempfile
+import unittest
+from unittest import TestCase, TestSuite
+
+import msgpack
+import numpy
+
+from hana04.base.filesystem.file_path import FilePath
+from hana04.base.module import HanaBaseModule
+from hana04.base.serialize.binary.constants import BINARY_FILE_MAGIC, BINARY_FORMAT_VERSION, TYPE_TAG, VALUE_TAG
+from hana04.base.serialize.file_deserializer import FileDeserializer
+from hana04.base.serialize.file_serializer import FileSerializer
+from hana04.base.util.compression import COMPRESSED_FILE_MAGIC, COMPRESSION_BZ2, COMPRESSION_LZMA, \
+    COMPRESSION_ZLIB
+from hana04.serialize.module import HanaSerializeModule
+from hana04.serialize.type_ids import TYPE_ID_INTEGER
+from jyuusu.injectors import create_injector
+
+
+class BinaryFileSerializationTest(TestCase):
+    def setUp(self):
+        self.injector = create_injector(
+            HanaBaseModule,
+            HanaSerializeModule)
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_binary_file_has_header(self):
+        file_serializer: FileSerializer = self.injector.get_instance(FileSerializer)
+        file_name = os.path.join(self.temp_dir.name, "sub", "data.hana")
+
+        file_serializer.binary_serialize(numpy.int32(10), file_name)
+
+        with open(file_name, "rb") as fin:
+            content = fin.read()
+        self.assertTrue(content.startswith(BINARY_FILE_MAGIC))
+        unpacker = msgpack.Unpacker(strict_map_key=False)
+        unpacker.feed(content[len(BINARY_FILE_MAGIC):])
+        self.assertEqual(list(unpacker), [BINARY_FORMAT_VERSION, {TYPE_TAG: TYPE_ID_INTEGER, VALUE_TAG: 10}])
+
+    def test_binary_round_trip(self):
+        file_serializer: FileSerializer = self.injector.get_instance(FileSerializer)
+        file_deserializer: FileDeserializer = self.injector.get_instance(FileDeserializer)
+        file_name = os.path.join(self.temp_dir.name, "data.hana")
+
+        file_serializer.binary_serialize(numpy.int32(10), file_name)
+        deserialized = file_deserializer.binary_deserialize(file_name)
+
+        self.assertEqual(deserialized, numpy.int32(10))
+
+    def test_binary_round_trip_relative_file_path(self):
+        file_serializer: FileSerializer = self.injector.get_instance(FileSerializer)
+        file_deserializer: FileDeserializer = self.injector.get_instance(FileDeserializer)
+        file_name = os.path.join(self.temp_dir.name, "a", "data.hana").replace("\\", "/")
+        image_path = os.path.join(self.temp_dir.name, "b", "image.png").replace("\\", "/")
+
+        file_serializer.binary_serialize(FilePath.relative(image_path), file_name)
+        deserialized = file_deserializer.binary_deserialize(file_name)
+
+        self.assertEqual(deserialized, FilePath.relative(image_path))
+
+    def test_binary_round_trip_ndarray_shares_file_memory(self):
+        file_serializer: FileSerializer = self.injector.get_instance(FileSerializer)
+        file_deserializer: FileDeserializer = self.injector.get_instance(FileDeserializer)
+        file_name = os.path.join(self.temp_dir.name, "array.hana")
+        array = numpy.arange(24, dtype=numpy.float32).reshape(2, 3, 4)
+
+        file_serializer.binary_serialize(array, file_name)
+        deserialized = file_deserializer.binary_deserialize(file_name)
+
+        self.assertTrue(numpy.array_equal(deserialized, array))
+        self.assertEqual(deserialized.dtype, numpy.float32)
+        self.assertFalse(deserialized.flags.writeable)
+        base = deserialized
+        while isinstance(base, numpy.ndarray):
+            base = base.base
+        self.assertTrue(isinstance(base, memoryview))
+        self.assertTrue(isinstance(base.obj, mmap.mmap))
+
+    def test_binary_deserialize_headerless_file(self):
+        file_deserializer: FileDeserializer = self.injector.get_instance(FileDeserializer)
+        file_name = os.path.join(self.temp_dir.name, "legacy.hana")
+        with open(file_name, "wb") as fout:
+            fout.write(msgpack.packb({TYPE_TAG: TYPE_ID_INTEGER, VALUE_TAG: 20}))
+
+        deserialized = file_deserializer.binary_deserialize(file_name)
+
+        self.assertEqual(deserialized, numpy.int32(20))
+
+    def test_binary_deserialize_unsupported_version(self):
+        file_deserializer: FileDeserializer = self.injector.get_instance(FileDeserializer)
+        file_name = os.path.join(self.temp_dir.name, "future.hana")
+        with open(file_name, "wb") as fout:
+            fout.write(BINARY_FILE_MAGIC)
+            fout.write(msgpack.packb(BINARY_FORMAT_VERSION + 1))
+            fout.write(msgpack.packb({TYPE_TAG: TYPE_ID_INTEGER, VALUE_TAG: 20}))
+
+        with self.assertRaises(ValueError):
+            file_deserializer.binary_deserialize(file_name)
+
+    def test_compressed_binary_round_trip(self):
+        file_serializer: FileSerializer = self.injector.get_instance(FileSerializer)
+        file_deserializer: FileDeserializer = self.injector.get_instance(FileDeserializer)
+        array = numpy.zeros((64, 64), dtype=numpy.float64)
+        for compression in [COMPRESSION_ZLIB, COMPRESSION_LZMA, COMPRESSION_BZ2]:
+            with self.subTest(compression=compression):
+                file_name = os.path.join(self.temp_dir.name, "array.%s.hana" % compression)
+
+                file_serializer.binary_serialize(array, file_name, compression=compression)
+                deserialized = file_deserializer.binary_deserialize(file_name)
+
+                with open(file_name, "rb") as fin:
+                    content = fin.read()
+                self.assertTrue(content.startswith(COMPRESSED_FILE_MAGIC))
+                self.assertLess(len(content), array.nbytes // 10)
+                self.assertTrue(numpy.array_equal(deserialized, array))
+
+    def test_compressed_binary_parallel_deserialize_reads_serially(self):
+        file_serializer: FileSerializer = self.injector.get_instance(FileSerializer)
+        file_deserializer: FileDeserializer = self.injector.get_instance(FileDeserializer)
+        file_name = os.path.join(self.temp_dir.name, "data.hana")
+
+        file_serializer.binary_serialize(numpy.int32(10), file_name, compression=COMPRESSION_ZLIB)
+        deserialized = file_deserializer.parallel_binary_deserialize(file_name, None)
+
+        self.assertEqual(deserialized, numpy.int32(10))
+
+    def test_compressed_readable_round_trip(self):
+        file_serializer: FileSerializer = self.injector.get_instance(FileSerializer)
+        file_deserializer: FileDeserializer = self.injector.get_instance(FileDeserializer)
+        for compression in [COMPRESSION_ZLIB, COMPRESSION_LZMA, COMPRESSION_BZ2]:
+            with self.subTest(compression=compression):
+                file_name = os.path.join(self.temp_dir.name, "data.%s.json" % compression)
+
+                file_serializer.readable_serialize(numpy.int32(10), file_name, compression=compression)
+                deserialized = file_deserializer.readable_deserialize(file_name)
+
+                self.assertEqual(deserialized, numpy.int32(10))
+
+    def test_uncompressed_readable_round_trip(self):
+        file_serializer: FileSerializer = self.injector.get_instance(FileSerializer)
+        file_deserializer: FileDeserializer = self.injector.get_instance(FileDeserializer)
+        file_name = os.path.join(self.temp_dir.name, "data.json")
+
+        file_serializer.readable_serialize("\u3042", file_name)
+
+        self.assertEqual(file_deserializer.readable_deserialize(file_name), "\u3042")
+
+
+def define_test_suite(suite: TestSuite):
+    suite.addTest(unittest.makeSuite(BinaryFileSerializationTest))
+
+
+if __name__ == "__main__":
+    unittest.main()
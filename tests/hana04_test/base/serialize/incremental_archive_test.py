@@ -0,0 +1,153 @@
+import os
+import unittest
+from typing import List, Optional
+from unittest import TestSuite
+
+import numpy
+
+from hana04.apt.extensible.hana_object_decorators import hana_object, hana_property
+from hana04.apt.extensible.hana_object_meta import HanaObjectMeta
+from hana04.base.changeprop.variable import Variable
+from hana04.base.extension.hana_object import HanaObject
+from hana04.base.serialize.file_deserializer import FileDeserializer
+from hana04.base.serialize.file_serializer import FileSerializer
+from hana04_test.base.serialize.node_model import NodeTestCase
+
+
+@hana_object
+class Item(HanaObject):
+    _HANA_META = HanaObjectMeta(
+        type_id=-10060,
+        type_names=["Item"])
+
+    @hana_property(_HANA_META, 1)
+    def value(self) -> Variable[numpy.int32]:
+        pass
+
+    @hana_property(_HANA_META, 2)
+    def attachment(self) -> Variable[Optional[HanaObject]]:
+        pass
+
+
+@hana_object
+class Inventory(HanaObject):
+    _HANA_META = HanaObjectMeta(
+        type_id=-10061,
+        type_names=["Inventory"])
+
+    @hana_property(_HANA_META, 1)
+    def items(self) -> List[Item]:
+        pass
+
+
+class IncrementalArchiveTest(NodeTestCase):
+    HANA_CLASSES = [Item, Inventory]
+
+    def setUp(self):
+        super().setUp()
+        self.file_name = os.path.join(self.temp_dir.name, "inventory.hanaidx")
+        self.serializer = self.injector.get_instance(FileSerializer).create_incremental_archive_serializer(
+            self.file_name)
+
+    def create_inventory(self, num_items: int) -> Inventory:
+        return self.create_object(Inventory, items=[self.create_object(Item, value=numpy.int32(i)) for i in range(num_items)])
+
+    def load(self, function):
+        with self.injector.get_instance(FileDeserializer).open_indexed_archive(self.file_name) as archive:
+            return function(archive)
+
+    def test_first_save_writes_everything(self):
+        self.serializer.save(self.create_inventory(10))
+
+        self.assertEqual(self.serializer.num_records_written_by_last_save(), 11)
+        values = self.load(lambda archive: [item.value().value() for item in archive.root().items()])
+        self.assertEqual(values, list(range(10)))
+
+    def test_save_without_changes_writes_no_records(self):
+        inventory = self.create_inventory(10)
+        self.serializer.save(inventory)
+        size = os.path.getsize(self.file_name)
+
+        self.serializer.save(inventory)
+
+        self.assertEqual(self.serializer.num_records_written_by_last_save(), 0)
+        self.assertLess(os.path.getsize(self.file_name) - size, size)
+
+    def test_only_changed_objects_are_written(self):
+        inventory = self.create_inventory(100)
+        self.serializer.save(inventory)
+
+        inventory.items()[42].value().set(numpy.int32(-42))
+        self.serializer.save(inventory)
+
+        self.assertEqual(self.serializer.num_records_written_by_last_save(), 1)
+        values = self.load(lambda archive: [item.value().value() for item in archive.root().items()])
+        self.assertEqual(values, [-42 if i == 42 else i for i in range(100)])
+
+    def test_new_and_removed_objects(self):
+        inventory = self.create_inventory(10)
+        self.serializer.save(inventory)
+
+        attachment = self.create_object(Item, value=numpy.int32(100))
+        attachment.attachment().set(self.create_object(Item, value=numpy.int32(200)))
+        inventory.items()[3].attachment().set(attachment)
+        self.serializer.save(inventory)
+
+        self.assertEqual(self.serializer.num_records_written_by_last_save(), 3)
+        self.assertEqual(
+            self.load(lambda archive: archive.root().items()[3].attachment().value().attachment().value().value().value()),
+            200)
+        self.assertEqual(self.load(lambda archive: len(archive.refs())), 13)
+
+        attachment.value().set(numpy.int32(101))
+        inventory.items()[3].attachment().set(None)
+        self.serializer.save(inventory)
+
+        # The attachment is no longer reachable, so it is neither written nor indexed.
+        self.assertEqual(self.serializer.num_records_written_by_last_save(), 1)
+        self.assertIsNone(self.load(lambda archive: archive.root().items()[3].attachment().value()))
+        self.assertEqual(self.load(lambda archive: len(archive.refs())), 11)
+
+    def test_changed_object_keeps_its_reference(self):
+        inventory = self.create_inventory(3)
+        self.serializer.save(inventory)
+        refs = self.load(lambda archive: archive.refs())
+
+        inventory.items()[1].value().set(numpy.int32(10))
+        self.serializer.save(inventory)
+
+        self.assertEqual(self.load(lambda archive: archive.refs()), refs)
+
+    def test_file_changed_by_others_is_rewritten(self):
+        inventory = self.create_inventory(10)
+        self.serializer.save(inventory)
+        self.injector.get_instance(FileSerializer).indexed_archive_serialize(self.create_inventory(2), self.file_name)
+
+        self.serializer.save(inventory)
+
+        self.assertEqual(self.serializer.num_records_written_by_last_save(), 11)
+        self.assertEqual(self.load(lambda archive: len(archive.root().items())), 10)
+
+    def test_compact_rewrites_file(self):
+        inventory = self.create_inventory(10)
+        self.serializer.save(inventory)
+        size = os.path.getsize(self.file_name)
+        for i in range(10):
+            inventory.items()[i].value().set(numpy.int32(i + 1))
+            self.serializer.save(inventory)
+        self.assertGreater(os.path.getsize(self.file_name), size * 2)
+
+        self.serializer.compact()
+        self.serializer.save(inventory)
+
+        self.assertEqual(os.path.getsize(self.file_name), size)
+        values = self.load(lambda archive: [item.value().value() for item in archive.root().items()])
+        self.assertEqual(values, list(range(1, 11)))
+
+
+def define_test_suite(suite: TestSuite):
+    suite.addTest(unittest.makeSuite(IncrementalArchiveTest))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import os
+import unittest
+from unittest import TestSuite
+
+import numpy
+
+from hana04.base.serialize.file_deserializer import FileDeserializer
+from hana04.base.serialize.file_serializer import FileSerializer
+from hana04_test.base.serialize.node_model import Leaf, Pair, Scene, NodeTestCase
+
+
+class IndexedArchiveTest(NodeTestCase):
+    HANA_CLASSES = [Leaf, Pair, Scene]
+
+    def setUp(self):
+        super().setUp()
+        self.file_name = os.path.join(self.temp_dir.name, "scene.hanaidx")
+
+    def create_scene(self, num_pairs: int) -> Scene:
+        shared = self.create_object(Leaf, value=numpy.int32(-1))
+        pairs = [
+            self.create_object(Pair, left=self.create_object(Leaf, value=numpy.int32(i)), right=shared)
+            for i in range(num_pairs)
+        ]
+        return self.create_object(Scene, pairs=pairs)
+
+    def test_root_round_trip(self):
+        file_serializer: FileSerializer = self.injector.get_instance(FileSerializer)
+        file_deserializer: FileDeserializer = self.injector.get_instance(FileDeserializer)
+        file_serializer.indexed_archive_serialize(self.create_scene(3), self.file_name)
+
+        with file_deserializer.open_indexed_archive(self.file_name) as archive:
+            scene = archive.root()
+
+            self.assertTrue(isinstance(scene, Scene))
+            self.assertEqual([pair.left().value() for pair in scene.pairs()], [0, 1, 2])
+            self.assertIs(scene.pairs()[0].right(), scene.pairs()[2].right())
+            self.assertEqual(scene.pairs()[1].right().value(), -1)
+            self.assertIs(archive.root(), scene)
+
+    def test_objects_are_materialized_on_demand(self):
+        file_serializer: FileSerializer = self.injector.get_instance(FileSerializer)
+        file_deserializer: FileDeserializer = self.injector.get_instance(FileDeserializer)
+        file_serializer.indexed_archive_serialize(self.create_scene(3), self.file_name)
+
+        with file_deserializer.open_indexed_archive(self.file_name) as archive:
+            pair_refs = [ref for ref in archive.refs() if archive.type_id(ref) == -10021]
+            self.assertEqual(len(pair_refs), 3)
+            self.assertEqual(len(archive.refs()), 8)
+
+            pair = archive.get(pair_refs[1])
+
+            self.assertTrue(isinstance(pair, Pair))
+            self.assertEqual(pair.left().value(), 1)
+            self.assertTrue(archive.is_materialized(pair_refs[1]))
+            self.assertFalse(archive.is_materialized(pair_refs[0]))
+            self.assertFalse(archive.is_materialized(pair_refs[2]))
+            self.assertIs(archive.get(pair_refs[1]), pair)
+
+    def test_open_non_archive(self):
+        file_serializer: FileSerializer = self.injector.get_instance(FileSerializer)
+        file_deserializer: FileDeserializer = self.injector.get_instance(FileDeserializer)
+        file_serializer.binary_serialize(self.create_scene(1), self.file_name)
+
+        with self.assertRaises(ValueError):
+            file_deserializer.open_indexed_archive(self.file_name)
+
+
+def define_test_suite(suite: TestSuite):
+    suite.addTest(unittest.makeSuite(IndexedArchiveTest))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+import tempfile
+from typing import Dict, List, Optional
+from unittest import TestCase
+
+import numpy
+
+from hana04.apt.extensible.hana_meta import hana_module
+from hana04.apt.extensible.hana_object_decorators import hana_object, hana_property
+from hana04.apt.extensible.hana_object_meta import HanaObjectMeta
+from hana04.base.caching.wrapped import Wrapped
+from hana04.base.extension.hana_object import HanaObject
+from hana04.base.filesystem.file_path import FilePath
+from hana04.base.module import HanaBaseModule
+from hana04.serialize.module import HanaSerializeModule
+from jyuusu.factory_resolver import factory_class
+from jyuusu.injectors import create_injector
+
+
+@hana_object
+class Node(HanaObject):
+    _HANA_META = HanaObjectMeta(
+        type_id=-10062,
+        type_names=["Node"])
+
+    @hana_property(_HANA_META, 1)
+    def value(self) -> numpy.int32:
+        pass
+
+    @hana_property(_HANA_META, 2)
+    def name(self) -> Optional[str]:
+        pass
+
+    @hana_property(_HANA_META, 3)
+    def children(self) -> List[HanaObject]:
+        pass
+
+    @hana_property(_HANA_META, 4)
+    def namedChildren(self) -> Dict[str, HanaObject]:
+        pass
+
+    @hana_property(_HANA_META, 5)
+    def wrapped(self) -> Optional[Wrapped[HanaObject]]:
+        pass
+
+    @hana_property(_HANA_META, 6)
+    def weights(self) -> List[numpy.float64]:
+        pass
+
+    @hana_property(_HANA_META, 7)
+    def shared(self) -> Optional[HanaObject]:
+        pass
+
+    @hana_property(_HANA_META, 8)
+    def path(self) -> Optional[FilePath]:
+        pass
+
+
+@hana_object
+class Leaf(HanaObject):
+    _HANA_META = HanaObjectMeta(
+        type_id=-10020,
+        type_names=["Leaf"])
+
+    @hana_property(_HANA_META, 1)
+    def value(self) -> numpy.int32:
+        pass
+
+
+@hana_object
+class Pair(HanaObject):
+    _HANA_META = HanaObjectMeta(
+        type_id=-10021,
+        type_names=["Pair"])
+
+    @hana_property(_HANA_META, 1)
+    def left(self) -> Leaf:
+        pass
+
+    @hana_property(_HANA_META, 2)
+    def right(self) -> Leaf:
+        pass
+
+
+@hana_object
+class Scene(HanaObject):
+    _HANA_META = HanaObjectMeta(
+        type_id=-10022,
+        type_names=["Scene"])
+
+    @hana_property(_HANA_META, 1)
+    def pairs(self) -> List[Pair]:
+        pass
+
+
+def create_model_injector(*classes: type):
+    return create_injector(
+        HanaBaseModule,
+        HanaSerializeModule,
+        *[hana_module(cls) for cls in classes])
+
+
+class NodeTestCase(TestCase):
+    """
+    Gives each test an injector that knows the classes in HANA_CLASSES and a temporary directory.
+    """
+
+    HANA_CLASSES = [Node]
+
+    def setUp(self):
+        self.injector = create_model_injector(*self.HANA_CLASSES)
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def create_object(self, cls, **values):
+        raw_data = cls._HANA_META.raw_data_class()
+        for name, value in values.items():
+            setattr(raw_data, name, value)
+        return self.injector.get_instance(factory_class(cls._HANA_META.impl_class)).create(raw_data)
+
+    def create(self, value: int, **values) -> Node:
+        return self.create_object(Node, value=numpy.int32(value), **values)
@@ -0,0 +1,107 @@
+import mmap
+import os
+import unittest
+from unittest import TestSuite, mock
+
+import numpy
+
+from hana04.base.serialize.binary import parallel_binary_deserializer
+from hana04.base.serialize.binary.binary_deserializer import BinaryDeserializer
+from hana04.base.serialize.binary.parallel_binary_deserializer import DependentSubtreesError, \
+    ParallelBinaryDeserializer, _HanaSerializablePickler, _deserialize_ranges
+from hana04.base.serialize.file_deserializer import FileDeserializer
+from hana04.base.serialize.file_serializer import FileSerializer
+from hana04_test.base.serialize.node_model import Leaf, Pair, Scene, NodeTestCase, create_model_injector
+
+
+def create_test_injector():
+    return create_model_injector(Leaf, Pair, Scene)
+
+
+def create_binary_deserializer_factory() -> BinaryDeserializer.Factory:
+    return create_test_injector().get_instance(BinaryDeserializer.Factory)
+
+
+def create_binary_deserializer_factory_without_leaves() -> BinaryDeserializer.Factory:
+    return create_model_injector(Pair, Scene).get_instance(BinaryDeserializer.Factory)
+
+
+class ParallelBinaryDeserializerTest(NodeTestCase):
+    HANA_CLASSES = [Leaf, Pair, Scene]
+
+    def setUp(self):
+        super().setUp()
+        self.file_name = os.path.join(self.temp_dir.name, "scene.hanab")
+
+    def create_scene(self, num_pairs: int, share_right: bool) -> Scene:
+        shared = self.create_object(Leaf, value=numpy.int32(-1))
+        pairs = []
+        for i in range(num_pairs):
+            right = shared if share_right else self.create_object(Leaf, value=numpy.int32(-i))
+            pairs.append(self.create_object(Pair, left=self.create_object(Leaf, value=numpy.int32(i)), right=right))
+        return self.create_object(Scene, pairs=pairs)
+
+    def deserialize(self, scene: Scene):
+        file_serializer: FileSerializer = self.injector.get_instance(FileSerializer)
+        file_deserializer: FileDeserializer = self.injector.get_instance(FileDeserializer)
+        file_serializer.binary_serialize(scene, self.file_name)
+        return (
+            file_deserializer.binary_deserialize(self.file_name),
+            file_deserializer.parallel_binary_deserialize(
+                self.file_name, create_binary_deserializer_factory, max_workers=2))
+
+    def test_independent_children(self):
+        serial, parallel = self.deserialize(self.create_scene(5, share_right=False))
+
+        self.assertTrue(isinstance(parallel, Scene))
+        self.assertEqual(
+            [(pair.left().value(), pair.right().value()) for pair in parallel.pairs()],
+            [(pair.left().value(), pair.right().value()) for pair in serial.pairs()])
+
+    def test_shared_children_fall_back_to_serial(self):
+        serial, parallel = self.deserialize(self.create_scene(5, share_right=True))
+
+        self.assertEqual(
+            [(pair.left().value(), pair.right().value()) for pair in parallel.pairs()],
+            [(pair.left().value(), pair.right().value()) for pair in serial.pairs()])
+        self.assertIs(parallel.pairs()[0].right(), parallel.pairs()[4].right())
+
+    def test_object_without_property_values_is_not_sent_back(self):
+        leaf = self.create_object(Leaf, value=numpy.int32(1))
+
+        with mock.patch.object(leaf, "get_binary_property_values", return_value=None):
+            with self.assertRaises(DependentSubtreesError):
+                _HanaSerializablePickler.get_content(leaf)
+
+    def deserialize_ranges_in_process(self, scene: Scene, deserializer_factory_provider):
+        self.injector.get_instance(FileSerializer).binary_serialize(scene, self.file_name)
+        with open(self.file_name, "rb") as fin:
+            with mmap.mmap(fin.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                data_offset, _ = FileDeserializer.read_binary_header(buffer, self.file_name)
+                deserializer = ParallelBinaryDeserializer(
+                    self.file_name, {}, deserializer_factory_provider)
+                _, subtrees = deserializer.scan(buffer, data_offset)
+        parallel_binary_deserializer._initialize_worker(deserializer_factory_provider)
+        try:
+            return _deserialize_ranges(self.file_name, [(subtree.start, subtree.end) for subtree in subtrees[1:]])
+        finally:
+            parallel_binary_deserializer._worker_deserializer_factory = None
+
+    def test_dependent_subtrees_are_not_decoded_in_worker(self):
+        scene = self.create_scene(3, share_right=True)
+
+        self.assertIsNone(self.deserialize_ranges_in_process(scene, create_binary_deserializer_factory))
+
+    def test_decoding_errors_in_worker_are_raised(self):
+        scene = self.create_scene(3, share_right=False)
+
+        with self.assertRaises(KeyError):
+            self.deserialize_ranges_in_process(scene, create_binary_deserializer_factory_without_leaves)
+
+
+def define_test_suite(suite: TestSuite):
+    suite.addTest(unittest.makeSuite(ParallelBinaryDeserializerTest))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+import os
+import unittest
+from io import BytesIO
+from typing import List
+from unittest import TestSuite
+
+from hana04.base.filesystem.file_path import FilePath
+from hana04.base.serialize.binary.binary_serializer import BinarySerializer
+from hana04.base.serialize.file_deserializer import FileDeserializer
+from hana04.base.serialize.file_serializer import FileSerializer
+from hana04.base.serialize.profiling import SerializationProfile, BINARY_SERIALIZE, BINARY_DESERIALIZE, \
+    READABLE_SERIALIZE, READABLE_DESERIALIZE, ProfiledTypeBinarySerializer
+from hana04.serialize.type_ids import TYPE_ID_FILE_PATH, TYPE_NAME_FILE_PATH
+from hana04.base.util.message_packer import BufferedMessagePacker
+from hana04_test.base.serialize.node_model import Node, NodeTestCase
+
+
+class SerializationProfileTest(NodeTestCase):
+    def create_tree_node(self, value: int, children: List[Node]) -> Node:
+        return self.create(value, path=FilePath.absolute("/data/file%d.bin" % value), children=children)
+
+    def create_tree(self) -> Node:
+        # 1 + 3 + 9 nodes.
+        return self.create_tree_node(
+            0, [self.create_tree_node(i, [self.create_tree_node(i * 10 + j, []) for j in range(3)]) for i in range(3)])
+
+    def test_binary_file(self):
+        file_name = os.path.join(self.temp_dir.name, "tree.hana")
+        profile = SerializationProfile()
+
+        self.injector.get_instance(FileSerializer).binary_serialize(self.create_tree(), file_name, profile=profile)
+        root = self.injector.get_instance(FileDeserializer).binary_deserialize(file_name, profile=profile)
+
+        self.assertEqual(root.children()[2].children()[1].value(), 21)
+        node_profile = profile.get_type_profile(BINARY_SERIALIZE, -10062)
+        self.assertEqual(node_profile.name, "Node")
+        self.assertEqual(node_profile.num_calls, 13)
+        self.assertGreater(node_profile.seconds, 0)
+        path_profile = profile.get_type_profile(BINARY_SERIALIZE, TYPE_ID_FILE_PATH)
+        self.assertEqual(path_profile.name, "FilePath")
+        self.assertEqual(path_profile.num_calls, 13)
+        self.assertGreater(path_profile.num_bytes, 13 * len("/data/file0.bin"))
+        self.assertLess(node_profile.num_bytes + path_profile.num_bytes, os.path.getsize(file_name))
+
+        node_profile = profile.get_type_profile(BINARY_DESERIALIZE, -10062)
+        self.assertEqual(node_profile.name, "Node")
+        self.assertEqual(node_profile.num_calls, 13)
+        self.assertGreater(node_profile.num_bytes, 0)
+        self.assertEqual(profile.get_type_profile(BINARY_DESERIALIZE, TYPE_ID_FILE_PATH).num_calls, 13)
+
+    def test_readable_file(self):
+        file_name = os.path.join(self.temp_dir.name, "tree.json")
+        profile = SerializationProfile()
+
+        self.injector.get_instance(FileSerializer).readable_serialize(self.create_tree(), file_name, profile=profile)
+        root = self.injector.get_instance(FileDeserializer).readable_deserialize(file_name, profile=profile)
+
+        self.assertEqual(root.children()[2].children()[1].value(), 21)
+        for operation in [READABLE_SERIALIZE, READABLE_DESERIALIZE]:
+            node_profile = profile.get_type_profile(operation, "Node")
+            self.assertEqual(node_profile.name, "Node")
+            self.assertEqual(node_profile.num_calls, 13)
+            self.assertEqual(node_profile.num_bytes, 0)
+            self.assertEqual(profile.get_type_profile(operation, TYPE_NAME_FILE_PATH).num_calls, 13)
+
+    def test_profile_accumulates(self):
+        profile = SerializationProfile()
+        factory = self.injector.get_instance(BinarySerializer.Factory)
+        for _ in range(2):
+            packer = BufferedMessagePacker(BytesIO())
+            factory.create(packer, profile=profile).serialize(self.create_tree())
+
+        self.assertEqual(profile.get_type_profile(BINARY_SERIALIZE, -10062).num_calls, 26)
+
+    def test_no_profile(self):
+        serializer = self.injector.get_instance(BinarySerializer.Factory).create(BufferedMessagePacker(BytesIO()))
+
+        self.assertFalse(any(
+            isinstance(type_serializer, ProfiledTypeBinarySerializer)
+            for type_serializer in serializer.type_id_to_serializer.values()))
+
+    def test_report(self):
+        profile = SerializationProfile()
+        file_name = os.path.join(self.temp_dir.name, "tree.hana")
+        self.injector.get_instance(FileSerializer).binary_serialize(self.create_tree(), file_name, profile=profile)
+
+        report = profile.report()
+
+        lines = report.split("\n")
+        self.assertEqual(lines[0], BINARY_SERIALIZE)
+        self.assertTrue(any("Node" in line.split() for line in lines))
+        self.assertTrue(any("FilePath" in line for line in lines))
+        self.assertEqual(len(profile.report(limit=1).split("\n")), 3)
+        self.assertEqual(profile.report(READABLE_SERIALIZE), "")
+
+
+def define_test_suite(suite: TestSuite):
+    suite.addTest(unittest.makeSuite(SerializationProfileTest))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+import json
+import os
+import unittest
+from typing import List
+from unittest import TestSuite
+
+from hana04.base.serialize.file_deserializer import FileDeserializer
+from hana04.base.serialize.file_serializer import FileSerializer
+from hana04.base.serialize.readable.constants import READABLE_IDS_CONTENT, READABLE_IDS_SEQUENTIAL, \
+    READABLE_LAYOUT_CHILDREN, READABLE_LAYOUT_PROPS, READABLE_IDS_UUID
+from hana04.base.serialize.readable.readable_deserializer import ReadableDeserializer
+from hana04.base.serialize.readable.readable_serializer import ReadableSerializer, CONTENT_ID_LENGTH
+from hana04.base.serialize.readable.readable_stream_writer import ReadableStreamWriter
+from hana04_test.base.serialize.node_model import Node, NodeTestCase
+
+
+class ReadableIdsTest(NodeTestCase):
+    def create_graph(self) -> Node:
+        shared = self.create(100, name="shared")
+        return self.create(
+            0,
+            name="root",
+            children=[
+                self.create(1, children=[shared]),
+                self.create(2, name="leaf"),
+                self.create(2, name="leaf"),
+                shared,
+            ])
+
+    def assert_same_graph(self, node: Node):
+        self.assertEqual(node.value(), 0)
+        self.assertEqual(node.name(), "root")
+        self.assertEqual([child.value() for child in node.children()], [1, 2, 2, 100])
+        self.assertIs(node.children()[0].children()[0], node.children()[3])
+        self.assertIsNot(node.children()[1], node.children()[2])
+
+    def create_serializer(self, id_strategy: str, layout: str = READABLE_LAYOUT_CHILDREN) -> ReadableSerializer:
+        return self.injector.get_instance(ReadableSerializer.Factory).create(layout=layout, id_strategy=id_strategy)
+
+    def deserialize(self, json_):
+        return self.injector.get_instance(ReadableDeserializer.Factory).create().deserialize(json_)
+
+    def collect_ids(self, json_, ids: List[str]) -> List[str]:
+        if isinstance(json_, dict):
+            for key, value in json_.items():
+                if key == "id" and json_.get("type") != "LookUp":
+                    ids.append(value)
+                else:
+                    self.collect_ids(value, ids)
+        elif isinstance(json_, list):
+            for item in json_:
+                self.collect_ids(item, ids)
+        return ids
+
+    def test_uuid_is_default(self):
+        json_ = self.injector.get_instance(ReadableSerializer.Factory).create().serialize(self.create_graph())
+
+        self.assertEqual(len(json_["id"]), 36)
+
+    def test_sequential(self):
+        for layout in [READABLE_LAYOUT_CHILDREN, READABLE_LAYOUT_PROPS]:
+            with self.subTest(layout=layout):
+                json_ = self.create_serializer(READABLE_IDS_SEQUENTIAL, layout).serialize(self.create_graph())
+
+                ids = self.collect_ids(json_, [])
+                self.assertEqual(sorted(ids), sorted("#%d" % i for i in range(len(ids))))
+                self.assert_same_graph(self.deserialize(json_))
+
+    def test_content(self):
+        for layout in [READABLE_LAYOUT_CHILDREN, READABLE_LAYOUT_PROPS]:
+            with self.subTest(layout=layout):
+                first = self.create_serializer(READABLE_IDS_CONTENT, layout).serialize(self.create_graph())
+                second = self.create_serializer(READABLE_IDS_CONTENT, layout).serialize(self.create_graph())
+
+                self.assertEqual(first, second)
+                self.assertEqual(len(first["id"]), CONTENT_ID_LENGTH)
+                self.assert_same_graph(self.deserialize(first))
+
+    def test_content_ids_of_equal_objects_differ(self):
+        json_ = self.create_serializer(READABLE_IDS_CONTENT).serialize(self.create_graph())
+
+        ids = self.collect_ids(json_, [])
+        self.assertEqual(len(ids), len(set(ids)))
+        leaf_ids = [child["id"] for child in json_["children"] if child.get("func") == "children"][1:3]
+        self.assertEqual(leaf_ids[1], leaf_ids[0] + "-1")
+
+    def test_content_ids_depend_on_content(self):
+        first = self.create_serializer(READABLE_IDS_CONTENT).serialize(self.create(1, name="a"))
+        second = self.create_serializer(READABLE_IDS_CONTENT).serialize(self.create(1, name="b"))
+
+        self.assertNotEqual(first["id"], second["id"])
+
+    def test_stream_writer_matches_serializer(self):
+        graph = self.create_graph()
+        for id_strategy in [READABLE_IDS_SEQUENTIAL, READABLE_IDS_CONTENT]:
+            for layout in [READABLE_LAYOUT_CHILDREN, READABLE_LAYOUT_PROPS]:
+                for indent in [2, None]:
+                    with self.subTest(id_strategy=id_strategy, layout=layout, indent=indent):
+                        pieces = []
+                        ReadableStreamWriter(self.create_serializer(id_strategy, layout), pieces.append, indent) \
+                            .write_value(graph)
+                        expected = self.create_serializer(id_strategy, layout).serialize(graph)
+
+                        self.assertEqual(
+                            "".join(pieces),
+                            json.dumps(expected, indent=indent, separators=(",", ":" if indent is None else ": ")))
+
+    def test_file(self):
+        file_serializer = self.injector.get_instance(FileSerializer)
+        file_deserializer = self.injector.get_instance(FileDeserializer)
+        for id_strategy in [READABLE_IDS_UUID, READABLE_IDS_SEQUENTIAL, READABLE_IDS_CONTENT]:
+            with self.subTest(id_strategy=id_strategy):
+                file_name = os.path.join(self.temp_dir.name, "graph_%s.json" % id_strategy)
+                file_serializer.readable_serialize(self.create_graph(), file_name, id_strategy=id_strategy)
+                self.assert_same_graph(file_deserializer.readable_deserialize(file_name))
+
+    def test_content_file_is_reproducible(self):
+        file_serializer = self.injector.get_instance(FileSerializer)
+        texts = []
+        for index in range(2):
+            file_name = os.path.join(self.temp_dir.name, "graph_%d.json" % index)
+            file_serializer.readable_serialize(self.create_graph(), file_name, id_strategy=READABLE_IDS_CONTENT)
+            with open(file_name, "rt", encoding="utf-8") as fin:
+                texts.append(fin.read())
+
+        self.assertEqual(texts[0], texts[1])
+
+
+def define_test_suite(suite: TestSuite):
+    suite.addTest(unittest.makeSuite(ReadableIdsTest))
+
+
+if __name__ == "__main__":
+    unittest.main()
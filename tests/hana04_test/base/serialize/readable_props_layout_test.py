@@ -0,0 +1,132 @@
+import io
+import json
+import os
+import unittest
+from typing import Dict
+from unittest import TestSuite
+
+import numpy
+
+from hana04.base.caching.wrapped import Direct
+from hana04.base.serialize.file_deserializer import FileDeserializer
+from hana04.base.serialize.file_serializer import FileSerializer
+from hana04.base.serialize.readable.constants import READABLE_LAYOUT_CHILDREN, READABLE_LAYOUT_PROPS
+from hana04.base.serialize.readable.readable_deserializer import ReadableDeserializer
+from hana04.base.serialize.readable.readable_serializer import ReadableSerializer
+from hana04.base.serialize.readable.readable_stream_reader import ReadableStreamReader
+from hana04.base.serialize.readable.readable_stream_writer import ReadableStreamWriter
+from hana04_test.base.serialize.node_model import Node, NodeTestCase
+
+
+class ReadablePropsLayoutTest(NodeTestCase):
+    def create_graph(self) -> Node:
+        shared = self.create(100, name="shared")
+        return self.create(
+            0,
+            name="root",
+            children=[self.create(1, children=[shared]), self.create(2), shared],
+            namedChildren={"a": self.create(3), "b": shared},
+            wrapped=Direct.of(self.create(4)),
+            weights=[numpy.float64(0.5), numpy.float64(1.5)])
+
+    def assert_same_graph(self, node: Node):
+        self.assertEqual(node.value(), 0)
+        self.assertEqual(node.name(), "root")
+        self.assertEqual([child.value() for child in node.children()], [1, 2, 100])
+        shared = node.children()[2]
+        self.assertIs(node.children()[0].children()[0], shared)
+        self.assertIsNone(node.children()[1].name())
+        self.assertEqual(node.children()[1].children(), [])
+        self.assertEqual(node.namedChildren()["a"].value(), 3)
+        self.assertIs(node.namedChildren()["b"], shared)
+        self.assertEqual(node.wrapped().value.value(), 4)
+        self.assertEqual(node.weights(), [0.5, 1.5])
+
+    def serialize(self, obj, layout: str = READABLE_LAYOUT_PROPS):
+        return self.injector.get_instance(ReadableSerializer.Factory).create(layout=layout).serialize(obj)
+
+    def deserialize(self, json_):
+        return self.injector.get_instance(ReadableDeserializer.Factory).create().deserialize(json_)
+
+    def test_props_layout(self):
+        json_ = self.serialize(self.create_graph())
+
+        self.assertNotIn("children", json_)
+        props = json_["props"]
+        self.assertEqual(list(props.keys()), ["value", "name", "children", "namedChildren", "wrapped", "weights"])
+        self.assertEqual(props["value"]["type"], "Integer")
+        self.assertNotIn("func", props["value"])
+        self.assertEqual(len(props["children"]), 3)
+        self.assertEqual(props["children"][0]["props"]["children"][0]["props"]["name"]["value"], "shared")
+        self.assertEqual(props["children"][2]["type"], "LookUp")
+        self.assertEqual(len(props["namedChildren"]), 2)
+        self.assertEqual(len(props["weights"]), 2)
+        self.assertEqual(props["children"][1]["props"], {"value": props["children"][1]["props"]["value"]})
+
+    def test_round_trip(self):
+        self.assert_same_graph(self.deserialize(self.serialize(self.create_graph())))
+
+    def test_smaller_than_children_layout(self):
+        graph = self.create(0, weights=[numpy.float64(i) for i in range(100)])
+
+        props_text = json.dumps(self.serialize(graph))
+        children_text = json.dumps(self.serialize(graph, READABLE_LAYOUT_CHILDREN))
+
+        self.assertLess(len(props_text), len(children_text))
+
+    def test_children_layout_is_still_read(self):
+        self.assert_same_graph(self.deserialize(self.serialize(self.create_graph(), READABLE_LAYOUT_CHILDREN)))
+
+    def test_stream_writer(self):
+        graph = self.create_graph()
+        serializer = self.injector.get_instance(ReadableSerializer.Factory).create(layout=READABLE_LAYOUT_PROPS)
+        for indent in [2, None]:
+            with self.subTest(indent=indent):
+                pieces = []
+                ReadableStreamWriter(serializer, pieces.append, indent, write_size=16).write_value(graph)
+                serializer.obj_id_to_uuid.clear()
+                expected = serializer.serialize(graph)
+                serializer.obj_id_to_uuid.clear()
+
+                text = "".join(pieces)
+                ids = {}
+                self.assertEqual(
+                    json.dumps(self.number_ids(json.loads(text), ids)),
+                    json.dumps(self.number_ids(expected, {})))
+                self.assertEqual(
+                    text,
+                    json.dumps(json.loads(text), indent=indent, separators=(",", ":" if indent is None else ": ")))
+
+    def number_ids(self, json_, ids: Dict[str, int]):
+        if isinstance(json_, dict):
+            return {
+                key: "#%d" % ids.setdefault(value, len(ids)) if key == "id" else self.number_ids(value, ids)
+                for key, value in json_.items()
+            }
+        if isinstance(json_, list):
+            return [self.number_ids(item, ids) for item in json_]
+        return json_
+
+    def test_stream_reader(self):
+        text = json.dumps(self.serialize(self.create_graph()), indent=2)
+        deserializer = self.injector.get_instance(ReadableDeserializer.Factory).create()
+
+        self.assert_same_graph(ReadableStreamReader(io.StringIO(text), read_size=3).read(deserializer))
+
+    def test_file(self):
+        file_name = os.path.join(self.temp_dir.name, "graph.json")
+
+        self.injector.get_instance(FileSerializer).readable_serialize(
+            self.create_graph(), file_name, layout=READABLE_LAYOUT_PROPS)
+
+        with open(file_name, "rt", encoding="utf-8") as fin:
+            self.assertIn('"props"', fin.read())
+        self.assert_same_graph(self.injector.get_instance(FileDeserializer).readable_deserialize(file_name))
+
+
+def define_test_suite(suite: TestSuite):
+    suite.addTest(unittest.makeSuite(ReadablePropsLayoutTest))
+
+
+if __name__ == "__main__":
+    unittest.main()
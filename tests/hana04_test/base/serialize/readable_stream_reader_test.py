@@ -0,0 +1,170 @@
+import io
+import json
+import os
+import unittest
+from typing import Optional
+from unittest import TestSuite
+
+import numpy
+
+from hana04.base.serialize.file_deserializer import FileDeserializer
+from hana04.base.serialize.file_serializer import FileSerializer
+from hana04.base.serialize.profiling import SerializationProfile
+from hana04.base.serialize.readable.readable_deserializer import ReadableDeserializer
+from hana04.base.serialize.readable.readable_serializer import ReadableSerializer
+from hana04.base.serialize.readable.readable_stream_reader import ReadableStreamReader, ReadableChildrenStream
+from hana04.base.util.compression import COMPRESSION_ZLIB
+from hana04_test.base.serialize.node_model import Node, NodeTestCase
+
+
+class CountingSource:
+    def __init__(self, text: str):
+        self.source = io.StringIO(text)
+        self.num_read_chars = 0
+
+    def read(self, size: int) -> str:
+        chunk = self.source.read(size)
+        self.num_read_chars += len(chunk)
+        return chunk
+
+
+class ReadableStreamReaderTest(NodeTestCase):
+    def create_wide_graph(self, size: int) -> Node:
+        shared = self.create(-1, name="shared")
+        return self.create(
+            0,
+            name="root",
+            children=[self.create(i, name="child %d" % i, children=[shared]) for i in range(1, size + 1)],
+            namedChildren={"shared": shared},
+            weights=[numpy.float64(i) / 7.0 for i in range(size)])
+
+    def to_text(self, obj, indent: Optional[int] = 2) -> str:
+        serializer = self.injector.get_instance(ReadableSerializer.Factory).create()
+        return json.dumps(serializer.serialize(obj), indent=indent)
+
+    def create_deserializer(self, profile: Optional[SerializationProfile] = None) -> ReadableDeserializer:
+        return self.injector.get_instance(ReadableDeserializer.Factory).create(profile=profile)
+
+    def read(self, text: str, read_size: int = 1 << 16):
+        return ReadableStreamReader(io.StringIO(text), read_size).read(self.create_deserializer())
+
+    def assert_same_graph(self, node: Node, size: int):
+        self.assertEqual(node.value(), 0)
+        self.assertEqual(node.name(), "root")
+        self.assertEqual(len(node.children()), size)
+        shared = node.namedChildren()["shared"]
+        for i, child in enumerate(node.children()):
+            self.assertEqual(child.value(), i + 1)
+            self.assertEqual(child.name(), "child %d" % (i + 1))
+            self.assertIs(child.children()[0], shared)
+        self.assertEqual(node.weights(), [numpy.float64(i) / 7.0 for i in range(size)])
+
+    def test_read(self):
+        text = self.to_text(self.create_wide_graph(50))
+
+        self.assert_same_graph(self.read(text), 50)
+
+    def test_small_reads(self):
+        # Numbers, strings and keys are split between reads.
+        for read_size in [1, 3, 7]:
+            for indent in [2, None]:
+                with self.subTest(read_size=read_size, indent=indent):
+                    text = self.to_text(self.create_wide_graph(20), indent)
+                    self.assert_same_graph(self.read(text, read_size), 20)
+
+    def test_children_are_parsed_one_at_a_time(self):
+        text = self.to_text(self.create_wide_graph(200))
+        for profile in [None, SerializationProfile()]:
+            with self.subTest(profile=profile):
+                source = CountingSource(text)
+                reader = ReadableStreamReader(source, read_size=256)
+                reader.expect("{")
+                json_object = {}
+
+                children = reader.read_members(json_object, self.create_deserializer(profile))
+
+                self.assertIsInstance(children, ReadableChildrenStream)
+                self.assertEqual(json_object["type"], "Node")
+                first_child = next(iter(children))
+                self.assertEqual(first_child["func"], "value")
+                self.assertLess(source.num_read_chars, len(text) // 10)
+                self.assertLess(len(reader.buffer), 1024)
+
+    def test_file(self):
+        graph = self.create_wide_graph(100)
+        file_serializer = self.injector.get_instance(FileSerializer)
+        file_deserializer = self.injector.get_instance(FileDeserializer)
+        for compression in [None, COMPRESSION_ZLIB]:
+            with self.subTest(compression=compression):
+                file_name = os.path.join(self.temp_dir.name, "graph_%s.json" % compression)
+                file_serializer.readable_serialize(graph, file_name, compression=compression)
+                self.assert_same_graph(file_deserializer.readable_deserialize(file_name), 100)
+
+    def test_root_that_is_not_hana_object(self):
+        self.assertEqual(self.read(self.to_text(numpy.int32(7))), numpy.int32(7))
+        self.assertEqual(self.read(self.to_text("text")), "text")
+
+    def test_numbers_split_between_reads(self):
+        for text in ["0.5", "1e-05", "12.75", "-3E+2", "[1.25, 2e3]"]:
+            for read_size in [1, 2, 3]:
+                with self.subTest(text=text, read_size=read_size):
+                    self.assertEqual(ReadableStreamReader(io.StringIO(text), read_size).decode_value(), json.loads(text))
+
+    def test_nested_values_parsed_with_stack(self):
+        for text in ["[]", "{}", "[1, [2.5, []], {}]", '{"a": {"b": [true, null]}, "c": "d", "e": {}}', '"text"']:
+            for read_size in [1, 3, 1 << 16]:
+                with self.subTest(text=text, read_size=read_size):
+                    self.assertEqual(
+                        ReadableStreamReader(io.StringIO(text), read_size).decode_nested_value(), json.loads(text))
+
+    def test_deeply_nested_value(self):
+        depth = 5000
+        text = '{"a": [1, {}, "x", ' * depth + "null" + "]}" * depth
+
+        value = ReadableStreamReader(io.StringIO(text), read_size=256).decode_value()
+
+        for _ in range(depth):
+            self.assertEqual(value["a"][:3], [1, {}, "x"])
+            value = value["a"][3]
+        self.assertIsNone(value)
+
+    def test_float_member_split_between_reads(self):
+        for read_size in [1, 2, 3, 5]:
+            with self.subTest(read_size=read_size):
+                value = self.read(self.to_text(numpy.float64(12.75)), read_size)
+                self.assertEqual(value, 12.75)
+                self.assertIsInstance(value, numpy.float64)
+
+    def test_children_after_other_members(self):
+        graph = self.create_wide_graph(3)
+        root_json = self.injector.get_instance(ReadableSerializer.Factory).create().serialize(graph)
+        reordered = {key: root_json[key] for key in ["id", "type"]}
+        reordered["children"] = root_json["children"]
+
+        self.assert_same_graph(self.read(json.dumps(reordered), read_size=5), 3)
+
+    def test_extra_data(self):
+        text = self.to_text(self.create_wide_graph(3))
+
+        with self.assertRaises(json.JSONDecodeError):
+            self.read(text + " {}")
+
+    def test_truncated_file(self):
+        text = self.to_text(self.create_wide_graph(3))
+
+        with self.assertRaises(json.JSONDecodeError):
+            self.read(text[:len(text) // 2], read_size=16)
+
+    def test_truncated_nested_value(self):
+        for text in ["[1, [2", '{"a": {"b": 1}', '{"a" 1}', "[1 2]"]:
+            with self.subTest(text=text):
+                with self.assertRaises(json.JSONDecodeError):
+                    ReadableStreamReader(io.StringIO(text), read_size=2).decode_nested_value()
+
+
+def define_test_suite(suite: TestSuite):
+    suite.addTest(unittest.makeSuite(ReadableStreamReaderTest))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import json
+import os
+import re
+import unittest
+from typing import Optional
+from unittest import TestSuite
+
+import numpy
+
+from hana04.base.caching.wrapped import Direct
+from hana04.base.serialize.file_serializer import FileSerializer
+from hana04.base.serialize.readable.readable_serializer import ReadableSerializer
+from hana04.base.serialize.readable.readable_stream_writer import ReadableStreamWriter
+from hana04_test.base.serialize.node_model import Node, NodeTestCase
+
+UUID_PATTERN = re.compile("[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}")
+
+
+def number_ids(text: str) -> str:
+    """
+    Replace the UUIDs in text with their order of appearance, so that texts with different random ids can be compared.
+    """
+    numbers = {}
+
+    def replace(match):
+        return "#%d" % numbers.setdefault(match.group(0), len(numbers))
+
+    return UUID_PATTERN.sub(replace, text)
+
+
+class ReadableStreamWriterTest(NodeTestCase):
+    def create_graph(self) -> Node:
+        shared = self.create(100, name="shared \"node\" あ")
+        return self.create(
+            0,
+            name="root",
+            children=[
+                self.create(1, shared=shared),
+                self.create(2, children=[self.create(3), shared]),
+            ],
+            namedChildren={"a": self.create(4), "b": shared},
+            wrapped=Direct.of(self.create(5, children=[self.create(6)])))
+
+    def create_serializer(self) -> ReadableSerializer:
+        return self.injector.get_instance(ReadableSerializer.Factory).create()
+
+    def stream(self, obj, indent: Optional[int] = 2, write_size: int = 1 << 16) -> str:
+        pieces = []
+        ReadableStreamWriter(self.create_serializer(), pieces.append, indent, write_size).write_value(obj)
+        return "".join(pieces)
+
+    def test_same_text_as_json_dumps(self):
+        graph = self.create_graph()
+        expected = json.dumps(self.create_serializer().serialize(graph), indent=2, ensure_ascii=False)
+
+        self.assertEqual(number_ids(self.stream(graph)), number_ids(expected))
+
+    def test_small_writes(self):
+        graph = self.create_graph()
+        pieces = []
+        ReadableStreamWriter(self.create_serializer(), pieces.append, write_size=16).write_value(graph)
+
+        self.assertGreater(len(pieces), 10)
+        self.assertEqual(number_ids("".join(pieces)), number_ids(self.stream(graph)))
+
+    def test_without_indent(self):
+        graph = self.create_graph()
+        expected = json.dumps(self.create_serializer().serialize(graph), separators=(",", ":"), ensure_ascii=False)
+
+        text = self.stream(graph, indent=None)
+
+        self.assertEqual(number_ids(text), number_ids(expected))
+        self.assertNotIn("\n", text)
+
+    def test_value_that_is_not_hana_serializable(self):
+        self.assertEqual(
+            self.stream(numpy.int32(7)),
+            json.dumps(self.create_serializer().serialize(numpy.int32(7)), indent=2, ensure_ascii=False))
+
+    def test_deep_chain(self):
+        node = self.create(0)
+        for i in range(1, 5000):
+            node = self.create(i, children=[node])
+        file_name = os.path.join(self.temp_dir.name, "chain.json")
+
+        self.injector.get_instance(FileSerializer).readable_serialize(node, file_name, indent=None)
+
+        with open(file_name, "rt", encoding="utf-8") as fin:
+            text = fin.read()
+        self.assertEqual(text.count('"type":"Node"'), 5000)
+        self.assertTrue(text.endswith('"id":"%s"}' % UUID_PATTERN.findall(text)[-1]))
+
+
+def define_test_suite(suite: TestSuite):
+    suite.addTest(unittest.makeSuite(ReadableStreamWriterTest))
+
+
+if __name__ == "__main__":
+    unittest.main()
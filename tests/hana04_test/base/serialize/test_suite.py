@@ -0,0 +1,31 @@
+from unittest import TestSuite
+
+import hana04_test.base.serialize.async_file_serialization_test
+import hana04_test.base.serialize.deep_object_graph_test
+import hana04_test.base.serialize.dispatch_cache_test
+import hana04_test.base.serialize.file_serialization_test
+import hana04_test.base.serialize.incremental_archive_test
+import hana04_test.base.serialize.indexed_archive_test
+import hana04_test.base.serialize.parallel_binary_deserializer_test
+import hana04_test.base.serialize.profiling_test
+import hana04_test.base.serialize.readable_ids_test
+import hana04_test.base.serialize.readable_props_layout_test
+import hana04_test.base.serialize.readable_stream_reader_test
+import hana04_test.base.serialize.readable_stream_writer_test
+import hana04_test.base.serialize.value_dedupe_test
+
+
+def define_test_suite(suite: TestSuite):
+    hana04_test.base.serialize.async_file_serialization_test.define_test_suite(suite)
+    hana04_test.base.serialize.deep_object_graph_test.define_test_suite(suite)
+    hana04_test.base.serialize.dispatch_cache_test.define_test_suite(suite)
+    hana04_test.base.serialize.file_serialization_test.define_test_suite(suite)
+    hana04_test.base.serialize.incremental_archive_test.define_test_suite(suite)
+    hana04_test.base.serialize.indexed_archive_test.define_test_suite(suite)
+    hana04_test.base.serialize.parallel_binary_deserializer_test.define_test_suite(suite)
+    hana04_test.base.serialize.profiling_test.define_test_suite(suite)
+    hana04_test.base.serialize.readable_ids_test.define_test_suite(suite)
+    hana04_test.base.serialize.readable_props_layout_test.define_test_suite(suite)
+    hana04_test.base.serialize.readable_stream_reader_test.define_test_suite(suite)
+    hana04_test.base.serialize.readable_stream_writer_test.define_test_suite(suite)
+    hana04_test.base.serialize.value_dedupe_test.define_test_suite(suite)
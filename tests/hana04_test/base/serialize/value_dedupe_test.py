@@ -0,0 +1,143 @@
+import os
+import tempfile
+import unittest
+from io import BytesIO
+from typing import List
+from unittest import TestCase, TestSuite
+
+import msgpack
+
+from hana04.apt.extensible.hana_meta import hana_module
+from hana04.apt.extensible.hana_object_decorators import hana_object, hana_property
+from hana04.apt.extensible.hana_object_meta import HanaObjectMeta
+from hana04.base.caching.cache_key import CacheKey
+from hana04.base.extension.hana_object import HanaObject
+from hana04.base.filesystem.file_path import FilePath
+from hana04.base.module import HanaBaseModule
+from hana04.base.serialize.binary.binary_deserializer import BinaryDeserializer
+from hana04.base.serialize.binary.binary_serializer import BinarySerializer
+from hana04.base.serialize.binary.constants import BINARY_FORMAT_VERSION, BINARY_FORMAT_VERSION_NATIVE_MAPS, \
+    TYPE_TAG, UUID_TAG, VALUE_TAG
+from hana04.base.serialize.file_deserializer import FileDeserializer
+from hana04.base.serialize.file_serializer import FileSerializer
+from hana04.base.type_ids import TYPE_ID_LOOKUP
+from hana04.base.util.message_packer import MessagePacker
+from hana04.serialize.module import HanaSerializeModule
+from jyuusu.factory_resolver import factory_class
+from jyuusu.injectors import create_injector
+
+
+@hana_object
+class Asset(HanaObject):
+    _HANA_META = HanaObjectMeta(
+        type_id=-10050,
+        type_names=["Asset"])
+
+    @hana_property(_HANA_META, 1)
+    def paths(self) -> List[FilePath]:
+        pass
+
+    @hana_property(_HANA_META, 2)
+    def keys(self) -> List[CacheKey]:
+        pass
+
+    @hana_property(_HANA_META, 3)
+    def names(self) -> List[str]:
+        pass
+
+
+class ValueDedupeTest(TestCase):
+    def setUp(self):
+        self.injector = create_injector(
+            HanaBaseModule,
+            HanaSerializeModule,
+            hana_module(Asset))
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def create_asset(self) -> Asset:
+        raw_data = Asset._HANA_META.raw_data_class()
+        raw_data.paths = [FilePath.absolute("/data/textures/wood_%d.png" % (i % 2)) for i in range(100)]
+        raw_data.keys = [
+            CacheKey.Builder("texture_loader").add_file_path_part(FilePath.absolute("/data/textures/wood_0.png")).build()
+            for _ in range(10)
+        ]
+        raw_data.names = ["a" for _ in range(10)]
+        return self.injector.get_instance(factory_class(Asset._HANA_META.impl_class)).create(raw_data)
+
+    def serialize(self, obj, dedupe_values: bool) -> bytes:
+        out = BytesIO()
+        serializer = self.injector.get_instance(BinarySerializer.Factory).create(
+            MessagePacker(out), format_version=BINARY_FORMAT_VERSION, dedupe_values=dedupe_values)
+        serializer.serialize(obj)
+        return out.getvalue()
+
+    def assert_asset(self, asset: Asset):
+        self.assertEqual(asset.paths(), self.create_asset().paths())
+        self.assertEqual(asset.keys(), self.create_asset().keys())
+        self.assertEqual(asset.names(), ["a" for _ in range(10)])
+        for i in range(2, 100):
+            self.assertIs(asset.paths()[i], asset.paths()[i % 2])
+        for i in range(1, 10):
+            self.assertIs(asset.keys()[i], asset.keys()[0])
+
+    def test_copies_are_written_as_lookups(self):
+        value = msgpack.unpackb(self.serialize(self.create_asset(), True), strict_map_key=False)
+
+        paths = value[VALUE_TAG][1]
+        self.assertTrue(UUID_TAG in paths[0])
+        self.assertTrue(UUID_TAG in paths[1])
+        for path in paths[2:]:
+            self.assertEqual(path[TYPE_TAG], TYPE_ID_LOOKUP)
+        # The CacheKey contains the first path, which has been written before.
+        self.assertEqual(value[VALUE_TAG][2][0][VALUE_TAG][1][0][TYPE_TAG], TYPE_ID_LOOKUP)
+        # Short values are not worth deduplicating.
+        self.assertEqual(value[VALUE_TAG][3], ["a" for _ in range(10)])
+
+    def test_scratch_packers_are_reused(self):
+        out = BytesIO()
+        serializer = self.injector.get_instance(BinarySerializer.Factory).create(
+            MessagePacker(out), format_version=BINARY_FORMAT_VERSION, dedupe_values=True)
+
+        serializer.serialize(self.create_asset())
+
+        # The CacheKeys pack their FilePaths while they are being packed themselves.
+        self.assertEqual(len(serializer.scratch_packers), 2)
+        self.assertEqual(serializer.num_scratch_packers_in_use, 0)
+        self.assertEqual(out.getvalue(), self.serialize(self.create_asset(), True))
+
+    def test_dedupe_is_off_by_default(self):
+        asset = self.create_asset()
+        deduped = self.serialize(asset, True)
+        not_deduped = self.serialize(asset, False)
+
+        self.assertLess(len(deduped), len(not_deduped) // 2)
+        paths = msgpack.unpackb(not_deduped, strict_map_key=False)[VALUE_TAG][1]
+        for path in paths:
+            self.assertFalse(UUID_TAG in path)
+
+    def test_deserialize_returns_shared_instances(self):
+        value = msgpack.unpackb(self.serialize(self.create_asset(), True), strict_map_key=False)
+
+        self.assert_asset(self.injector.get_instance(BinaryDeserializer.Factory).create().deserialize(value))
+
+    def test_file_round_trip(self):
+        file_name = os.path.join(self.temp_dir.name, "asset.hana")
+        self.injector.get_instance(FileSerializer).binary_serialize(self.create_asset(), file_name, dedupe_values=True)
+
+        self.assert_asset(self.injector.get_instance(FileDeserializer).binary_deserialize(file_name))
+
+    def test_dedupe_requires_shared_values_format_version(self):
+        with self.assertRaises(AssertionError):
+            self.injector.get_instance(BinarySerializer.Factory).create(
+                MessagePacker(BytesIO()), format_version=BINARY_FORMAT_VERSION_NATIVE_MAPS, dedupe_values=True)
+
+
+def define_test_suite(suite: TestSuite):
+    suite.addTest(unittest.makeSuite(ValueDedupeTest))
+
+
+if __name__ == "__main__":
+    unittest.main()
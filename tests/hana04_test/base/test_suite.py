@@ -0,0 +1,9 @@
+from unittest import TestSuite
+
+import hana04_test.base.serialize.test_suite
+import hana04_test.base.util.test_suite
+
+
+def define_test_suite(suite: TestSuite):
+    hana04_test.base.serialize.test_suite.define_test_suite(suite)
+    hana04_test.base.util.test_suite.define_test_suite(suite)
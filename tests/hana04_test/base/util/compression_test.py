@@ -0,0 +1,76 @@
+import io
+import os
+import unittest
+from unittest import TestCase, TestSuite
+
+from hana04.base.util.compression import COMPRESSED_FILE_MAGIC, COMPRESSION_BZ2, COMPRESSION_LZMA, \
+    COMPRESSION_ZLIB, CompressedWriter, open_decompressed, read_compression
+
+ALL_COMPRESSIONS = [COMPRESSION_ZLIB, COMPRESSION_LZMA, COMPRESSION_BZ2]
+
+
+class FailingOutput(io.BytesIO):
+    def write(self, data):
+        if self.tell() >= len(COMPRESSED_FILE_MAGIC) + 1:
+            raise OSError("disk full")
+        return super().write(data)
+
+
+class CompressionTest(TestCase):
+    def compress(self, data: bytes, compression: str, chunk_size: int = 1 << 20) -> bytes:
+        out = io.BytesIO()
+        with CompressedWriter(out, compression, chunk_size=chunk_size, max_pending_chunks=2) as writer:
+            for i in range(0, len(data), 1000):
+                writer.write(data[i:i + 1000])
+        return out.getvalue()
+
+    def test_round_trip(self):
+        data = b"".join(b"value %d;" % (i % 1000) for i in range(100000))
+        for compression in ALL_COMPRESSIONS:
+            with self.subTest(compression=compression):
+                compressed = self.compress(data, compression, chunk_size=4096)
+
+                self.assertTrue(compressed.startswith(COMPRESSED_FILE_MAGIC))
+                self.assertLess(len(compressed), len(data) // 5)
+                source = io.BytesIO(compressed)
+                self.assertEqual(read_compression(source), compression)
+                source.seek(0)
+                self.assertEqual(open_decompressed(source).read(), data)
+
+    def test_empty_content(self):
+        for compression in ALL_COMPRESSIONS:
+            with self.subTest(compression=compression):
+                self.assertEqual(open_decompressed(io.BytesIO(self.compress(b"", compression))).read(), b"")
+
+    def test_uncompressed_source_is_left_unread(self):
+        source = io.BytesIO(b'{"type": "Integer"}')
+
+        self.assertIsNone(open_decompressed(source))
+        self.assertEqual(source.tell(), 0)
+
+    def test_unsupported_codec(self):
+        with self.assertRaises(ValueError):
+            read_compression(io.BytesIO(COMPRESSED_FILE_MAGIC + b"\xff"))
+        with self.assertRaises(ValueError):
+            CompressedWriter(io.BytesIO(), "snappy")
+
+    def test_truncated_file(self):
+        compressed = self.compress(os.urandom(10000), COMPRESSION_ZLIB)
+
+        with self.assertRaises(EOFError):
+            open_decompressed(io.BytesIO(compressed[:-10])).read()
+
+    def test_error_in_background_thread_is_raised(self):
+        writer = CompressedWriter(FailingOutput(), COMPRESSION_ZLIB, chunk_size=1)
+        with self.assertRaises(OSError):
+            for _ in range(100):
+                writer.write(os.urandom(100000))
+            writer.close()
+
+
+def define_test_suite(suite: TestSuite):
+    suite.addTest(unittest.makeSuite(CompressionTest))
+
+
+if __name__ == "__main__":
+    unittest.main()
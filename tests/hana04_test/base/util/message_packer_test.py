@@ -0,0 +1,79 @@
+import unittest
+from io import BytesIO
+from unittest import TestCase, TestSuite
+
+import msgpack
+
+from hana04.base.util.message_packer import MessagePacker, BufferedMessagePacker
+
+
+class CountingBytesIO(BytesIO):
+    def __init__(self):
+        super().__init__()
+        self.num_writes = 0
+
+    def write(self, data) -> int:
+        self.num_writes += 1
+        return super().write(data)
+
+
+def pack_sample_values(packer: MessagePacker):
+    packer.pack_map_header(3)
+    packer.pack_int(-1)
+    packer.pack_str("abc")
+    packer.pack_int(-2)
+    packer.pack_array_header(4)
+    packer.pack_bool(True)
+    packer.pack_single_float(1.5)
+    packer.pack_double_float(2.25)
+    packer.pack_bytes(b"\x00\x01\x02")
+    packer.pack_int(10000000000)
+    packer.pack_single_float(-0.5)
+
+
+class BufferedMessagePackerTest(TestCase):
+    def test_output_is_identical_to_message_packer(self):
+        expected = BytesIO()
+        pack_sample_values(MessagePacker(expected))
+
+        buffer = BytesIO()
+        packer = BufferedMessagePacker(buffer)
+        pack_sample_values(packer)
+        packer.flush()
+
+        self.assertEqual(buffer.getvalue(), expected.getvalue())
+        self.assertEqual(
+            msgpack.unpackb(buffer.getvalue(), strict_map_key=False),
+            {-1: "abc", -2: [True, 1.5, 2.25, b"\x00\x01\x02"], 10000000000: -0.5})
+
+    def test_nothing_is_written_before_threshold(self):
+        buffer = CountingBytesIO()
+        packer = BufferedMessagePacker(buffer, flush_threshold=1 << 20, flush_check_interval=1)
+
+        for i in range(1000):
+            packer.pack_int(i)
+
+        self.assertEqual(buffer.num_writes, 0)
+        packer.flush()
+        self.assertEqual(buffer.num_writes, 1)
+
+    def test_writes_in_chunks_at_threshold(self):
+        buffer = CountingBytesIO()
+        packer = BufferedMessagePacker(buffer, flush_threshold=100, flush_check_interval=1)
+
+        packer.pack_array_header(1000)
+        for i in range(1000):
+            packer.pack_int(1000000)
+        packer.flush()
+
+        self.assertGreater(buffer.num_writes, 1)
+        self.assertLess(buffer.num_writes, 100)
+        self.assertEqual(msgpack.unpackb(buffer.getvalue()), [1000000] * 1000)
+
+
+def define_test_suite(suite: TestSuite):
+    suite.addTest(unittest.makeSuite(BufferedMessagePackerTest))
+
+
+if __name__ == "__main__":
+    unittest.main()
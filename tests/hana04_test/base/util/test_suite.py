@@ -0,0 +1,11 @@
+from unittest import TestSuite
+
+import hana04_test.base.util.compression_test
+import hana04_test.base.util.message_packer_test
+import hana04_test.base.util.work_stack_test
+
+
+def define_test_suite(suite: TestSuite):
+    hana04_test.base.util.compression_test.define_test_suite(suite)
+    hana04_test.base.util.message_packer_test.define_test_suite(suite)
+    hana04_test.base.util.work_stack_test.define_test_suite(suite)
@@ -0,0 +1,79 @@
+import unittest
+from unittest import TestCase, TestSuite
+
+from hana04.base.util.work_stack import WorkStack, run_work_stack
+
+
+def expand_sum(n: int):
+    # The sum of 1, ..., n, computed with one generator per number.
+    if n == 0:
+        return 0
+
+    def add():
+        return n + (yield n - 1)
+
+    return add()
+
+
+class WorkStackTest(TestCase):
+    def test_item_without_generator(self):
+        self.assertEqual(run_work_stack(lambda x: x * 2, 21), 42)
+
+    def test_deeper_than_recursion_limit(self):
+        self.assertEqual(run_work_stack(expand_sum, 100000), 100000 * 100001 // 2)
+
+    def test_yielded_generators_run_in_order(self):
+        log = []
+
+        def child(name):
+            log.append(name)
+            return name
+            yield
+
+        def root():
+            first = yield child("a")
+            second = yield child("b")
+            return first + second
+
+        self.assertEqual(run_work_stack(lambda x: x, root()), "ab")
+        self.assertEqual(log, ["a", "b"])
+
+    def test_exception_is_thrown_into_yielding_generator(self):
+        def fail(item):
+            raise ValueError(item)
+
+        def root():
+            try:
+                yield "bad"
+            except ValueError as e:
+                return "caught " + str(e)
+
+        self.assertEqual(run_work_stack(fail, root()), "caught bad")
+
+    def test_uncaught_exception_propagates(self):
+        def leaf():
+            raise KeyError("leaf")
+            yield
+
+        def root():
+            yield leaf()
+
+        with self.assertRaises(KeyError):
+            run_work_stack(lambda x: x, root())
+
+    def test_pause_and_resume(self):
+        work_stack = WorkStack(expand_sum, 100)
+        num_runs = 1
+        while not work_stack.run(max_steps=7):
+            num_runs += 1
+        self.assertTrue(work_stack.finished)
+        self.assertEqual(work_stack.result, 5050)
+        self.assertGreater(num_runs, 10)
+
+
+def define_test_suite(suite: TestSuite):
+    suite.addTest(unittest.makeSuite(WorkStackTest))
+
+
+if __name__ == "__main__":
+    unittest.main()
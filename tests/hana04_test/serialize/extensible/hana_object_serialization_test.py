@@ -1,14 +1,19 @@
+import itertools
+import os
+import tempfile
 import unittest
 from io import BytesIO
 from typing import Optional, List, Dict
-from unittest import TestCase, TestSuite
+from unittest import TestCase, TestSuite, mock
 
 import msgpack
 import numpy
 
+from hana04.apt.extensible.hana_customized_builder_decorators import hana_customized_builder, \
+    hana_customized_builder_module
 from hana04.apt.extensible.hana_meta import hana_module
 from hana04.apt.extensible.hana_object_decorators import hana_object, hana_property
-from hana04.apt.extensible.hana_object_meta import HanaObjectMeta
+from hana04.apt.extensible.hana_object_meta import HanaObjectMeta, hana_object_meta
 from hana04.base.caching.cache_key import CacheKey
 from hana04.base.caching.wrapped import Wrapped, Cached, Direct
 from hana04.base.changeprop.variable import Variable
@@ -16,13 +21,21 @@ from hana04.base.extension.hana_object import HanaObject
 from hana04.base.module import HanaBaseModule
 from hana04.base.serialize.binary.binary_deserializer import BinaryDeserializer
 from hana04.base.serialize.binary.binary_serializer import BinarySerializer
-from hana04.base.serialize.binary.constants import EXTENSION_TAG, TYPE_TAG, VALUE_TAG, UUID_TAG
+from hana04.base.serialize.file_deserializer import FileDeserializer
+from hana04.base.serialize.file_serializer import FileSerializer
+from hana04.base.serialize.binary.constants import EXTENSION_TAG, TYPE_TAG, VALUE_TAG, UUID_TAG, \
+    BINARY_FORMAT_VERSION_INT_REFS, BINARY_FORMAT_VERSION_PACKED_ARRAYS, BINARY_FORMAT_VERSION_UNTAGGED_PRIMITIVES, \
+    BINARY_FORMAT_VERSION_NATIVE_MAPS
+from hana04.base.serialize.hana_serializable_serializers import HanaSerializableReadableSerializer
+from hana04.base.serialize.readable.constants import READABLE_LAYOUT_CHILDREN, READABLE_LAYOUT_PROPS
 from hana04.base.serialize.readable.readable_deserializer import ReadableDeserializer
 from hana04.base.serialize.readable.readable_serializer import ReadableSerializer
-from hana04.base.type_ids import TYPE_ID_HANA_MAP_ENTRY
+from hana04.base.type_ids import TYPE_ID_HANA_MAP_ENTRY, TYPE_ID_LOOKUP, TYPE_ID_PACKED_ARRAY
 from hana04.base.util.message_packer import MessagePacker
+from hana04.base.util.message_unpacker import MessageUnpacker
 from hana04.serialize.module import HanaSerializeModule
 from hana04.serialize.type_ids import TYPE_ID_INTEGER, TYPE_ID_LONG, TYPE_ID_DIRECT, TYPE_ID_STRING
+from jyuusu.constructor_resolver import injectable_class
 from jyuusu.factory_resolver import factory_class
 from jyuusu.injectors import create_injector
 
@@ -62,12 +75,53 @@ class Aaa(HanaObject):
         pass
 
 
+@hana_object
+class Bbb(HanaObject):
+    _HANA_META = HanaObjectMeta(
+        type_id=-10011,
+        type_names=["base.decorators.Bbb"])
+
+    @hana_property(_HANA_META, 1)
+    def firstAaaField(self) -> Aaa:
+        pass
+
+    @hana_property(_HANA_META, 2)
+    def secondAaaField(self) -> Aaa:
+        pass
+
+
+@hana_object
+class FloatKeyed(HanaObject):
+    _HANA_META = HanaObjectMeta(
+        type_id=-10067,
+        type_names=["base.decorators.FloatKeyed"])
+
+    @hana_property(_HANA_META, 1)
+    def floatStringMapField(self) -> Dict[numpy.float32, str]:
+        pass
+
+
+@hana_customized_builder(Aaa)
+@injectable_class
+class CountingAaaBuilder(hana_object_meta(Aaa).default_builder_class):
+    num_built = 0
+
+    def __init__(self, impl_factory: hana_object_meta(Aaa).impl_factory_class):
+        super().__init__(impl_factory)
+
+    def build(self):
+        CountingAaaBuilder.num_built += 1
+        return super().build()
+
+
 class HanaObjectSerializationTest(TestCase):
     def setUp(self) -> None:
         self.injector = create_injector(
             HanaBaseModule,
             HanaSerializeModule,
-            hana_module(Aaa))
+            hana_module(Aaa),
+            hana_module(Bbb),
+            hana_module(FloatKeyed))
 
     def create_AAA_raw_data(self):
         raw_data = Aaa._HANA_META.raw_data_class()
@@ -163,6 +217,88 @@ class HanaObjectSerializationTest(TestCase):
             7: {TYPE_TAG: TYPE_ID_INTEGER, VALUE_TAG: 40}
         })
 
+    def test_hana_object_binary_serialize_content_matches_property_specs(self):
+        factory = self.injector.get_instance(factory_class(Aaa._HANA_META.impl_class))
+        serializer_factory: BinarySerializer.Factory = self.injector.get_instance(BinarySerializer.Factory)
+        for optional_int, format_version in itertools.product([None, numpy.int32(30)], [1, 3, 4, 5]):
+            raw_data = self.create_AAA_raw_data()
+            raw_data.optionalIntField = optional_int
+            raw_data.wrappedIntField = Direct.of(numpy.int32(1))
+            instance: Aaa = factory.create(raw_data)
+
+            generated_buffer = BytesIO()
+            generated_packer = MessagePacker(generated_buffer)
+            instance.binary_serialize_content(
+                generated_packer, serializer_factory.create(generated_packer, format_version=format_version))
+
+            expected_buffer = BytesIO()
+            expected_packer = MessagePacker(expected_buffer)
+            expected_serializer = serializer_factory.create(expected_packer, format_version=format_version)
+            properties = Aaa._HANA_META.properties
+            values = [getattr(instance, property_.private_field_name) for property_ in properties]
+            map_size = 1 + sum(
+                1 for property_, value in zip(properties, values) if property_.should_binary_serialize_value(value))
+            expected_packer.pack_map_header(map_size)
+            for property_, value in zip(properties, values):
+                property_.binary_serialize_value(value, expected_packer, expected_serializer)
+            expected_packer.pack_int(EXTENSION_TAG)
+            expected_serializer.serialize_extensions(instance)
+
+            self.assertEqual(generated_buffer.getvalue(), expected_buffer.getvalue())
+
+    def test_hana_object_iter_readable_serialize_content_matches_property_specs(self):
+        factory = self.injector.get_instance(factory_class(Aaa._HANA_META.impl_class))
+        serializer_factory: ReadableSerializer.Factory = self.injector.get_instance(ReadableSerializer.Factory)
+        for optional_int, layout in itertools.product(
+                [None, numpy.int32(30)], [READABLE_LAYOUT_CHILDREN, READABLE_LAYOUT_PROPS]):
+            raw_data = self.create_AAA_raw_data()
+            raw_data.optionalIntField = optional_int
+            raw_data.intListField = [] if optional_int is None else raw_data.intListField
+            instance: Aaa = factory.create(raw_data)
+            serializer = serializer_factory.create(layout=layout)
+
+            generated = serializer.run(instance.iter_readable_serialize_content(serializer))
+
+            type_serializer = HanaSerializableReadableSerializer()
+            if layout == READABLE_LAYOUT_PROPS:
+                expected = serializer.run(type_serializer.iter_serialize_prop_values(
+                    instance, instance.get_readable_prop_values(), serializer))
+            else:
+                expected = serializer.run(type_serializer.iter_serialize_child_values(
+                    instance, instance.get_readable_child_values(), serializer))
+            self.assertEqual(generated, expected)
+
+    def test_readable_deserialization_of_props(self):
+        deserializer: ReadableDeserializer = self.injector.get_instance(ReadableDeserializer.Factory).create()
+
+        deserialized = deserializer.deserialize({
+            "type": "base.decorators.Aaa",
+            "props": {
+                "intField": {"type": "Integer", "value": 10},
+                "longField": {"type": "Long", "value": 20},
+                "wrappedIntField": {"type": "Direct", "value": {"type": "Integer", "value": 5}},
+                "intListField": [{"type": "Integer", "value": 1}, {"type": "Integer", "value": 2}],
+                "stringIntMapField": [
+                    {
+                        "type": "HanaMapEntry",
+                        "key": {"type": "String", "value": "a"},
+                        "value": {"type": "Integer", "value": 1}
+                    },
+                ],
+                "varIntField": {"type": "Integer", "value": 40},
+                "unknownField": {"type": "Integer", "value": 0},
+            }
+        })
+
+        self.assertTrue(isinstance(deserialized, Aaa))
+        self.assertEqual(deserialized.intField(), numpy.int32(10))
+        self.assertEqual(deserialized.longField(), numpy.int64(20))
+        self.assertIsNone(deserialized.optionalIntField())
+        self.assertEqual(deserialized.wrappedIntField().value, numpy.int32(5))
+        self.assertEqual(deserialized.intListField(), [numpy.int32(1), numpy.int32(2)])
+        self.assertEqual(deserialized.stringIntMapField(), {"a": numpy.int32(1)})
+        self.assertEqual(deserialized.varIntField().value(), numpy.int32(40))
+
     def test_readable_deserialization(self):
         deserializer: ReadableDeserializer = self.injector.get_instance(ReadableDeserializer.Factory).create()
 
@@ -341,6 +477,298 @@ class HanaObjectSerializationTest(TestCase):
                 7: {TYPE_TAG: TYPE_ID_INTEGER, VALUE_TAG: 40}
             })
 
+    def test_binary_stream_deserialization(self):
+        factory = self.injector.get_instance(factory_class(Aaa._HANA_META.impl_class))
+        raw_data = self.create_AAA_raw_data()
+        raw_data.optionalIntField = None
+        raw_data.wrappedIntField = Direct.of(numpy.int32(1))
+        instance: Aaa = factory.create(raw_data)
+
+        buffer = BytesIO()
+        packer = MessagePacker(buffer)
+        serializer_factory: BinarySerializer.Factory = self.injector.get_instance(BinarySerializer.Factory)
+        serializer_factory.create(packer).serialize(instance)
+        buffer.seek(0)
+        deserializer: BinaryDeserializer = self.injector.get_instance(BinaryDeserializer.Factory).create()
+
+        deserialized = deserializer.stream_deserialize(MessageUnpacker(buffer))
+
+        self.assertTrue(isinstance(deserialized, Aaa))
+        self.assertEqual(deserialized.intField(), numpy.int32(10))
+        self.assertEqual(deserialized.longField(), numpy.int64(20))
+        self.assertEqual(deserialized.optionalIntField(), None)
+        self.assertEqual(deserialized.wrappedIntField().value, numpy.int32(1))
+        self.assertEqual(deserialized.intListField(), [numpy.int32(1), numpy.int32(2), numpy.int32(3)])
+        self.assertEqual(deserialized.stringIntMapField(),
+                         {"a": numpy.int32(1), "b": numpy.int32(2)})
+        self.assertEqual(deserialized.varIntField().value(), numpy.int32(40))
+
+    def test_binary_serialization_with_int_refs(self):
+        aaa_factory = self.injector.get_instance(factory_class(Aaa._HANA_META.impl_class))
+        aaa_raw_data = self.create_AAA_raw_data()
+        aaa_raw_data.wrappedIntField = Direct.of(numpy.int32(1))
+        aaa = aaa_factory.create(aaa_raw_data)
+        bbb_factory = self.injector.get_instance(factory_class(Bbb._HANA_META.impl_class))
+        bbb_raw_data = Bbb._HANA_META.raw_data_class()
+        bbb_raw_data.firstAaaField = aaa
+        bbb_raw_data.secondAaaField = aaa
+        bbb = bbb_factory.create(bbb_raw_data)
+
+        buffer = BytesIO()
+        packer = MessagePacker(buffer)
+        serializer_factory: BinarySerializer.Factory = self.injector.get_instance(BinarySerializer.Factory)
+        serializer_factory.create(packer, format_version=BINARY_FORMAT_VERSION_INT_REFS).serialize(bbb)
+
+        serialized = msgpack.unpackb(buffer.getvalue(), strict_map_key=False)
+        self.assertEqual(serialized[UUID_TAG], 1)
+        self.assertEqual(serialized[VALUE_TAG][1][UUID_TAG], 0)
+        self.assertEqual(serialized[VALUE_TAG][2], {TYPE_TAG: TYPE_ID_LOOKUP, VALUE_TAG: 0})
+
+        deserializer: BinaryDeserializer = self.injector.get_instance(BinaryDeserializer.Factory).create()
+        deserialized = deserializer.deserialize(serialized)
+        self.assertTrue(isinstance(deserialized, Bbb))
+        self.assertTrue(isinstance(deserialized.firstAaaField(), Aaa))
+        self.assertIs(deserialized.firstAaaField(), deserialized.secondAaaField())
+        self.assertEqual(deserialized.firstAaaField().intListField(),
+                         [numpy.int32(1), numpy.int32(2), numpy.int32(3)])
+
+        buffer.seek(0)
+        stream_deserializer: BinaryDeserializer = self.injector.get_instance(BinaryDeserializer.Factory).create()
+        stream_deserialized = stream_deserializer.stream_deserialize(MessageUnpacker(buffer))
+        self.assertIs(stream_deserialized.firstAaaField(), stream_deserialized.secondAaaField())
+
+    def test_binary_serialization_with_packed_arrays(self):
+        factory = self.injector.get_instance(factory_class(Aaa._HANA_META.impl_class))
+        raw_data = self.create_AAA_raw_data()
+        raw_data.wrappedIntField = Direct.of(numpy.int32(1))
+        instance: Aaa = factory.create(raw_data)
+
+        buffer = BytesIO()
+        packer = MessagePacker(buffer)
+        serializer_factory: BinarySerializer.Factory = self.injector.get_instance(BinarySerializer.Factory)
+        serializer_factory.create(packer, format_version=BINARY_FORMAT_VERSION_PACKED_ARRAYS).serialize(instance)
+
+        serialized = msgpack.unpackb(buffer.getvalue(), strict_map_key=False)
+        self.assertEqual(
+            serialized[VALUE_TAG][5],
+            {TYPE_TAG: TYPE_ID_PACKED_ARRAY, VALUE_TAG: [0, b"\x01\x00\x00\x00\x02\x00\x00\x00\x03\x00\x00\x00"]})
+
+        deserializer: BinaryDeserializer = self.injector.get_instance(BinaryDeserializer.Factory).create()
+        deserialized = deserializer.deserialize(serialized)
+        self.assertEqual(deserialized.intListField(), [numpy.int32(1), numpy.int32(2), numpy.int32(3)])
+        self.assertTrue(all(isinstance(item, numpy.int32) for item in deserialized.intListField()))
+
+        buffer.seek(0)
+        stream_deserializer: BinaryDeserializer = self.injector.get_instance(BinaryDeserializer.Factory).create()
+        stream_deserialized = stream_deserializer.stream_deserialize(MessageUnpacker(buffer))
+        self.assertEqual(stream_deserialized.intListField(), [numpy.int32(1), numpy.int32(2), numpy.int32(3)])
+
+    def test_binary_serialization_of_lists_with_items_of_other_classes(self):
+        factory = self.injector.get_instance(factory_class(Aaa._HANA_META.impl_class))
+        raw_data = self.create_AAA_raw_data()
+        raw_data.wrappedIntField = Direct.of(numpy.int32(1))
+        raw_data.intListField = [numpy.int32(1), numpy.int64(1 << 40)]
+        instance: Aaa = factory.create(raw_data)
+        serializer_factory: BinarySerializer.Factory = self.injector.get_instance(BinarySerializer.Factory)
+
+        buffer = BytesIO()
+        serializer_factory.create(MessagePacker(buffer), format_version=BINARY_FORMAT_VERSION_NATIVE_MAPS) \
+            .serialize(instance)
+        serialized = msgpack.unpackb(buffer.getvalue(), strict_map_key=False)
+        spec_buffer = BytesIO()
+        spec_packer = MessagePacker(spec_buffer)
+        Aaa._HANA_META._property_by_name["intListField"].type_spec.binary_serialize_value(
+            raw_data.intListField,
+            spec_packer,
+            serializer_factory.create(spec_packer, format_version=BINARY_FORMAT_VERSION_NATIVE_MAPS))
+
+        # The numpy.int64 does not fit in a packed array of int32, so the list is written item by item.
+        self.assertEqual(serialized[VALUE_TAG][5], [1, {TYPE_TAG: TYPE_ID_LONG, VALUE_TAG: 1 << 40}])
+        self.assertEqual(msgpack.unpackb(spec_buffer.getvalue(), strict_map_key=False), serialized[VALUE_TAG][5])
+
+        buffer.seek(0)
+        for deserialized in [
+            self.injector.get_instance(BinaryDeserializer.Factory).create().deserialize(serialized),
+            self.injector.get_instance(BinaryDeserializer.Factory).create().stream_deserialize(
+                MessageUnpacker(buffer)),
+        ]:
+            self.assertEqual(
+                [(item.__class__, item) for item in deserialized.intListField()],
+                [(numpy.int32, 1), (numpy.int64, 1 << 40)])
+
+    def test_binary_serialization_with_untagged_primitives(self):
+        factory = self.injector.get_instance(factory_class(Aaa._HANA_META.impl_class))
+        raw_data = self.create_AAA_raw_data()
+        raw_data.wrappedIntField = Direct.of(numpy.int32(1))
+        instance: Aaa = factory.create(raw_data)
+
+        buffer = BytesIO()
+        packer = MessagePacker(buffer)
+        serializer_factory: BinarySerializer.Factory = self.injector.get_instance(BinarySerializer.Factory)
+        serializer_factory.create(packer, format_version=BINARY_FORMAT_VERSION_UNTAGGED_PRIMITIVES).serialize(instance)
+
+        serialized = msgpack.unpackb(buffer.getvalue(), strict_map_key=False)
+        self.assertEqual(serialized[VALUE_TAG][1], 10)
+        self.assertEqual(serialized[VALUE_TAG][2], 20)
+        self.assertEqual(serialized[VALUE_TAG][3], 30)
+        self.assertEqual(
+            serialized[VALUE_TAG][4],
+            {TYPE_TAG: TYPE_ID_DIRECT, VALUE_TAG: {TYPE_TAG: TYPE_ID_INTEGER, VALUE_TAG: 1}})
+        self.assertEqual(serialized[VALUE_TAG][7], 40)
+
+        deserializer: BinaryDeserializer = self.injector.get_instance(BinaryDeserializer.Factory).create()
+        buffer.seek(0)
+        stream_deserializer: BinaryDeserializer = self.injector.get_instance(BinaryDeserializer.Factory).create()
+        for deserialized in [
+            deserializer.deserialize(serialized),
+            stream_deserializer.stream_deserialize(MessageUnpacker(buffer)),
+        ]:
+            self.assertTrue(isinstance(deserialized.intField(), numpy.int32))
+            self.assertEqual(deserialized.intField(), numpy.int32(10))
+            self.assertTrue(isinstance(deserialized.longField(), numpy.int64))
+            self.assertEqual(deserialized.longField(), numpy.int64(20))
+            self.assertEqual(deserialized.optionalIntField(), numpy.int32(30))
+            self.assertEqual(deserialized.wrappedIntField().value, numpy.int32(1))
+            self.assertEqual(deserialized.intListField(), [numpy.int32(1), numpy.int32(2), numpy.int32(3)])
+            self.assertEqual(deserialized.varIntField().value(), numpy.int32(40))
+
+    def test_binary_deserialization_of_tagged_primitives_in_untagged_fields(self):
+        serialized = {
+            TYPE_TAG: -10010,
+            VALUE_TAG: {
+                EXTENSION_TAG: [],
+                1: {TYPE_TAG: TYPE_ID_INTEGER, VALUE_TAG: 10},
+                2: 20,
+                4: {TYPE_TAG: TYPE_ID_DIRECT, VALUE_TAG: {TYPE_TAG: TYPE_ID_INTEGER, VALUE_TAG: 1}},
+                7: {TYPE_TAG: TYPE_ID_INTEGER, VALUE_TAG: 40},
+            },
+        }
+        deserializer: BinaryDeserializer = self.injector.get_instance(BinaryDeserializer.Factory).create()
+
+        deserialized = deserializer.deserialize(serialized)
+
+        self.assertEqual(deserialized.intField(), numpy.int32(10))
+        self.assertTrue(isinstance(deserialized.longField(), numpy.int64))
+        self.assertEqual(deserialized.longField(), numpy.int64(20))
+        self.assertEqual(deserialized.varIntField().value(), numpy.int32(40))
+
+    def test_binary_serialization_with_native_maps(self):
+        factory = self.injector.get_instance(factory_class(Aaa._HANA_META.impl_class))
+        raw_data = self.create_AAA_raw_data()
+        raw_data.wrappedIntField = Direct.of(numpy.int32(1))
+        instance: Aaa = factory.create(raw_data)
+
+        buffer = BytesIO()
+        packer = MessagePacker(buffer)
+        serializer_factory: BinarySerializer.Factory = self.injector.get_instance(BinarySerializer.Factory)
+        serializer_factory.create(packer, format_version=BINARY_FORMAT_VERSION_NATIVE_MAPS).serialize(instance)
+
+        serialized = msgpack.unpackb(buffer.getvalue(), strict_map_key=False)
+        self.assertEqual(serialized[VALUE_TAG][6], {"a": 1, "b": 2})
+
+        deserializer: BinaryDeserializer = self.injector.get_instance(BinaryDeserializer.Factory).create()
+        buffer.seek(0)
+        stream_deserializer: BinaryDeserializer = self.injector.get_instance(BinaryDeserializer.Factory).create()
+        for deserialized in [
+            deserializer.deserialize(serialized),
+            stream_deserializer.stream_deserialize(MessageUnpacker(buffer)),
+        ]:
+            self.assertEqual(deserialized.stringIntMapField(), {"a": numpy.int32(1), "b": numpy.int32(2)})
+            self.assertTrue(all(isinstance(item, numpy.int32) for item in deserialized.stringIntMapField().values()))
+
+    def test_binary_serialization_of_map_keys_of_other_classes(self):
+        factory = self.injector.get_instance(factory_class(FloatKeyed._HANA_META.impl_class))
+        raw_data = FloatKeyed._HANA_META.raw_data_class()
+        raw_data.floatStringMapField = {numpy.float32(0.5): "a", numpy.float64(0.25): "b"}
+        instance: FloatKeyed = factory.create(raw_data)
+
+        buffer = BytesIO()
+        packer = MessagePacker(buffer)
+        serializer_factory: BinarySerializer.Factory = self.injector.get_instance(BinarySerializer.Factory)
+        serializer_factory.create(packer, format_version=BINARY_FORMAT_VERSION_NATIVE_MAPS).serialize(instance)
+
+        serialized = msgpack.unpackb(buffer.getvalue(), strict_map_key=False)
+        # A numpy.float64 key would come back as a numpy.float32 if written bare, so the dict is written as
+        # HanaMapEntry objects.
+        self.assertTrue(isinstance(serialized[VALUE_TAG][1], list))
+        self.assertEqual([entry[TYPE_TAG] for entry in serialized[VALUE_TAG][1]], [TYPE_ID_HANA_MAP_ENTRY] * 2)
+
+        deserializer: BinaryDeserializer = self.injector.get_instance(BinaryDeserializer.Factory).create()
+        buffer.seek(0)
+        stream_deserializer: BinaryDeserializer = self.injector.get_instance(BinaryDeserializer.Factory).create()
+        for deserialized in [
+            deserializer.deserialize(serialized),
+            stream_deserializer.stream_deserialize(MessageUnpacker(buffer)),
+        ]:
+            the_map = deserialized.floatStringMapField()
+            self.assertEqual(the_map, {numpy.float32(0.5): "a", numpy.float64(0.25): "b"})
+            self.assertEqual([key_.__class__ for key_ in the_map], [numpy.float32, numpy.float64])
+
+    @staticmethod
+    def record_decoders(hana_meta: HanaObjectMeta, decoded_property_ids: List[int]):
+        def record(property_id, decoder):
+            def decode(unpacker, raw_data):
+                decoded_property_ids.append(property_id)
+                return (yield from decoder(unpacker, raw_data))
+
+            return decode
+
+        return {
+            property_id: record(property_id, decoder)
+            for property_id, decoder in hana_meta._binary_stream_raw_data_decoders.items()
+        }
+
+    def test_binary_file_and_stream_deserialization_paths(self):
+        aaa_factory = self.injector.get_instance(factory_class(Aaa._HANA_META.impl_class))
+        aaa_raw_data = self.create_AAA_raw_data()
+        aaa_raw_data.wrappedIntField = Direct.of(numpy.int32(1))
+        bbb_raw_data = Bbb._HANA_META.raw_data_class()
+        bbb_raw_data.firstAaaField = aaa_factory.create(aaa_raw_data)
+        bbb_raw_data.secondAaaField = bbb_raw_data.firstAaaField
+        bbb = self.injector.get_instance(factory_class(Bbb._HANA_META.impl_class)).create(bbb_raw_data)
+
+        for customized in [False, True]:
+            modules = [HanaBaseModule, HanaSerializeModule, hana_module(Aaa), hana_module(Bbb)]
+            if customized:
+                modules.append(hana_customized_builder_module(CountingAaaBuilder))
+            injector = create_injector(*modules)
+            with tempfile.TemporaryDirectory() as temp_dir:
+                file_name = os.path.join(temp_dir, "bbb.bin")
+                injector.get_instance(FileSerializer).binary_serialize(bbb, file_name)
+                buffer = BytesIO()
+                injector.get_instance(BinarySerializer.Factory).create(MessagePacker(buffer)).serialize(bbb)
+                buffer.seek(0)
+
+                for source in ["file", "stream"]:
+                    with self.subTest(customized=customized, source=source):
+                        CountingAaaBuilder.num_built = 0
+                        decoded_property_ids = []
+                        with mock.patch.object(Aaa._HANA_META,
+                                               "_binary_stream_raw_data_decoders",
+                                               self.record_decoders(Aaa._HANA_META, decoded_property_ids)):
+                            if source == "file":
+                                deserialized = injector.get_instance(FileDeserializer).binary_deserialize(file_name)
+                            else:
+                                deserialized = injector.get_instance(BinaryDeserializer.Factory).create() \
+                                    .stream_deserialize(MessageUnpacker(buffer))
+
+                        if customized:
+                            self.assertEqual(decoded_property_ids, [])
+                            self.assertEqual(CountingAaaBuilder.num_built, 1)
+                        else:
+                            self.assertEqual(decoded_property_ids, [1, 2, 3, 4, 5, 6, 7])
+                            self.assertEqual(CountingAaaBuilder.num_built, 0)
+                        aaa = deserialized.firstAaaField()
+                        self.assertIs(deserialized.secondAaaField(), aaa)
+                        self.assertEqual(aaa.intField(), numpy.int32(10))
+                        self.assertEqual(aaa.longField(), numpy.int64(20))
+                        self.assertEqual(aaa.optionalIntField(), numpy.int32(30))
+                        self.assertEqual(aaa.wrappedIntField().value, numpy.int32(1))
+                        self.assertEqual(aaa.intListField(), [numpy.int32(1), numpy.int32(2), numpy.int32(3)])
+                        self.assertEqual(aaa.stringIntMapField(), {"a": numpy.int32(1), "b": numpy.int32(2)})
+                        self.assertTrue(isinstance(aaa.stringIntMapField()["a"], numpy.int32))
+                        self.assertEqual(aaa.varIntField().value(), numpy.int32(40))
+
 
 def define_test_suite(suite: TestSuite):
     suite.addTest(unittest.makeSuite(HanaObjectSerializationTest))
@@ -1,4 +1,6 @@
 import math
+import os
+import tempfile
 import unittest
 from io import BytesIO
 from typing import Optional
@@ -19,8 +21,9 @@ from hana04.base.serialize.readable.readable_serializer import ReadableSerialize
 from hana04.base.type_ids import TYPE_ID_HANA_MAP_ENTRY
 from hana04.base.util.hana_map_entry import HanaMapEntry
 from hana04.base.util.message_packer import MessagePacker
+from hana04.base.util.message_unpacker import MessageUnpacker
 from hana04.serialize.type_ids import TYPE_ID_INTEGER, TYPE_ID_STRING, TYPE_ID_BOOLEAN, TYPE_ID_FILE_PATH, \
-    TYPE_ID_CACHE_KEY, TYPE_ID_CACHED
+    TYPE_ID_CACHE_KEY, TYPE_ID_CACHED, TYPE_ID_NDARRAY
 from jyuusu.injectors import create_injector
 
 from hana04.base.module import HanaBaseModule
@@ -286,6 +289,35 @@ class PrimitiveReadableSerializationTest(TestCase):
 
         self.assertEqual(deserialized, Cached.of(CacheKey.Builder("123").add_string_part("abc").build()))
 
+    def test_serialize_ndarray_without_file_name(self):
+        factory: ReadableSerializer.Factory = self.injector.get_instance(ReadableSerializer.Factory)
+        serializer = factory.create()
+
+        serialized = serializer.serialize(numpy.array([[1, 2], [3, 4]], dtype=numpy.int32))
+
+        self.assertEqual(serialized, {
+            "type": "NdArray",
+            "dtype": "<i4",
+            "shape": [2, 2],
+            "value": [[1, 2], [3, 4]]
+        })
+
+    def test_ndarray_round_trip_through_sidecar_file(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_name = os.path.join(temp_dir, "data.json")
+            array = numpy.arange(12, dtype=numpy.float64).reshape(3, 4)
+            serializer_factory: ReadableSerializer.Factory = self.injector.get_instance(ReadableSerializer.Factory)
+            deserializer_factory: ReadableDeserializer.Factory = \
+                self.injector.get_instance(ReadableDeserializer.Factory)
+
+            serialized = serializer_factory.create(file_name).serialize(array)
+            deserialized = deserializer_factory.create(file_name).deserialize(serialized)
+
+            self.assertEqual(serialized["type"], "NdArray")
+            self.assertTrue(serialized["file"].startswith("data.json."))
+            self.assertTrue(os.path.exists(os.path.join(temp_dir, serialized["file"])))
+            self.assertTrue(numpy.array_equal(deserialized, array))
+
     def test_serialize_HanaMapEntry(self):
         factory: ReadableSerializer.Factory = self.injector.get_instance(ReadableSerializer.Factory)
         serializer = factory.create()
@@ -548,6 +580,48 @@ class PrimitiveBinarySerializationTest(TestCase):
 
         self.assertEqual(deserialized, HanaMapEntry("abc", numpy.int32(10)))
 
+    def test_serialize_ndarray(self):
+        serializer, buffer = self.create_serializer_and_buffer()
+
+        serializer.serialize(numpy.array([[1, 2, 3], [4, 5, 6]], dtype="<i2"))
+
+        serialized = msgpack.unpackb(buffer.getvalue(), strict_map_key=False)
+        self.assertEqual(
+            serialized,
+            {
+                TYPE_TAG: TYPE_ID_NDARRAY,
+                VALUE_TAG: [[2, 3], "<i2", b"\x01\x00\x02\x00\x03\x00\x04\x00\x05\x00\x06\x00"]
+            })
+
+    def test_deserialize_ndarray(self):
+        deserializer = self.create_deserializer()
+
+        deserialized = deserializer.deserialize(
+            {
+                TYPE_TAG: TYPE_ID_NDARRAY,
+                VALUE_TAG: [[3, 1], "<f4", numpy.array([1.5, 2.5, 3.5], dtype="<f4").tobytes()]
+            })
+
+        self.assertEqual(deserialized.dtype, numpy.float32)
+        self.assertEqual(deserialized.shape, (3, 1))
+        self.assertEqual(deserialized.tolist(), [[1.5], [2.5], [3.5]])
+
+    def test_stream_deserialize_ndarray(self):
+        serializer, buffer = self.create_serializer_and_buffer()
+        serializer.serialize(numpy.array([1.5, 2.5, 3.5], dtype="<f4"))
+        buffer.seek(0)
+
+        deserialized = self.create_deserializer().stream_deserialize(MessageUnpacker(buffer))
+
+        self.assertEqual(deserialized.dtype, numpy.float32)
+        self.assertEqual(deserialized.tolist(), [1.5, 2.5, 3.5])
+
+    def test_stream_deserialize_malformed_ndarray(self):
+        buffer = BytesIO(msgpack.packb({TYPE_TAG: TYPE_ID_NDARRAY, VALUE_TAG: [[2], "<i4"]}))
+
+        with self.assertRaises(ValueError):
+            self.create_deserializer().stream_deserialize(MessageUnpacker(buffer))
+
 
 def define_test_suite(suite: TestSuite):
     suite.addTest(unittest.makeSuite(PrimitiveReadableSerializationTest))